@@ -3,17 +3,23 @@ FastAPI Web Server for SQL Agent
 Provides REST API and serves the web interface.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Query
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
-from pydantic import BaseModel
-from typing import Optional
+from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional, Literal, List
+from contextlib import aclosing, asynccontextmanager
+import asyncio
+import json
+import time
 import os
 
 # Import agent components
 from src.llm.groq_client import GroqClient
 from src.mcp.tools import DatabaseTools
 from src.cache.schema_cache import SchemaCache
+from src.cache.schema_store import create_schema_store
+from src.cache.question_cache import QuestionCache
 from src.agent.nodes import WorkflowNodes
 from src.agent.graph import SQLAgent
 import yaml
@@ -62,21 +68,57 @@ groq_client = GroqClient(
     max_tokens=config['groq']['max_tokens'],
     temperature=config['groq']['temperature']
 )
-db_tools = DatabaseTools(config['database'])
+# Schemas and table stats shared by all workers on this host, kept across restarts
+schema_store = create_schema_store(config['cache'].get('store', {}))
+db_tools = DatabaseTools(config['database'], store=schema_store)
 schema_cache = SchemaCache(
-    ttl_minutes=config['cache']['ttl_minutes'],
-    max_questions=config['cache']['max_questions']
+    ttl_minutes=config['cache'].get('ttl_minutes', 0),
+    max_questions=config['cache'].get('max_questions', 0),
+    version_source=db_tools.get_schema_version,
+    check_seconds=config['cache'].get('schema_check_seconds', 5),
+    loader=db_tools.get_all_schemas,
+    store=schema_store,
+    db_identity=db_tools.identity
 )
-workflow_nodes = WorkflowNodes(groq_client, db_tools, schema_cache)
-agent = SQLAgent(workflow_nodes)
+question_cache_config = config['cache'].get('questions', {})
+question_cache = QuestionCache(
+    max_entries=question_cache_config.get('max_entries', 256),
+    ttl_minutes=question_cache_config.get('ttl_minutes', 60)
+) if question_cache_config.get('enabled', True) else None
+workflow_nodes = WorkflowNodes(groq_client, db_tools, schema_cache, config.get('agent', {}),
+                               config.get('token_budget', {}))
+agent = SQLAgent(workflow_nodes, question_cache, config.get('agent', {}))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load every table schema (and table stats) before the first request, close connections on shutdown"""
+    try:
+        loaded = await asyncio.to_thread(schema_cache.load)
+        print(f">> Schema cache warmed: {loaded} tables")
+        if db_tools.catalog is not None:
+            await asyncio.to_thread(db_tools.catalog.tables)
+    except Exception as e:
+        print(f">> Schema prefetch failed, schemas load on first use: {e}")
+    yield
+    db_tools.close()
+    if schema_store is not None:
+        schema_store.close()
+
 
 # Create FastAPI app
-app = FastAPI(title="SQL Analyst Agent", version="1.0.0")
+app = FastAPI(title="SQL Analyst Agent", version="1.0.0", lifespan=lifespan)
 
 
 # Request/Response models
 class QuestionRequest(BaseModel):
     question: str
+    sql_mode: Optional[Literal["two_step", "single_call"]] = None  # Override config's agent.sql_mode
+
+
+class BatchRequest(BaseModel):
+    questions: List[str] = Field(..., min_length=1, max_length=config['agent'].get('batch_max_questions', 500))
+    concurrency: Optional[int] = Field(None, ge=1, le=64)  # Defaults to agent.batch_concurrency
+    sql_mode: Optional[Literal["two_step", "single_call"]] = None
 
 
 class QuestionResponse(BaseModel):
@@ -84,7 +126,22 @@ class QuestionResponse(BaseModel):
     sql: Optional[str]
     tokens_used: int
     tokens_breakdown: dict
+    prompt_tokens_saved: int = 0
     error: Optional[str]
+    cached: bool = False
+
+
+class BatchItem(QuestionResponse):
+    question: str
+    answer: Optional[str]
+
+
+class BatchResponse(BaseModel):
+    results: List[BatchItem]
+    total: int
+    unique: int
+    failed: int
+    elapsed_seconds: float
 
 
 class StatsResponse(BaseModel):
@@ -93,6 +150,14 @@ class StatsResponse(BaseModel):
     average_per_question: int
     cached_tables: list
     cache_age_minutes: int
+    schema_cache: dict = {}
+    question_cache: dict = {}
+    result_cache: dict = {}
+    db_pool: dict = {}
+    stats_catalog: dict = {}
+    search_index: dict = {}
+    schema_store: dict = {}
+    prompt_compaction: dict = {}
 
 
 # API Routes
@@ -102,18 +167,71 @@ async def ask_question(request: QuestionRequest):
     Ask a question to the SQL Agent.
     """
     try:
-        result = agent.ask(request.question)
+        result = await agent.aask(request.question, request.sql_mode)
         return QuestionResponse(
             answer=result["answer"],
             sql=result.get("sql"),
             tokens_used=result["tokens_used"],
             tokens_breakdown=result.get("tokens_breakdown", {}),
-            error=result.get("error")
+            prompt_tokens_saved=result.get("prompt_tokens_saved", 0),
+            error=result.get("error"),
+            cached=result.get("cached", False)
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/ask/stream")
+async def ask_question_stream(request: QuestionRequest, http_request: Request):
+    """
+    Ask a question and receive server-sent events as each step finishes:
+    tables, sql, rows, answer_token (streamed answer), answer, error, done.
+    """
+    async def event_stream():
+        async with aclosing(agent.astream(request.question, request.sql_mode)) as events:
+            async for event in events:
+                if await http_request.is_disconnected():
+                    print(">> Client disconnected, stopping stream")
+                    break
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/api/ask/batch", response_model=BatchResponse)
+async def ask_batch(request: BatchRequest):
+    """
+    Ask many questions at once (e.g. report generation).
+    Results come back in the original order, with per-question errors.
+    """
+    started = time.perf_counter()
+    results = await agent.aask_many(request.questions, request.concurrency, request.sql_mode)
+    
+    return BatchResponse(
+        results=[
+            BatchItem(
+                question=r["question"],
+                answer=r["answer"],
+                sql=r.get("sql"),
+                tokens_used=r["tokens_used"],
+                tokens_breakdown=r.get("tokens_breakdown", {}),
+                prompt_tokens_saved=r.get("prompt_tokens_saved", 0),
+                error=r.get("error"),
+                cached=r.get("cached", False)
+            )
+            for r in results
+        ],
+        total=len(results),
+        unique=len({agent.normalize_question(q) for q in request.questions}),
+        failed=sum(1 for r in results if r.get("error")),
+        elapsed_seconds=round(time.perf_counter() - started, 3)
+    )
+
+
 @app.get("/api/stats", response_model=StatsResponse)
 async def get_stats():
     """
@@ -127,7 +245,15 @@ async def get_stats():
         questions_asked=groq_stats['questions_asked'],
         average_per_question=groq_stats['average_per_question'],
         cached_tables=cache_stats['cached_tables'],
-        cache_age_minutes=cache_stats['cache_age_minutes']
+        cache_age_minutes=cache_stats['cache_age_minutes'],
+        schema_cache=cache_stats,
+        question_cache=question_cache.get_stats() if question_cache else {},
+        result_cache=db_tools.result_cache.get_stats() if db_tools.result_cache else {},
+        db_pool=db_tools.pool.get_stats() if db_tools.pool else {},
+        stats_catalog=db_tools.catalog.get_stats() if db_tools.catalog else {},
+        search_index=db_tools.search_index.get_stats() if db_tools.search_index else {},
+        schema_store=schema_store.get_stats() if schema_store else {},
+        prompt_compaction=workflow_nodes.compactor.get_stats() if workflow_nodes.compactor else {}
     )
 
 
@@ -138,6 +264,10 @@ async def reset_session():
     """
     groq_client.reset_session()
     schema_cache.clear()
+    if question_cache:
+        question_cache.clear()
+    if db_tools.result_cache:
+        db_tools.result_cache.clear()
     return {"message": "Session reset successfully"}
 
 
@@ -171,14 +301,22 @@ async def get_table_data(
     table_name: str,
     page: int = 1,
     page_size: int = 50,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    result_format: Literal["records", "compact"] = Query("records", alias="format"),
+    cursor: Optional[str] = None,
+    total: Literal["approximate", "exact", "none"] = "approximate"
 ):
     """
     Get paginated data from a specific table.
+    format=compact sends column names once and each row as a list.
+    Pass pagination.next_cursor / prev_cursor back as cursor to move between pages.
+    total=exact counts matching rows, approximate uses table statistics.
     """
     try:
-        data = db_tools.get_table_data(table_name, page, page_size, search)
+        data = db_tools.get_table_data(table_name, page, page_size, search, result_format, cursor, total)
         return data
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -83,6 +83,7 @@ for table in tables:
     print(f"  ✓ Copied {len(rows)} rows")
 
 sqlite_conn.commit()
+sqlite_conn.execute("ANALYZE")  # sqlite_stat1 row counts for the stats catalog
 sqlite_conn.close()
 mysql_conn.close()
 
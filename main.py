@@ -10,6 +10,8 @@ from dotenv import load_dotenv
 from src.llm.groq_client import GroqClient
 from src.mcp.tools import DatabaseTools
 from src.cache.schema_cache import SchemaCache
+from src.cache.schema_store import create_schema_store
+from src.cache.question_cache import QuestionCache
 from src.agent.nodes import WorkflowNodes
 from src.agent.graph import SQLAgent
 from src.ui.cli import create_cli
@@ -60,17 +62,32 @@ def main():
     )
     
     print(">> Connecting to MySQL database...")
-    db_tools = DatabaseTools(config['database'])
+    # Schemas and table stats shared by all workers on this host, kept across restarts
+    schema_store = create_schema_store(config['cache'].get('store', {}))
+    db_tools = DatabaseTools(config['database'], store=schema_store)
     
     print(">> Initializing schema cache...")
     schema_cache = SchemaCache(
-        ttl_minutes=config['cache']['ttl_minutes'],
-        max_questions=config['cache']['max_questions']
+        ttl_minutes=config['cache'].get('ttl_minutes', 0),
+        max_questions=config['cache'].get('max_questions', 0),
+        version_source=db_tools.get_schema_version,
+        check_seconds=config['cache'].get('schema_check_seconds', 5),
+        loader=db_tools.get_all_schemas,
+        store=schema_store,
+        db_identity=db_tools.identity
     )
+    print(f">> Loaded {schema_cache.load()} table schemas")
+    
+    question_cache_config = config['cache'].get('questions', {})
+    question_cache = QuestionCache(
+        max_entries=question_cache_config.get('max_entries', 256),
+        ttl_minutes=question_cache_config.get('ttl_minutes', 60)
+    ) if question_cache_config.get('enabled', True) else None
     
     print(">> Building agent workflow...")
-    workflow_nodes = WorkflowNodes(groq_client, db_tools, schema_cache)
-    agent = SQLAgent(workflow_nodes)
+    workflow_nodes = WorkflowNodes(groq_client, db_tools, schema_cache, config.get('agent', {}),
+                                   config.get('token_budget', {}))
+    agent = SQLAgent(workflow_nodes, question_cache, config.get('agent', {}))
     
     print(">> Starting CLI...\n")
     
@@ -66,6 +66,7 @@ def create_database():
                         round(price * qty, 2)))
 
     conn.commit()
+    conn.execute("ANALYZE")  # sqlite_stat1 row counts for the stats catalog
     conn.close()
     print(f"Database '{DB_NAME}' created successfully with large datasets!")
 
@@ -0,0 +1,204 @@
+"""
+Prompt Compactor
+Shrinks the schema part of generate_sql prompts without an LLM call:
+- short type names (VARCHAR(255) -> text, DECIMAL(10,2) -> num)
+- columns that several tables share with the same type listed once
+- with a token budget, the columns least related to the question dropped
+  first; keys and join columns are always kept
+Reports the tokens saved against the full prompt.
+"""
+
+from typing import Dict, Any, List, Optional, Set, Tuple
+import threading
+import re
+
+from .retriever import tokenize, stem, EXPANSIONS
+from ..llm.prompts import generate_sql_prompt, compact_sql_prompt, estimate_tokens
+
+
+def short_type(column_type: str) -> str:
+    """Type family the model needs to write SQL (lengths and precision dropped)"""
+    lowered = (column_type or "").lower()
+    if lowered.startswith(("enum", "set")):
+        return lowered  # The allowed values are worth their tokens
+    if lowered in ("tinyint(1)", "bool", "boolean"):
+        return "bool"
+    if "int" in lowered:
+        return "int"
+    if any(t in lowered for t in ("char", "text", "clob", "string")):
+        return "text"
+    if any(t in lowered for t in ("real", "float", "double", "dec", "num")):
+        return "num"
+    if "datetime" in lowered or "timestamp" in lowered:
+        return "datetime"
+    if "date" in lowered:
+        return "date"
+    if "blob" in lowered or "binary" in lowered:
+        return "blob"
+    return lowered
+
+
+class PromptCompactor:
+    """Compact schema text for generate_sql prompts, within a token budget"""
+
+    def __init__(self, max_prompt_tokens: int = 0):
+        """
+        Initialize compactor.
+
+        Args:
+            max_prompt_tokens: Token budget of one generate_sql prompt
+                (0 = no budget, only abbreviate and dedupe)
+        """
+        self.max_prompt_tokens = max_prompt_tokens
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.columns_dropped = 0
+        self.over_budget = 0
+
+    @staticmethod
+    def _question_terms(question: str) -> Set[str]:
+        """Stemmed question words plus the schema words they usually stand for"""
+        terms = set(tokenize(question))
+        for word in re.findall(r"[a-z]+", question.lower()):
+            terms.update(stem(w) for w in EXPANSIONS.get(word, []))
+        return terms
+
+    @staticmethod
+    def _relevance(column: str, table: str, terms: Set[str]) -> int:
+        """Question words found in a column name (prefixes of 4+ letters count)"""
+        score = 0
+        own = set(tokenize(table))  # accounts.account_type says nothing more than its table
+        for part in tokenize(column):
+            if part in own:
+                continue
+            if part in terms or any(len(t) >= 4 and (part.startswith(t) or t.startswith(part))
+                                    for t in terms if len(part) >= 4):
+                score += 2
+        # Descriptive columns (name, title) answer "which X" questions about their table
+        if stem(table.lower()) in terms and re.search(r"name|title", column.lower()):
+            score += 1
+        return score
+
+    @staticmethod
+    def _protected(schemas: Dict[str, Any], join_hints: List[str]) -> Set[Tuple[str, str]]:
+        """(table, column) pairs that must stay: keys, foreign keys and join columns"""
+        keep = set()
+        for table, schema in schemas.items():
+            for c in schema["columns"]:
+                if c.get("key") == "PRI":
+                    keep.add((table, c["name"]))
+            for fk in schema.get("foreign_keys", []):
+                keep.add((table, fk["column"]))
+        for hint in join_hints:
+            for side in hint.split("="):
+                table, _, column = side.partition(".")
+                keep.add((table, column))
+        return keep
+
+    @staticmethod
+    def _render(schemas: Dict[str, Any], kept: Dict[str, List[Dict[str, Any]]],
+                protected: Set[Tuple[str, str]], join_hints: List[str]) -> str:
+        """table(col type, ...) lines, shared columns once, then the joins"""
+        # Same name and type in several tables (audit columns and the like), keys excluded
+        owners: Dict[Tuple[str, str], List[str]] = {}
+        for table, columns in kept.items():
+            for c in columns:
+                if (table, c["name"]) not in protected:
+                    owners.setdefault((c["name"], short_type(c["type"])), []).append(table)
+        groups: Dict[Tuple[str, ...], List[str]] = {}
+        shared = set()
+        for (name, column_type), tables in owners.items():
+            if len(tables) > 1:
+                groups.setdefault(tuple(tables), []).append(f"{name} {column_type}".strip())
+                shared.update((table, name) for table in tables)
+
+        lines = []
+        for table in schemas:
+            cols = []
+            for c in kept[table]:
+                if (table, c["name"]) in shared:
+                    continue
+                col = f"{c['name']} {short_type(c['type'])}".strip()
+                if c.get("key") == "PRI":
+                    col += " PK"
+                cols.append(col)
+            lines.append(f"{table}({', '.join(cols)})")
+        for tables, texts in groups.items():
+            lines.append(f"Also in {', '.join(tables)}: {', '.join(texts)}")
+        if join_hints:
+            lines.append(f"Joins: {', '.join(join_hints)}")
+        return "\n".join(lines)
+
+    def compact(self, question: str, schemas: Dict[str, Any], dialect: str,
+                join_hints: Optional[List[str]] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build a compact generate_sql prompt.
+
+        Args:
+            question: User question (ranks the columns)
+            schemas: Schemas of the tables the query may use
+            dialect: SQL dialect name for the prompt
+            join_hints: Join conditions between the tables
+
+        Returns:
+            (prompt, {"tokens", "full_tokens", "saved", "dropped_columns", "over_budget"})
+        """
+        join_hints = join_hints or []
+        full_tokens = estimate_tokens(generate_sql_prompt(question, schemas, dialect, join_hints))
+
+        protected = self._protected(schemas, join_hints)
+        kept = {table: list(schema["columns"]) for table, schema in schemas.items()}
+        prompt = compact_sql_prompt(question, self._render(schemas, kept, protected, join_hints), dialect)
+
+        # Least relevant first, later columns before earlier ones on ties
+        terms = self._question_terms(question)
+        droppable = sorted(
+            (self._relevance(c["name"], table, terms), -position, table, c["name"],
+             len(f"{c['name']} {short_type(c['type'])}, ") / 4)
+            for table, schema in schemas.items()
+            for position, c in enumerate(schema["columns"])
+            if (table, c["name"]) not in protected
+        )
+        dropped = 0
+        while self.max_prompt_tokens and estimate_tokens(prompt) > self.max_prompt_tokens and droppable:
+            # Drop about as many columns as the excess is long, then re-render to check
+            excess = estimate_tokens(prompt) - self.max_prompt_tokens
+            count, size = 0, 0.0
+            while count < len(droppable) and (count == 0 or size < excess):
+                size += droppable[count][4]
+                count += 1
+            batch, droppable = droppable[:count], droppable[count:]
+            gone = {(table, name) for _, _, table, name, _ in batch}
+            kept = {table: [c for c in columns if (table, c["name"]) not in gone]
+                    for table, columns in kept.items()}
+            dropped += len(batch)
+            prompt = compact_sql_prompt(question, self._render(schemas, kept, protected, join_hints), dialect)
+
+        tokens = estimate_tokens(prompt)
+        over_budget = bool(self.max_prompt_tokens) and tokens > self.max_prompt_tokens
+        with self.lock:
+            self.calls += 1
+            self.tokens_before += full_tokens
+            self.tokens_after += tokens
+            self.columns_dropped += dropped
+            self.over_budget += over_budget
+        return prompt, {
+            "tokens": tokens,
+            "full_tokens": full_tokens,
+            "saved": full_tokens - tokens,
+            "dropped_columns": dropped,
+            "over_budget": over_budget
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get compaction statistics"""
+        return {
+            "calls": self.calls,
+            "max_prompt_tokens": self.max_prompt_tokens,
+            "tokens_saved": self.tokens_before - self.tokens_after,
+            "saved_rate": round(1 - self.tokens_after / self.tokens_before, 3) if self.tokens_before else 0.0,
+            "columns_dropped": self.columns_dropped,
+            "over_budget": self.over_budget
+        }
@@ -4,43 +4,171 @@ Connects all the nodes together into a complete agent.
 """
 
 from langgraph.graph import StateGraph, END
-from typing import Dict, Any
+from typing import Dict, Any, Optional, AsyncIterator, List
+from contextlib import aclosing
+import asyncio
 from .state import AgentState
 from .nodes import WorkflowNodes
+from ..cache.question_cache import QuestionCache
+from ..llm.prompts import generate_answer_prompt
+from ..mcp.formats import to_records
 
 
-def create_agent_graph(workflow_nodes: WorkflowNodes) -> StateGraph:
+SQL_MODES = ("two_step", "single_call")
+
+
+def create_agent_graph(workflow_nodes: WorkflowNodes,
+                       config: Optional[Dict[str, Any]] = None,
+                       sql_mode: Optional[str] = None,
+                       use_async: bool = False,
+                       stream_answer: bool = False) -> StateGraph:
     """
     Create the agent workflow graph.
     
     The workflow:
+    0. Route Question → Simple question? Use direct SQL (no LLM)
     1. Analyze Question → Which tables needed?
     2. Fetch Schema → Get table structures
     3. Generate SQL → Write the query
+       Validate SQL → Transpile, check names against the schema, EXPLAIN
     4. Execute Query → Run on database
     5. Generate Answer → Explain results
     
-    With error handling: If SQL fails, retry with fix_sql node.
+    In "single_call" mode, steps 1-3 are one plan_sql call with the full
+    compact schema. It falls back to steps 1-3 if the schema is too large.
+    
+    With error handling: If SQL fails validation or execution, retry with fix_sql node.
+    
+    Args:
+        workflow_nodes: Workflow nodes instance
+        config: Optional 'agent' section of config.yaml
+        sql_mode: "two_step" or "single_call" (defaults to config's sql_mode)
+        use_async: Use the async node variants (run the graph with ainvoke)
+        stream_answer: Only render answers locally; LLM answers are left for
+                       the caller to stream (final_answer stays None)
     """
+    config = config or {}
+    enable_direct_sql = config.get("enable_direct_sql", True)
+    sql_mode = sql_mode or config.get("sql_mode", "two_step")
+    
+    if sql_mode not in SQL_MODES:
+        raise ValueError(f"Unknown sql_mode '{sql_mode}', expected one of {SQL_MODES}")
+    
+    # First LLM step (also where failed direct SQL falls back to)
+    llm_entry = "plan_sql" if sql_mode == "single_call" else "analyze_question"
+    
+    def node(name: str):
+        """Blocking node, or its async variant (aanalyze_question, ...)"""
+        return getattr(workflow_nodes, f"a{name}" if use_async else name)
     
     # Create graph
     graph = StateGraph(AgentState)
     
     # Add nodes
-    graph.add_node("analyze_question", workflow_nodes.analyze_question)
-    graph.add_node("fetch_schema", workflow_nodes.fetch_schema)
-    graph.add_node("generate_sql", workflow_nodes.generate_sql)
-    graph.add_node("execute_query", workflow_nodes.execute_query)
-    graph.add_node("fix_sql", workflow_nodes.fix_sql)
-    graph.add_node("generate_answer", workflow_nodes.generate_answer)
+    if enable_direct_sql:
+        graph.add_node("route_question", node("route_question"))
+        graph.add_node("direct_answer", node("direct_answer"))
+    if sql_mode == "single_call":
+        graph.add_node("plan_sql", node("plan_sql"))
+    graph.add_node("analyze_question", node("analyze_question"))
+    graph.add_node("fetch_schema", node("fetch_schema"))
+    graph.add_node("generate_sql", node("generate_sql"))
+    graph.add_node("validate_sql", node("validate_sql"))
+    graph.add_node("execute_query", node("execute_query"))
+    graph.add_node("fix_sql", node("fix_sql"))
+    graph.add_node("generate_answer", node("prepare_answer" if stream_answer else "generate_answer"))
     
     # Set entry point
-    graph.set_entry_point("analyze_question")
+    if enable_direct_sql:
+        graph.set_entry_point("route_question")
+        
+        def route_after_match(state: Dict[str, Any]) -> str:
+            """Skip the LLM steps if a direct SQL route matched"""
+            return "execute_query" if state.get("direct_route") else llm_entry
+        
+        graph.add_conditional_edges(
+            "route_question",
+            route_after_match,
+            {
+                "execute_query": "execute_query",
+                llm_entry: llm_entry
+            }
+        )
+        graph.add_edge("direct_answer", END)
+    else:
+        graph.set_entry_point(llm_entry)
+    
+    if sql_mode == "single_call":
+        def after_plan(state: Dict[str, Any]) -> str:
+            """Run the SQL, or fall back to two steps for large schemas"""
+            if state.get("execution_error"):
+                return END
+            elif state.get("workflow_step") == "analyze_question":
+                return "analyze_question"
+            else:
+                return "validate_sql"
+        
+        graph.add_conditional_edges(
+            "plan_sql",
+            after_plan,
+            {
+                "analyze_question": "analyze_question",
+                "validate_sql": "validate_sql",
+                END: END
+            }
+        )
     
     # Define edges (workflow flow)
-    graph.add_edge("analyze_question", "fetch_schema")
+    def after_analyze(state: Dict[str, Any]) -> str:
+        """Fetch the schemas, or stop if the LLM call failed"""
+        if state.get("execution_error"):
+            return END
+        return "fetch_schema"
+    
+    graph.add_conditional_edges(
+        "analyze_question",
+        after_analyze,
+        {
+            "fetch_schema": "fetch_schema",
+            END: END
+        }
+    )
     graph.add_edge("fetch_schema", "generate_sql")
-    graph.add_edge("generate_sql", "execute_query")
+    
+    def after_generate(state: Dict[str, Any]) -> str:
+        """Validate the SQL, or stop if the LLM call failed"""
+        if state.get("execution_error"):
+            return END
+        return "validate_sql"
+    
+    graph.add_conditional_edges(
+        "generate_sql",
+        after_generate,
+        {
+            "validate_sql": "validate_sql",
+            END: END
+        }
+    )
+    
+    # Conditional edge after validate_sql
+    def after_validate(state: Dict[str, Any]) -> str:
+        """Run valid SQL, send invalid SQL to fix_sql"""
+        if state.get("should_retry", False):
+            return "fix_sql"
+        elif state.get("execution_error"):
+            return END  # Give up after max retries
+        else:
+            return "execute_query"
+    
+    graph.add_conditional_edges(
+        "validate_sql",
+        after_validate,
+        {
+            "fix_sql": "fix_sql",
+            "execute_query": "execute_query",
+            END: END
+        }
+    )
     
     # Conditional edge after execute_query
     def should_retry_sql(state: Dict[str, Any]) -> str:
@@ -49,22 +177,43 @@ def create_agent_graph(workflow_nodes: WorkflowNodes) -> StateGraph:
             return "fix_sql"
         elif state.get("execution_error"):
             return END  # Give up after max retries
+        elif state.get("workflow_step") == "llm_fallback":
+            return llm_entry  # Direct SQL failed, use the LLM
+        elif state.get("direct_route"):
+            return "direct_answer"
         else:
             return "generate_answer"
     
+    retry_targets = {
+        "fix_sql": "fix_sql",
+        "generate_answer": "generate_answer",
+        END: END
+    }
+    if enable_direct_sql:
+        retry_targets[llm_entry] = llm_entry
+        retry_targets["direct_answer"] = "direct_answer"
+    
     graph.add_conditional_edges(
         "execute_query",
         should_retry_sql,
+        retry_targets
+    )
+    
+    # After fixing SQL, validate and try executing again (stop if the fix call failed)
+    def after_fix(state: Dict[str, Any]) -> str:
+        if state.get("workflow_step") == "error":
+            return END
+        return "validate_sql"
+    
+    graph.add_conditional_edges(
+        "fix_sql",
+        after_fix,
         {
-            "fix_sql": "fix_sql",
-            "generate_answer": "generate_answer",
+            "validate_sql": "validate_sql",
             END: END
         }
     )
     
-    # After fixing SQL, try executing again
-    graph.add_edge("fix_sql", "execute_query")
-    
     # After generating answer, we're done
     graph.add_edge("generate_answer", END)
     
@@ -74,52 +223,330 @@ def create_agent_graph(workflow_nodes: WorkflowNodes) -> StateGraph:
 class SQLAgent:
     """The complete SQL Analyst Agent"""
     
-    def __init__(self, workflow_nodes: WorkflowNodes):
+    def __init__(self, workflow_nodes: WorkflowNodes,
+                 question_cache: Optional[QuestionCache] = None,
+                 config: Optional[Dict[str, Any]] = None):
         """
         Initialize agent.
         
         Args:
             workflow_nodes: Workflow nodes instance
+            question_cache: Optional cache of answered questions (skips the graph on a hit)
+            config: Optional 'agent' section of config.yaml
         """
         self.workflow_nodes = workflow_nodes
-        self.graph = create_agent_graph(workflow_nodes)
+        self.question_cache = question_cache
+        self.config = config or {}
+        self.sql_mode = self.config.get("sql_mode", "two_step")
+        if self.sql_mode not in SQL_MODES:
+            raise ValueError(f"Unknown sql_mode '{self.sql_mode}', expected one of {SQL_MODES}")
+        self._graphs: Dict[tuple, Any] = {}
+        self.graph = self._get_graph(self.sql_mode)
     
-    def ask(self, question: str) -> Dict[str, Any]:
+    def _get_graph(self, sql_mode: Optional[str] = None, use_async: bool = False,
+                   stream_answer: bool = False):
+        """Compiled graph for a topology (compiled on first use)"""
+        key = (sql_mode or self.sql_mode, use_async, stream_answer)
+        if key not in self._graphs:
+            self._graphs[key] = create_agent_graph(
+                self.workflow_nodes, self.config, key[0],
+                use_async=use_async, stream_answer=stream_answer
+            )
+        return self._graphs[key]
+    
+    def ask(self, question: str, sql_mode: Optional[str] = None) -> Dict[str, Any]:
         """
         Ask the agent a question.
         
         Args:
             question: User's question in natural language
+            sql_mode: Override config's sql_mode ("two_step" or "single_call")
+            
+        Returns:
+            Dictionary with answer and metadata
+        """
+        # Answered before? Skip every LLM call
+        cached = self._get_cached(question)
+        if cached is not None:
+            return cached
+        
+        self._print_header(question)
+        
+        graph = self._get_graph(sql_mode)
+        final_state = graph.invoke(self._initial_state(question))
+        
+        result = self._build_result(question, final_state)
+        self._store_cached(question, result, final_state.get("identified_tables", []))
+        
+        return result
+    
+    async def aask(self, question: str, sql_mode: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Ask the agent a question without blocking the event loop.
+        LLM calls are awaited, DB work runs in the workflow nodes' executor.
+        
+        Args:
+            question: User's question in natural language
+            sql_mode: Override config's sql_mode ("two_step" or "single_call")
             
         Returns:
             Dictionary with answer and metadata
         """
-        # Initial state
-        initial_state = {
+        loop = asyncio.get_running_loop()
+        executor = self.workflow_nodes.executor
+        
+        # Answered before? Skip every LLM call
+        cached = await loop.run_in_executor(executor, self._get_cached, question)
+        if cached is not None:
+            return cached
+        
+        self._print_header(question)
+        
+        graph = self._get_graph(sql_mode, use_async=True)
+        final_state = await graph.ainvoke(self._initial_state(question))
+        
+        result = self._build_result(question, final_state)
+        await loop.run_in_executor(
+            executor, self._store_cached, question, result, final_state.get("identified_tables", [])
+        )
+        
+        return result
+    
+    async def astream(self, question: str, sql_mode: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Ask the agent a question and yield progress events as each step finishes.
+        
+        Events are {"event": name, "data": {...}} with names: start, tables,
+        sql, retry, rows, answer_token, answer, error, done.
+        
+        Args:
+            question: User's question in natural language
+            sql_mode: Override config's sql_mode ("two_step" or "single_call")
+        """
+        loop = asyncio.get_running_loop()
+        executor = self.workflow_nodes.executor
+        
+        yield {"event": "start", "data": {"question": question}}
+        
+        # Answered before? Skip every LLM call
+        cached = await loop.run_in_executor(executor, self._get_cached, question)
+        if cached is not None:
+            yield {"event": "answer", "data": {"answer": cached["answer"]}}
+            yield {"event": "done", "data": self._summary(cached)}
+            return
+        
+        self._print_header(question)
+        
+        graph = self._get_graph(sql_mode, use_async=True, stream_answer=True)
+        final_state = self._initial_state(question)
+        
+        async for update in graph.astream(final_state, stream_mode="updates"):
+            for node_name, state in update.items():
+                final_state = state
+                for event in self._node_events(node_name, state):
+                    yield event
+        
+        # Answer wasn't rendered locally: stream it from the LLM
+        if final_state.get("final_answer") is None and final_state.get("query_results") \
+                and not final_state.get("execution_error"):
+            # aclosing: a client that goes away closes the Groq stream now, not at garbage collection
+            async with aclosing(self._stream_answer(final_state)) as answer_events:
+                async for event in answer_events:
+                    if event["event"] == "state":
+                        final_state = event["data"]
+                    else:
+                        yield event
+        
+        if final_state.get("execution_error"):
+            yield {"event": "error", "data": {"error": final_state["execution_error"]}}
+        
+        result = self._build_result(question, final_state)
+        await loop.run_in_executor(
+            executor, self._store_cached, question, result, final_state.get("identified_tables", [])
+        )
+        
+        yield {"event": "done", "data": self._summary(result)}
+    
+    async def _stream_answer(self, state: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Stream answer tokens from Groq, ending with the updated state"""
+        groq = self.workflow_nodes.groq
+        results = state["query_results"]
+        prompt = generate_answer_prompt(
+            state["user_question"], to_records(results, 10), results.get("total_rows") or results["row_count"]
+        )
+        
+        parts = []
+        outcome = {"success": False, "tokens_used": 0}
+        
+        async with aclosing(groq.astream_chat([{"role": "user", "content": prompt}], max_tokens=150)) as chunks:
+            async for chunk in chunks:
+                if chunk["type"] == "token":
+                    parts.append(chunk["content"])
+                    yield {"event": "answer_token", "data": {"token": chunk["content"]}}
+                else:
+                    outcome = chunk
+        
+        if outcome["success"]:
+            answer = "".join(parts)
+            self.workflow_nodes.cache.increment_question_count()
+        else:
+            # Fallback: just show the raw data
+            answer = f"Query returned {results['row_count']} rows: {to_records(results, 10)}"
+        
+        yield {"event": "answer", "data": {"answer": answer}}
+        yield {"event": "state", "data": {
+            **state,
+            "final_answer": answer,
+            "tokens_used": state["tokens_used"] + outcome["tokens_used"],
+            "tokens_breakdown": {
+                **state.get("tokens_breakdown", {}),
+                "generate_answer": outcome["tokens_used"]
+            },
+            "workflow_step": "complete"
+        }}
+    
+    @staticmethod
+    def _node_events(node_name: str, state: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Progress events for a finished graph node"""
+        events = []
+        
+        if node_name in ("route_question", "plan_sql") and state.get("generated_sql"):
+            events.append({"event": "tables", "data": {"tables": state["identified_tables"]}})
+            events.append({"event": "sql", "data": {"sql": state["generated_sql"]}})
+        elif node_name == "analyze_question" and not state.get("execution_error"):
+            events.append({"event": "tables", "data": {"tables": state["identified_tables"]}})
+        elif node_name in ("generate_sql", "fix_sql") and state.get("generated_sql"):
+            events.append({"event": "sql", "data": {"sql": state["generated_sql"]}})
+        elif node_name in ("validate_sql", "execute_query"):
+            if state.get("should_retry"):
+                events.append({"event": "retry", "data": {"error": state["execution_error"]}})
+            elif state.get("query_results") and not state.get("execution_error"):
+                events.append({"event": "rows", "data": {"row_count": state["query_results"]["row_count"]}})
+        elif node_name in ("direct_answer", "generate_answer") and state.get("final_answer"):
+            events.append({"event": "answer", "data": {"answer": state["final_answer"]}})
+        
+        return events
+    
+    @staticmethod
+    def _summary(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Final event payload (everything but the result rows)"""
+        return {
+            "answer": result["answer"],
+            "sql": result.get("sql"),
+            "tokens_used": result["tokens_used"],
+            "tokens_breakdown": result.get("tokens_breakdown", {}),
+            "error": result.get("error"),
+            "cached": result.get("cached", False)
+        }
+    
+    def ask_many(self, questions: List[str], concurrency: Optional[int] = None,
+                 sql_mode: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Ask a batch of questions (blocking wrapper around aask_many).
+        Don't call from inside a running event loop, await aask_many instead.
+        """
+        return asyncio.run(self.aask_many(questions, concurrency, sql_mode))
+    
+    async def aask_many(self, questions: List[str], concurrency: Optional[int] = None,
+                        sql_mode: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Ask a batch of questions concurrently.
+        
+        Schemas are fetched once for the whole batch, identical questions are
+        asked once, and at most `concurrency` questions run at the same time.
+        
+        Args:
+            questions: Questions in natural language
+            concurrency: Max questions in flight (defaults to config's batch_concurrency)
+            sql_mode: Override config's sql_mode ("two_step" or "single_call")
+            
+        Returns:
+            One result per question, in the original order. Failed questions
+            have "error" set and "answer" None.
+        """
+        concurrency = concurrency or self.config.get("batch_concurrency", 8)
+        semaphore = asyncio.Semaphore(concurrency)
+        loop = asyncio.get_running_loop()
+        nodes = self.workflow_nodes
+        
+        # Deduplicate exact repeats (case and spacing aside); the question
+        # cache still serves reworded questions after the first answer
+        unique: Dict[str, str] = {}
+        for question in questions:
+            unique.setdefault(self.normalize_question(question), question)
+        
+        print(f"\n>> Batch: {len(questions)} questions, {len(unique)} unique, concurrency {concurrency}")
+        
+        async def run_one(question: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return await self.aask(question, sql_mode)
+                except Exception as e:
+                    return {
+                        "question": question,
+                        "answer": None,
+                        "sql": None,
+                        "results": None,
+                        "tokens_used": 0,
+                        "tokens_breakdown": {},
+                        "error": str(e),
+                        "cached": False
+                    }
+        
+        with nodes.cache.batch():
+            # Fetch every schema once up front (one catalog query) so no question pays for it
+            if nodes.cache.table_names() is None:
+                schemas = await loop.run_in_executor(nodes.executor, nodes.db.get_all_schemas)
+                nodes.cache.set_many(schemas)
+            
+            answers = await asyncio.gather(*[run_one(q) for q in unique.values()])
+        
+        by_key = dict(zip(unique.keys(), answers))
+        return [{**by_key[self.normalize_question(q)], "question": q} for q in questions]
+    
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """
+        Key under which identical questions are deduplicated in a batch.
+        Only case and whitespace are ignored: the question cache's synonym
+        and punctuation folding is too loose to merge questions unanswered.
+        """
+        return " ".join(question.lower().split())
+    
+    @staticmethod
+    def _initial_state(question: str) -> Dict[str, Any]:
+        """Initial workflow state for a question"""
+        return {
             "user_question": question,
             "messages": [],
+            "direct_route": None,
             "identified_tables": [],
             "table_schemas": {},
+            "join_hints": [],
             "generated_sql": None,
             "sql_attempts": 0,
+            "validation_errors": None,
             "query_results": None,
             "execution_error": None,
             "final_answer": None,
             "tokens_used": 0,
             "tokens_breakdown": {},
+            "prompt_tokens_saved": 0,
             "workflow_step": "start",
             "should_retry": False,
             "needs_schema_fetch": False
         }
-        
-        # Run workflow
+    
+    @staticmethod
+    def _print_header(question: str):
+        """Print the question banner"""
         print(f"\n{'='*80}")
         print(f"Question: {question}")
         print(f"{'='*80}")
-        
-        final_state = self.graph.invoke(initial_state)
-        
-        # Return results
+    
+    @staticmethod
+    def _build_result(question: str, final_state: Dict[str, Any]) -> Dict[str, Any]:
+        """Result dictionary returned to callers"""
         return {
             "question": question,
             "answer": final_state.get("final_answer", "Sorry, I couldn't answer that."),
@@ -127,5 +554,33 @@ class SQLAgent:
             "results": final_state.get("query_results"),
             "tokens_used": final_state.get("tokens_used", 0),
             "tokens_breakdown": final_state.get("tokens_breakdown", {}),
-            "error": final_state.get("execution_error")
+            "prompt_tokens_saved": final_state.get("prompt_tokens_saved", 0),
+            "error": final_state.get("execution_error"),
+            "cached": False
+        }
+    
+    def _get_cached(self, question: str) -> Optional[Dict[str, Any]]:
+        """Look up a question in the question cache"""
+        if self.question_cache is None:
+            return None
+        
+        cached = self.question_cache.get(question, self.workflow_nodes.db.get_data_version)
+        if cached is None:
+            return None
+        
+        print(f"\n>> Question cache hit: {question} (0 tokens)")
+        return {
+            **cached,
+            "question": question,
+            "tokens_used": 0,
+            "tokens_breakdown": {},
+            "cached": True
         }
+    
+    def _store_cached(self, question: str, result: Dict[str, Any], tables: list):
+        """Cache a successful answer together with the data version it was computed on"""
+        if self.question_cache is None or result["error"] or not result["answer"]:
+            return
+        
+        data_version = self.workflow_nodes.db.get_data_version(tables)
+        self.question_cache.set(question, result, tables, data_version)
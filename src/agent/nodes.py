@@ -3,23 +3,38 @@ Agent Workflow Nodes
 Each node is a step in the agent's thinking process.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Generator, Tuple, Callable
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 from ..llm.groq_client import GroqClient
 from ..llm.prompts import (
     analyze_question_prompt,
     generate_sql_prompt,
+    plan_sql_prompt,
+    estimate_tokens,
     fix_sql_prompt,
+    repair_sql_prompt,
     generate_answer_prompt
 )
 from ..mcp.tools import DatabaseTools
+from ..mcp.dialect import transpile_sql, dialect_name
+from ..mcp.formats import to_records
 from ..cache.schema_cache import SchemaCache
+from ..cache.result_cache import referenced_tables
+from .router import DirectSQLRouter
+from .retriever import TableRetriever
+from .renderer import AnswerRenderer
+from .validator import SQLValidator
+from .repair import SQLRepairer
+from .compactor import PromptCompactor
 
 
 class WorkflowNodes:
     """Individual steps in the agent workflow"""
     
     def __init__(self, groq_client: GroqClient, db_tools: DatabaseTools, 
-                 schema_cache: SchemaCache):
+                 schema_cache: SchemaCache, config: Optional[Dict[str, Any]] = None,
+                 token_budget: Optional[Dict[str, Any]] = None):
         """
         Initialize workflow nodes.
         
@@ -27,28 +42,159 @@ class WorkflowNodes:
             groq_client: Groq API client
             db_tools: Database tools
             schema_cache: Schema cache
+            config: Optional 'agent' section of config.yaml
+            token_budget: Optional 'token_budget' section of config.yaml
         """
         self.groq = groq_client
         self.db = db_tools
         self.cache = schema_cache
+        self.config = config or {}
+        self.dialect = dialect_name(db_tools.db_type)
+        self.router = DirectSQLRouter(db_tools, schema_cache)
+        self.retriever = TableRetriever(
+            db_tools,
+            schema_cache,
+            min_confidence=self.config.get("retrieval_min_confidence", 0.6)
+        ) if self.config.get("local_table_retrieval", True) else None
+        self.renderer = AnswerRenderer(
+            max_rows=self.config.get("template_answer_max_rows", 20)
+        ) if self.config.get("template_answers", True) else None
+        self.validator = SQLValidator(
+            db_tools,
+            schema_cache,
+            explain=self.config.get("validate_explain", True)
+        ) if self.config.get("validate_sql", True) else None
+        self.repairer = SQLRepairer(
+            db_tools, schema_cache
+        ) if self.config.get("local_repair", True) else None
+        
+        token_budget = token_budget or {}
+        self.compactor = PromptCompactor(
+            max_prompt_tokens=token_budget.get("max_prompt_tokens", 0)
+        ) if token_budget.get("compact_prompts", True) else None
+        
+        # Bounded pool for blocking DB work on the async path
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.config.get("db_workers", 4),
+            thread_name_prefix="agent-db"
+        )
     
-    def analyze_question(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    # LLM steps are written as generators that yield (messages, max_tokens)
+    # and receive the Groq response, so one body serves both sync and async nodes.
+    
+    def _run(self, steps: Generator) -> Dict[str, Any]:
+        """Drive a step generator with blocking Groq calls"""
+        done, value = self._advance(steps)
+        while not done:
+            messages, max_tokens = value
+            done, value = self._advance(steps, self.groq.chat(messages, max_tokens=max_tokens))
+        return value
+    
+    async def _arun(self, steps: Generator) -> Dict[str, Any]:
+        """Drive a step generator with async Groq calls, DB work runs in the executor"""
+        loop = asyncio.get_running_loop()
+        done, value = await loop.run_in_executor(self.executor, self._advance, steps)
+        while not done:
+            messages, max_tokens = value
+            response = await self.groq.achat(messages, max_tokens=max_tokens)
+            done, value = await loop.run_in_executor(self.executor, self._advance, steps, response)
+        return value
+    
+    async def _in_executor(self, node: Callable, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a blocking (DB-only) node in the executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, node, state)
+    
+    @staticmethod
+    def _advance(steps: Generator, response: Optional[Dict[str, Any]] = None) -> Tuple[bool, Any]:
+        """Resume a step generator: (False, next request) or (True, final state)"""
+        try:
+            return False, steps.send(response)
+        except StopIteration as done:
+            return True, done.value
+    
+    @staticmethod
+    def _clean_sql(sql_query: str) -> str:
+        """Strip whitespace and markdown code fences from an LLM reply"""
+        sql_query = sql_query.strip()
+        if sql_query.startswith("```"):
+            lines = sql_query.split("\n")
+            sql_query = "\n".join(lines[1:-1]) if len(lines) > 2 else sql_query
+        return sql_query
+    
+    def route_question(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Step 0: Answer simple questions with direct SQL (no LLM).
+        Token cost: 0
+        """
+        print("\n[0/5] Checking for direct SQL...")
+        
+        try:
+            route = self.router.match(state["user_question"])
+        except Exception as e:
+            print(f"   >> Direct SQL unavailable: {e}")
+            route = None
+        
+        if route is None:
+            print("   >> No direct match, using LLM workflow")
+            return {
+                **state,
+                "direct_route": None,
+                "workflow_step": "analyze_question"
+            }
+        
+        print(f"   >> Direct SQL: {route['sql']}")
+        print("   >> Tokens used: 0")
+        
+        return {
+            **state,
+            "direct_route": route,
+            "identified_tables": [route["table"]],
+            "table_schemas": {route["table"]: route["schema"]},
+            "generated_sql": route["sql"],
+            "workflow_step": "execute_query"
+        }
+    
+    def _analyze_question_steps(self, state: Dict[str, Any]) -> Generator:
         """
         Step 1: Identify which tables are needed.
-        Token cost: ~100-150 tokens
+        Token cost: 0 if the local index is confident, ~100-150 tokens otherwise
         """
         print("\n[1/5] Analyzing question...")
         
+        # Try the local table index first
+        if self.retriever is not None:
+            try:
+                retrieval = self.retriever.retrieve(state["user_question"])
+            except Exception as e:
+                print(f"   >> Local table index unavailable: {e}")
+                retrieval = {"confident": False, "confidence": 0.0}
+            
+            if retrieval["confident"] and retrieval["tables"]:
+                print(f"   >> Needs tables: {', '.join(retrieval['tables'])} (local index, confidence {retrieval['confidence']})")
+                print("   >> Tokens used: 0")
+                
+                return {
+                    **state,
+                    "identified_tables": retrieval["tables"],
+                    "tokens_breakdown": {
+                        **state.get("tokens_breakdown", {}),
+                        "analyze": 0
+                    },
+                    "needs_schema_fetch": True,
+                    "workflow_step": "fetch_schema"
+                }
+            
+            print(f"   >> Local index not confident ({retrieval['confidence']}), asking LLM")
+        
         # Get available tables
-        available_tables = self.db.list_tables()
+        available_tables = self.cache.table_names() or self.db.list_tables()
         
         # Create prompt
         prompt = analyze_question_prompt(state["user_question"], available_tables)
         
         # Ask Groq
-        response = self.groq.chat([
-            {"role": "user", "content": prompt}
-        ], max_tokens=50)
+        response = yield [{"role": "user", "content": prompt}], 50
         
         if not response["success"]:
             return {
@@ -76,9 +222,64 @@ class WorkflowNodes:
             "workflow_step": "fetch_schema"
         }
     
+    def _plan_sql_steps(self, state: Dict[str, Any]) -> Generator:
+        """
+        Step 1-3 (single call): Pick tables and write SQL in one LLM call.
+        Token cost: ~250-450 tokens, one round-trip instead of two.
+        Falls back to the two-step workflow if the schema is too large.
+        """
+        print("\n[1/5] Planning and generating SQL in one call...")
+        
+        available_tables = self.cache.table_names() or self.db.list_tables()
+        schemas = {table: self.cache.get_or_load(table, self.db.get_table_schema) for table in available_tables}
+        
+        graph = self.cache.join_graph()
+        join_hints = graph.join_hints(list(schemas)) if graph is not None else None
+        prompt = plan_sql_prompt(state["user_question"], schemas, self.dialect, join_hints)
+        max_schema_tokens = self.config.get("single_call_max_tokens", 1500)
+        
+        if estimate_tokens(prompt) > max_schema_tokens:
+            print(f"   >> Schema too large for one call (>{max_schema_tokens} tokens), using two steps")
+            return {
+                **state,
+                "workflow_step": "analyze_question"
+            }
+        
+        response = yield [{"role": "user", "content": prompt}], 200
+        
+        if not response["success"]:
+            return {
+                **state,
+                "execution_error": f"Failed to generate SQL: {response['error']}",
+                "tokens_used": state["tokens_used"] + response["tokens_used"],
+                "workflow_step": "error"
+            }
+        
+        sql_query = self._clean_sql(response["content"])
+        table_names = [t for t in referenced_tables(sql_query) if t in schemas]
+        
+        print(f"   >> Uses tables: {', '.join(table_names)}")
+        print(f"   >> SQL: {sql_query[:100]}...")
+        print(f"   >> Tokens used: {response['tokens_used']}")
+        
+        return {
+            **state,
+            "identified_tables": table_names,
+            "table_schemas": {t: schemas[t] for t in table_names},
+            "generated_sql": sql_query,
+            "tokens_used": state["tokens_used"] + response["tokens_used"],
+            "tokens_breakdown": {
+                **state.get("tokens_breakdown", {}),
+                "plan_sql": response["tokens_used"]
+            },
+            "workflow_step": "validate_sql"
+        }
+    
     def fetch_schema(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Step 2: Get table schemas (from cache or database).
+        Adds the tables on the join paths between the identified ones
+        (e.g. orders between customers and products) from the foreign-key graph.
         Token cost: 0 if cached, ~100 per table if not
         """
         print("\n[2/5] Fetching table schemas...")
@@ -87,7 +288,17 @@ class WorkflowNodes:
         cache_hits = 0
         cache_misses = 0
         
-        for table_name in state["identified_tables"]:
+        table_names = list(state["identified_tables"])
+        join_hints = []
+        graph = self.cache.join_graph()
+        if graph is not None:
+            bridges = graph.connect(table_names)
+            if bridges:
+                print(f"   >> Added join tables: {', '.join(bridges)}")
+            table_names += bridges
+            join_hints = graph.join_hints(table_names)
+        
+        for table_name in table_names:
             # Try cache first
             cached_schema = self.cache.get(table_name)
             
@@ -106,25 +317,37 @@ class WorkflowNodes:
         
         return {
             **state,
+            "identified_tables": table_names,
             "table_schemas": schemas,
+            "join_hints": join_hints,
             "needs_schema_fetch": False,
             "workflow_step": "generate_sql"
         }
     
-    def generate_sql(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    def _generate_sql_steps(self, state: Dict[str, Any]) -> Generator:
         """
         Step 3: Generate SQL query.
         Token cost: ~200-400 tokens
         """
         print("\n[3/5] Generating SQL query...")
         
-        # Create prompt with schemas
-        prompt = generate_sql_prompt(state["user_question"], state["table_schemas"])
+        # Create prompt with schemas (compacted to the token budget if enabled)
+        tokens_saved = 0
+        if self.compactor is not None:
+            prompt, compaction = self.compactor.compact(
+                state["user_question"], state["table_schemas"], self.dialect, state.get("join_hints")
+            )
+            tokens_saved = compaction["saved"]
+            print(f"   >> Prompt: ~{compaction['tokens']} tokens (saved ~{tokens_saved}, "
+                  f"{compaction['dropped_columns']} columns dropped)")
+            if compaction["over_budget"]:
+                print(f"   >> Over the {self.compactor.max_prompt_tokens} token budget with only keys left")
+        else:
+            prompt = generate_sql_prompt(state["user_question"], state["table_schemas"], self.dialect,
+                                         state.get("join_hints"))
         
         # Ask Groq to write SQL
-        response = self.groq.chat([
-            {"role": "user", "content": prompt}
-        ], max_tokens=200)
+        response = yield [{"role": "user", "content": prompt}], 200
         
         if not response["success"]:
             return {
@@ -133,12 +356,8 @@ class WorkflowNodes:
                 "tokens_used": state["tokens_used"] + response["tokens_used"]
             }
         
-        sql_query = response["content"].strip()
-        
         # Clean up SQL (remove markdown code blocks if present)
-        if sql_query.startswith("```"):
-            lines = sql_query.split("\n")
-            sql_query = "\n".join(lines[1:-1]) if len(lines) > 2 else sql_query
+        sql_query = self._clean_sql(response["content"])
         
         print(f"   >> SQL: {sql_query[:100]}...")
         print(f"   >> Tokens used: {response['tokens_used']}")
@@ -151,9 +370,132 @@ class WorkflowNodes:
                 **state.get("tokens_breakdown", {}),
                 "generate_sql": response["tokens_used"]
             },
+            "prompt_tokens_saved": state.get("prompt_tokens_saved", 0) + tokens_saved,
+            "workflow_step": "validate_sql"
+        }
+    
+    def validate_sql(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Step 3b: Check the SQL locally before running it.
+        Token cost: 0 (parse + schema check + EXPLAIN)
+        """
+        print("\n[Check] Validating SQL...")
+        
+        sql_query = state.get("generated_sql")
+        if not sql_query:
+            # Nothing to check (the LLM call failed), keep its error
+            return {
+                **state,
+                "execution_error": state.get("execution_error") or "No SQL query was generated",
+                "should_retry": False,
+                "workflow_step": "error"
+            }
+        
+        # Rewrite syntax from the wrong dialect locally instead of via fix_sql
+        if sql_query and self.config.get("transpile_sql", True):
+            transpiled = transpile_sql(sql_query, self.db.db_type)
+            if transpiled["changed"]:
+                sql_query = transpiled["sql"]
+                print(f"   >> Transpiled to {self.dialect}: {sql_query[:100]}...")
+        
+        state = {**state, "generated_sql": sql_query}
+        
+        if self.validator is not None:
+            sql_query, validation = self._validate_with_repairs(sql_query)
+            state = {**state, "generated_sql": sql_query}
+            
+            if not validation["valid"]:
+                for problem in validation["diagnostics"]:
+                    print(f"   >> {problem['kind']}: {problem['message'][:100]}")
+                error = " ".join(d["message"] for d in validation["diagnostics"])
+                
+                # Asking for a write is not something a fix can repair
+                if any(d["kind"] == "not_read_only" for d in validation["diagnostics"]):
+                    return {
+                        **state,
+                        "validation_errors": validation["diagnostics"],
+                        "execution_error": error,
+                        "should_retry": False,
+                        "workflow_step": "error"
+                    }
+                
+                return self._retry_or_fail({**state, "validation_errors": validation["diagnostics"]}, error)
+            
+            print("   >> SQL is valid")
+        
+        return {
+            **state,
+            "validation_errors": None,
+            "execution_error": None,
+            "should_retry": False,
             "workflow_step": "execute_query"
         }
     
+    def _validate_with_repairs(self, sql_query: str) -> Tuple[str, Dict[str, Any]]:
+        """Validate SQL, repairing misspelled names locally while a confident fix exists"""
+        validation = self.validator.validate(sql_query)
+        
+        for _ in range(self.config.get("max_local_repairs", 3)):
+            if validation["valid"] or self.repairer is None:
+                break
+            
+            fix = None
+            for problem in validation["diagnostics"]:
+                if problem["kind"] in ("unknown_table", "unknown_column"):
+                    fix = self.repairer.repair(sql_query, problem["kind"], problem["name"])
+                elif problem["kind"] == "explain_error":
+                    fix = self.repairer.repair_error(sql_query, problem["message"])
+                if fix:
+                    break
+            
+            if fix is None:
+                break
+            
+            print(f"   >> Repaired locally: {fix['old']} -> {fix['new']}")
+            sql_query = fix["sql"]
+            validation = self.validator.validate(sql_query)
+        
+        return sql_query, validation
+    
+    def _execute_with_repairs(self, sql_query: str, result: Dict[str, Any], max_rows: Optional[int] = None,
+                              result_format: str = "records") -> Tuple[str, Dict[str, Any]]:
+        """Re-run failed SQL after local name repairs until it works or no confident fix is left"""
+        for _ in range(self.config.get("max_local_repairs", 3)):
+            fix = self.repairer.repair_error(sql_query, result["error"])
+            if fix is None:
+                break
+            
+            print(f"   >> Repaired locally: {fix['old']} -> {fix['new']}")
+            sql_query = fix["sql"]
+            result = self.db.execute_query(
+                sql_query, max_rows=max_rows, count_total=True, result_format=result_format
+            )
+            if result["success"]:
+                break
+        
+        return sql_query, result
+    
+    def _retry_or_fail(self, state: Dict[str, Any], error: str) -> Dict[str, Any]:
+        """Send failed SQL to fix_sql, or give up after the max retries"""
+        attempts = state.get("sql_attempts", 0) + 1
+        
+        if attempts < 3:  # Max 2 retries
+            print(f"   >> Retrying (attempt {attempts}/2)...")
+            return {
+                **state,
+                "sql_attempts": attempts,
+                "execution_error": error,
+                "should_retry": True,
+                "workflow_step": "fix_sql"
+            }
+        else:
+            return {
+                **state,
+                "execution_error": error,
+                "should_retry": False,
+                "workflow_step": "error"
+            }
+    
     def execute_query(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Step 4: Execute SQL query on database.
@@ -161,33 +503,39 @@ class WorkflowNodes:
         """
         print("\n[4/5] Executing query...")
         
-        # Execute SQL
-        result = self.db.execute_query(state["generated_sql"])
+        # Execute SQL (rows are fetched in batches, only the first max_result_rows are kept)
+        max_rows = self.config.get("max_result_rows", 1000)
+        result_format = self.config.get("result_format", "records")
+        result = self.db.execute_query(
+            state["generated_sql"], max_rows=max_rows, count_total=True, result_format=result_format
+        )
+        
+        # Misspelled table/column: fix it locally before asking the LLM
+        if not result["success"] and self.repairer is not None and not state.get("direct_route"):
+            sql_query, result = self._execute_with_repairs(state["generated_sql"], result, max_rows, result_format)
+            state = {**state, "generated_sql": sql_query}
         
         if not result["success"]:
             print(f"   >> SQL Error: {result['error']}")
             
-            # Decide if we should retry
-            attempts = state.get("sql_attempts", 0) + 1
-            
-            if attempts < 3:  # Max 2 retries
-                print(f"   >> Retrying (attempt {attempts}/2)...")
-                return {
-                    **state,
-                    "sql_attempts": attempts,
-                    "execution_error": result["error"],
-                    "should_retry": True,
-                    "workflow_step": "fix_sql"
-                }
-            else:
+            # Direct SQL failed, let the LLM workflow handle the question
+            if state.get("direct_route"):
+                print("   >> Falling back to LLM workflow...")
                 return {
                     **state,
-                    "execution_error": result["error"],
+                    "direct_route": None,
+                    "generated_sql": None,
+                    "execution_error": None,
                     "should_retry": False,
-                    "workflow_step": "error"
+                    "workflow_step": "llm_fallback"
                 }
+            
+            return self._retry_or_fail({**state, "validation_errors": None}, result["error"])
         
         print(f"   >> Retrieved {result['row_count']} rows")
+        if result.get("truncated"):
+            total = result.get("total_rows")
+            print(f"   >> Kept first {result['row_count']} of {total if total is not None else 'more'} rows")
         
         return {
             **state,
@@ -197,24 +545,26 @@ class WorkflowNodes:
             "workflow_step": "generate_answer"
         }
     
-    def fix_sql(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    def _fix_sql_steps(self, state: Dict[str, Any]) -> Generator:
         """
         Step: Fix failed SQL query.
         Token cost: ~200-300 tokens
         """
         print("\n[Retry] Fixing SQL query...")
         
-        # Create fix prompt
-        prompt = fix_sql_prompt(
-            state["generated_sql"],
-            state["execution_error"],
-            state["user_question"]
-        )
+        # Create fix prompt (short one if validation already pinpointed the problem)
+        if state.get("validation_errors"):
+            prompt = repair_sql_prompt(state["generated_sql"], state["validation_errors"], self.dialect)
+        else:
+            prompt = fix_sql_prompt(
+                state["generated_sql"],
+                state["execution_error"],
+                state["user_question"],
+                self.dialect
+            )
         
         # Ask Groq to fix it
-        response = self.groq.chat([
-            {"role": "user", "content": prompt}
-        ], max_tokens=200)
+        response = yield [{"role": "user", "content": prompt}], 200
         
         if not response["success"]:
             return {
@@ -223,12 +573,8 @@ class WorkflowNodes:
                 "workflow_step": "error"
             }
         
-        fixed_sql = response["content"].strip()
-        
         # Clean up
-        if fixed_sql.startswith("```"):
-            lines = fixed_sql.split("\n")
-            fixed_sql = "\n".join(lines[1:-1]) if len(lines) > 2 else fixed_sql
+        fixed_sql = self._clean_sql(response["content"])
         
         print(f"   >> Fixed SQL: {fixed_sql[:100]}...")
         print(f"   >> Tokens used: {response['tokens_used']}")
@@ -241,32 +587,93 @@ class WorkflowNodes:
                 **state.get("tokens_breakdown", {}),
                 "fix_sql": response["tokens_used"]
             },
-            "workflow_step": "execute_query"
+            "workflow_step": "validate_sql"
         }
     
-    def generate_answer(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    def direct_answer(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Step 5 (direct SQL): Fill the answer template with the results.
+        Token cost: 0
+        """
+        print("\n[5/5] Rendering direct answer...")
+        
+        answer = self.router.render_answer(state["direct_route"], state["query_results"])
+        
+        # Increment cache question count
+        self.cache.increment_question_count()
+        
+        return {
+            **state,
+            "final_answer": answer,
+            "workflow_step": "complete"
+        }
+    
+    def _render_locally(self, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Answer state rendered without the LLM, or None if the result needs it"""
+        if self.renderer is None:
+            return None
+        
+        answer = self.renderer.render(state["user_question"], state["query_results"], state.get("generated_sql"))
+        if answer is None:
+            return None
+        
+        print("   >> Rendered locally, tokens used: 0")
+        self.cache.increment_question_count()
+        
+        return {
+            **state,
+            "final_answer": answer,
+            "tokens_breakdown": {
+                **state.get("tokens_breakdown", {}),
+                "generate_answer": 0
+            },
+            "workflow_step": "complete"
+        }
+    
+    def prepare_answer(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Step 5 (streaming): Render small results locally, otherwise leave
+        the answer to be streamed from the LLM by the caller.
+        Token cost: 0
+        """
+        print("\n[5/5] Preparing answer...")
+        
+        rendered = self._render_locally(state)
+        if rendered is not None:
+            return rendered
+        
+        return {
+            **state,
+            "workflow_step": "stream_answer"
+        }
+    
+    def _generate_answer_steps(self, state: Dict[str, Any]) -> Generator:
         """
         Step 5: Generate human-friendly answer.
-        Token cost: ~100-200 tokens
+        Token cost: 0 for small results (rendered locally), ~100-200 tokens otherwise
         """
         print("\n[5/5] Generating answer...")
         
+        # Small results don't need the LLM to explain them
+        rendered = self._render_locally(state)
+        if rendered is not None:
+            return rendered
+        
         # Create answer prompt
         prompt = generate_answer_prompt(
             state["user_question"],
-            state["query_results"]["data"]
+            to_records(state["query_results"], 10),
+            state["query_results"].get("total_rows") or state["query_results"]["row_count"]
         )
         
         # Ask Groq to explain
-        response = self.groq.chat([
-            {"role": "user", "content": prompt}
-        ], max_tokens=150)
+        response = yield [{"role": "user", "content": prompt}], 150
         
         if not response["success"]:
             # Fallback: just show the raw data
             return {
                 **state,
-                "final_answer": f"Query returned {state['query_results']['row_count']} rows: {state['query_results']['data']}",
+                "final_answer": f"Query returned {state['query_results']['row_count']} rows: {to_records(state['query_results'], 10)}",
                 "tokens_used": state["tokens_used"] + response["tokens_used"],
                 "workflow_step": "complete"
             }
@@ -286,3 +693,53 @@ class WorkflowNodes:
             },
             "workflow_step": "complete"
         }
+    
+    # Graph nodes: blocking versions for invoke(), async versions for ainvoke()
+    
+    def analyze_question(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return self._run(self._analyze_question_steps(state))
+    
+    def plan_sql(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return self._run(self._plan_sql_steps(state))
+    
+    def generate_sql(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return self._run(self._generate_sql_steps(state))
+    
+    def fix_sql(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return self._run(self._fix_sql_steps(state))
+    
+    def generate_answer(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return self._run(self._generate_answer_steps(state))
+    
+    async def aroute_question(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._in_executor(self.route_question, state)
+    
+    async def aanalyze_question(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._arun(self._analyze_question_steps(state))
+    
+    async def aplan_sql(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._arun(self._plan_sql_steps(state))
+    
+    async def afetch_schema(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._in_executor(self.fetch_schema, state)
+    
+    async def agenerate_sql(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._arun(self._generate_sql_steps(state))
+    
+    async def avalidate_sql(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._in_executor(self.validate_sql, state)
+    
+    async def aexecute_query(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._in_executor(self.execute_query, state)
+    
+    async def afix_sql(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._arun(self._fix_sql_steps(state))
+    
+    async def adirect_answer(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._in_executor(self.direct_answer, state)
+    
+    async def aprepare_answer(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._in_executor(self.prepare_answer, state)
+    
+    async def agenerate_answer(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._arun(self._generate_answer_steps(state))
@@ -0,0 +1,153 @@
+"""
+Answer Renderer
+Turns small query results into answers without an LLM call.
+Handles empty results, single values, single rows, ranked lists and
+small tables. Anything else is left to the LLM.
+"""
+
+from typing import Dict, Any, List, Optional
+from decimal import Decimal
+import re
+from .router import format_value
+from ..mcp.formats import to_records
+from ..mcp.guard import strip_comments
+
+try:
+    import sqlglot
+    HAS_SQLGLOT = True
+except ImportError:  # Optional dependency
+    HAS_SQLGLOT = False
+
+
+def humanize(column: str) -> str:
+    """
+    Readable label for a column name ("COUNT(*)" -> "count", "total_amount" -> "total amount",
+    "SUM(o.total_amount)" -> "total amount", "AVG(price)" -> "average price")
+    """
+    match = re.match(r"^\s*(\w+)\s*\((.*)\)\s*$", column)
+    if match:
+        name, arg = match.group(1).lower(), match.group(2).strip()
+        func = {"avg": "average", "sum": "total", "max": "maximum", "min": "minimum"}.get(name, name)
+        if arg in ("*", ""):
+            return func
+        label = humanize(arg)
+        # "total total amount" reads worse than the column alone
+        if func in label.split() or name in label.split():
+            return label
+        return f"{func} {label}"
+    column = re.sub(r"\b\w+\.(?=\w)", "", column)  # Table qualifiers (o.total_amount)
+    column = re.sub(r"([a-z])([A-Z])", r"\1 \2", column)
+    return column.replace("_", " ").strip().lower()
+
+
+def is_ordered(sql_query: Optional[str]) -> bool:
+    """Whether the outer query has an ORDER BY (row order means a ranking)"""
+    if not sql_query:
+        return False
+    sql_query = strip_comments(sql_query)
+    if HAS_SQLGLOT:
+        try:
+            return sqlglot.parse_one(sql_query).args.get("order") is not None
+        except Exception:
+            pass
+    return bool(re.search(r"\bORDER\s+BY\b", sql_query, re.IGNORECASE))
+
+
+def is_number(value: Any) -> bool:
+    """Check if a value is numeric (and not a bool)"""
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+class AnswerRenderer:
+    """Deterministic answers for results that don't need an LLM to explain"""
+
+    def __init__(self, max_rows: int = 20, max_columns: int = 6):
+        """
+        Initialize renderer.
+
+        Args:
+            max_rows: Largest result rendered without the LLM
+            max_columns: Widest result rendered as a table
+        """
+        self.max_rows = max_rows
+        self.max_columns = max_columns
+
+    def render(self, user_question: str, query_results: Dict[str, Any],
+               sql_query: Optional[str] = None) -> Optional[str]:
+        """
+        Render an answer from query results.
+
+        Args:
+            user_question: User's question in natural language
+            query_results: Result of DatabaseTools.execute_query
+            sql_query: SQL that produced the results (rows are numbered only
+                when it has an ORDER BY)
+
+        Returns:
+            Answer text, or None if the result needs the LLM to explain it
+        """
+        columns = query_results["columns"]
+        row_count = query_results["row_count"]
+
+        if not columns:
+            return None
+
+        if not row_count:
+            return "No matching records were found."
+
+        if row_count > self.max_rows or len(columns) > self.max_columns:
+            return None
+
+        # Only some rows were kept, a table of them would look complete
+        if query_results.get("truncated"):
+            return None
+
+        data = to_records(query_results)
+
+        if len(data) == 1 and len(columns) == 1:
+            return self._scalar(user_question, columns[0], data[0][columns[0]])
+
+        if len(data) == 1:
+            return self._single_row(data[0], columns)
+
+        if len(columns) == 2 and not is_number(data[0][columns[0]]) and is_number(data[0][columns[1]]):
+            return self._ranked_list(data, columns, numbered=is_ordered(sql_query))
+
+        return self._table(data, columns)
+
+    def _scalar(self, user_question: str, column: str, value: Any) -> str:
+        """One value: "There are 1,000 customers." / "The average price is 251.30." """
+        label = humanize(column)
+        count_match = re.match(r"^\s*how many (\w+)", user_question.lower())
+
+        if value is None:
+            return f"The {label} is not available (no matching data)."
+        if count_match and is_number(value):
+            return f"There are {format_value(value)} {count_match.group(1)}."
+        return f"The {label} is {format_value(value)}."
+
+    def _single_row(self, row: Dict[str, Any], columns: List[str]) -> str:
+        """One row: "Name: Alice, total amount: 1,234.50." """
+        parts = [f"{humanize(c)}: {format_value(row[c])}" for c in columns]
+        text = ", ".join(parts)
+        return text[0].upper() + text[1:] + "."
+
+    def _ranked_list(self, data: List[Dict[str, Any]], columns: List[str], numbered: bool = True) -> str:
+        """Label + number per row, numbered for top-N (ordered) and bulleted for grouped totals"""
+        label, value = columns
+        lines = [f"{humanize(label).capitalize()} by {humanize(value)}:"]
+        for i, row in enumerate(data, 1):
+            marker = f"{i}." if numbered else "-"
+            lines.append(f"{marker} {format_value(row[label])}: {format_value(row[value])}")
+        return "\n".join(lines)
+
+    def _table(self, data: List[Dict[str, Any]], columns: List[str]) -> str:
+        """Small result as a Markdown table"""
+        lines = [
+            f"Found {len(data)} rows:",
+            "| " + " | ".join(humanize(c) for c in columns) + " |",
+            "|" + "|".join("---" for _ in columns) + "|"
+        ]
+        for row in data:
+            lines.append("| " + " | ".join(format_value(row[c]) for c in columns) + " |")
+        return "\n".join(lines)
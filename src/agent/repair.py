@@ -0,0 +1,206 @@
+"""
+SQL Repairer
+Fixes misspelled table and column names locally instead of asking the LLM.
+The bad name is taken from the database error (or a validation diagnostic),
+matched against the cached schema by edit distance and word overlap,
+and replaced in the SQL. Only confident, unambiguous matches are used.
+"""
+
+from typing import Dict, Any, List, Optional
+import re
+from ..mcp.tools import DatabaseTools
+from ..cache.schema_cache import SchemaCache
+from ..cache.result_cache import referenced_tables
+from .retriever import stem
+
+
+# Database error messages about unknown names (SQLite and MySQL)
+ERROR_PATTERNS = [
+    ("unknown_column", re.compile(r"no such column:\s*([\w.]+)", re.IGNORECASE)),
+    ("unknown_column", re.compile(r"Unknown column '([\w.]+)'", re.IGNORECASE)),
+    ("unknown_table", re.compile(r"no such table:\s*([\w.]+)", re.IGNORECASE)),
+    ("unknown_table", re.compile(r"Table '([\w.]+)' doesn't exist", re.IGNORECASE)),
+]
+
+# SQLite: a table named like a keyword ("FROM order") is a syntax error.
+# Only counts when the token follows FROM or JOIN in the failing SQL.
+SYNTAX_ERROR = re.compile(r'near "(\w+)": syntax error', re.IGNORECASE)
+
+STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two strings"""
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def name_tokens(name: str) -> set:
+    """Stemmed words of an identifier ("customer_names" -> {"customer", "name"})"""
+    return {stem(t) for t in name.lower().split("_") if t}
+
+
+def follows_from_or_join(sql_query: str, name: str) -> bool:
+    """Whether name is used as a table (after FROM or JOIN) outside string literals"""
+    pattern = re.compile(r"\b(?:FROM|JOIN)\s+" + re.escape(name) + r"(?!\w)", re.IGNORECASE)
+    parts = STRING_LITERAL.split(sql_query)
+    return any(pattern.search(part) for i, part in enumerate(parts) if not i % 2)
+
+
+def classify_error(error_message: str, sql_query: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Find the unknown name in a database error.
+
+    Args:
+        error_message: Database error
+        sql_query: SQL that failed (needed to read SQLite syntax errors)
+
+    Returns:
+        {"kind", "name", "qualifier"} or None for other errors
+    """
+    for kind, pattern in ERROR_PATTERNS:
+        match = pattern.search(error_message)
+        if not match:
+            continue
+        name = match.group(1)
+        if kind == "unknown_table":
+            return {"kind": kind, "name": name.split(".")[-1], "qualifier": None}
+        qualifier, _, column = name.rpartition(".")
+        return {"kind": kind, "name": column, "qualifier": qualifier or None}
+
+    match = SYNTAX_ERROR.search(error_message)
+    if match and sql_query and follows_from_or_join(sql_query, match.group(1)):
+        return {"kind": "unknown_table", "name": match.group(1), "qualifier": None}
+    return None
+
+
+class SQLRepairer:
+    """Confident local fixes for unknown table and column names"""
+
+    def __init__(self, db_tools: DatabaseTools, schema_cache: SchemaCache,
+                 min_score: float = 0.75, min_margin: float = 0.15):
+        """
+        Initialize repairer.
+
+        Args:
+            db_tools: Database tools (table list, schemas)
+            schema_cache: Schema cache the names are matched against
+            min_score: Lowest similarity (0-1) accepted as a repair
+            min_margin: How much the best match must beat the runner-up by
+        """
+        self.db = db_tools
+        self.cache = schema_cache
+        self.min_score = min_score
+        self.min_margin = min_margin
+
+    def similarity(self, bad: str, candidate: str, context: str = "") -> float:
+        """
+        Similarity of a bad name to a real one (0-1).
+
+        Best of edit-distance similarity, word overlap and abbreviation
+        ("cat" -> category). Words of the table name are ignored, so
+        customer_name in customers matches name.
+        """
+        bad, candidate = bad.lower(), candidate.lower()
+        edit = 1 - edit_distance(bad, candidate) / max(len(bad), len(candidate))
+        prefix = 0.8 if len(bad) >= 3 and candidate.startswith(bad) else 0.0
+
+        context_words = name_tokens(context)
+        bad_words = (name_tokens(bad) - context_words) or name_tokens(bad)
+        candidate_words = (name_tokens(candidate) - context_words) or name_tokens(candidate)
+        shared = bad_words & candidate_words
+        overlap = 0.8 * len(shared) / len(bad_words) + 0.2 * len(shared) / len(bad_words | candidate_words)
+
+        return max(edit, overlap, prefix)
+
+    def _best_match(self, bad: str, candidates: Dict[str, str]) -> Optional[str]:
+        """Confident, unambiguous best candidate (candidates: name -> context)"""
+        scored = sorted(
+            ((self.similarity(bad, name, context), name) for name, context in candidates.items()),
+            reverse=True
+        )
+        if not scored or scored[0][0] < self.min_score:
+            return None
+        if len(scored) > 1 and scored[0][0] - scored[1][0] < self.min_margin:
+            return None
+        return scored[0][1]
+
+    @staticmethod
+    def _aliases(sql_query: str) -> Dict[str, str]:
+        """alias -> table for FROM/JOIN clauses ("FROM customers c" -> {"c": "customers"})"""
+        aliases = {}
+        for table, alias in re.findall(r"\b(?:FROM|JOIN)\s+([\w.]+)(?:\s+(?:AS\s+)?(\w+))?", sql_query, re.IGNORECASE):
+            aliases[table.lower()] = table
+            if alias and alias.upper() not in ("WHERE", "JOIN", "ON", "GROUP", "ORDER", "LIMIT", "INNER",
+                                               "LEFT", "RIGHT", "CROSS", "FULL", "UNION", "USING", "HAVING"):
+                aliases[alias.lower()] = table
+        return aliases
+
+    @staticmethod
+    def _replace_outside_literals(sql_query: str, pattern: "re.Pattern", replacement: str) -> str:
+        """Regex replace that leaves string literals alone"""
+        parts = STRING_LITERAL.split(sql_query)
+        return "".join(part if i % 2 else pattern.sub(replacement, part) for i, part in enumerate(parts))
+
+    def repair(self, sql_query: str, kind: str, name: str,
+               qualifier: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Replace one unknown name with its confident match.
+
+        Args:
+            sql_query: SQL statement that failed
+            kind: "unknown_table" or "unknown_column"
+            name: The unknown name
+            qualifier: Table or alias the column was qualified with, if any
+
+        Returns:
+            {"sql", "kind", "old", "new"} or None if there is no confident repair
+        """
+        tables = self.cache.table_names() or self.db.list_tables()
+
+        if kind == "unknown_table":
+            match = self._best_match(name, {t: "" for t in tables if t.lower() != name.lower()})
+            if match is None:
+                return None
+            pattern = re.compile(r"(\b(?:FROM|JOIN)\s+)" + re.escape(name) + r"(?!\w)", re.IGNORECASE)
+            fixed = self._replace_outside_literals(sql_query, pattern, r"\g<1>" + match)
+
+        elif kind == "unknown_column":
+            known = {t.lower(): t for t in tables}
+            aliases = self._aliases(sql_query)
+            if qualifier:
+                table = aliases.get(qualifier.lower()) or qualifier
+                candidate_tables = [known[table.lower()]] if table.lower() in known else []
+            else:
+                candidate_tables = [known[t.lower()] for t in referenced_tables(sql_query) if t.lower() in known]
+
+            candidates = {}
+            for table in candidate_tables:
+                for col in self.cache.get_or_load(table, self.db.get_table_schema)["columns"]:
+                    candidates.setdefault(col["name"], table)
+            match = self._best_match(name, candidates)
+            if match is None:
+                return None
+            prefix = re.escape(qualifier) + r"\." if qualifier else r"(?:\w+\.)?"
+            pattern = re.compile(r"(?<![\w.])(" + prefix + r")" + re.escape(name) + r"(?!\w)", re.IGNORECASE)
+            fixed = self._replace_outside_literals(sql_query, pattern, r"\g<1>" + match)
+
+        else:
+            return None
+
+        if fixed == sql_query:
+            return None
+
+        return {"sql": fixed, "kind": kind, "old": name, "new": match}
+
+    def repair_error(self, sql_query: str, error_message: str) -> Optional[Dict[str, Any]]:
+        """Repair the unknown name a database error points at (see repair())"""
+        problem = classify_error(error_message, sql_query)
+        if problem is None:
+            return None
+        return self.repair(sql_query, problem["kind"], problem["name"], problem["qualifier"])
@@ -0,0 +1,251 @@
+"""
+Direct SQL Router
+Answers common, simple question shapes without any LLM call.
+Questions are matched against a registry of patterns, table and column
+names are resolved against the cached schemas, and the answer is filled
+into a template. Ultra-fast, 0 tokens.
+"""
+
+from typing import Dict, Any, List, Optional
+from decimal import Decimal
+import re
+from ..llm.prompts import direct_sql_patterns
+from ..mcp.tools import DatabaseTools
+from ..mcp.formats import to_records
+from ..cache.schema_cache import SchemaCache
+
+
+# Spoken comparison operators mapped to SQL
+OPERATORS = {
+    "is": "=", "equals": "=", "=": "=",
+    "is not": "!=", "!=": "!=",
+    "greater than": ">", "more than": ">", "above": ">", "over": ">", ">": ">",
+    "less than": "<", "below": "<", "under": "<", "<": "<"
+}
+
+TEXT_TYPES = ("char", "text", "clob")
+
+
+def format_value(value: Any) -> str:
+    """Format a result value for a sentence"""
+    if isinstance(value, bool) or value is None:
+        return str(value)
+    if isinstance(value, Decimal):  # MySQL SUM/AVG results
+        value = float(value)
+    if isinstance(value, int):
+        return f"{value:,}"
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return str(value)
+
+
+def sql_literal(value: str) -> str:
+    """Quote a value from the question as a SQL literal"""
+    try:
+        float(value)
+        return value
+    except ValueError:
+        return "'" + value.replace("'", "''") + "'"
+
+
+class DirectSQLRouter:
+    """Matches questions to SQL templates and renders templated answers"""
+
+    def __init__(self, db_tools: DatabaseTools, schema_cache: SchemaCache,
+                 patterns: Optional[Dict[str, Dict[str, str]]] = None):
+        """
+        Initialize router.
+
+        Args:
+            db_tools: Database tools (table list, schemas, value lookups)
+            schema_cache: Schema cache used to resolve column names
+            patterns: Optional regex -> {"sql", "answer"} templates
+                      (defaults to direct_sql_patterns())
+        """
+        self.db = db_tools
+        self.cache = schema_cache
+        self.routes: List[Dict[str, Any]] = []
+
+        for pattern, templates in (patterns or direct_sql_patterns()).items():
+            self.register(pattern, templates["sql"], templates["answer"])
+
+    def register(self, pattern: str, sql_template: str, answer_template: str):
+        """
+        Add a question pattern. Earlier patterns win.
+
+        Args:
+            pattern: Regex matched against the whole lowercased question
+            sql_template: SQL with {table}, {column}, {condition}, {order}, {n} placeholders
+            answer_template: Answer with {count}, {rows}, {row_count}, {filter}, ... placeholders
+        """
+        self.routes.append({
+            "pattern": re.compile(pattern),
+            "sql": sql_template,
+            "answer": answer_template
+        })
+
+    def match(self, question: str) -> Optional[Dict[str, Any]]:
+        """
+        Try to answer a question with a direct SQL template.
+
+        Args:
+            question: User's question in natural language
+
+        Returns:
+            Route with SQL, table, schema and answer template, or None
+            if no pattern matches or a name can't be resolved
+        """
+        # Lowercasing keeps positions, so values can be cut from the original text
+        text = " ".join(question.strip().rstrip("?.!").split())
+        lowered = text.lower()
+
+        for route in self.routes:
+            m = route["pattern"].match(lowered)
+            if not m:
+                continue
+
+            resolved = self._resolve(m, text)
+            if resolved is None:
+                continue
+
+            resolved["sql"] = route["sql"].format(**resolved["params"])
+            resolved["answer"] = route["answer"]
+            return resolved
+
+        return None
+
+    def _resolve(self, m: "re.Match", text: str) -> Optional[Dict[str, Any]]:
+        """Resolve the named groups of a match against the database schema"""
+        groups = m.groupdict()
+
+        table = self.resolve_table(groups["table"])
+        if table is None:
+            return None
+
+        schema = self.cache.get_or_load(table, self.db.get_table_schema)
+        params = {"table": table}
+
+        if groups.get("column"):
+            column = self.resolve_column(groups["column"], schema)
+            if column is None:
+                return None
+            params["column"] = column
+
+        if groups.get("value"):
+            value = text[m.start("value"):m.end("value")]
+            op = OPERATORS[groups.get("op") or "="]
+            column = params.get("column") or self._find_column_by_value(table, schema, value)
+            if column is None:
+                return None
+            params["column"] = column
+
+            if self._is_text(schema, column):
+                params["condition"] = f"LOWER({column}) {op} LOWER({sql_literal(value)})"
+            else:
+                params["condition"] = f"{column} {op} {sql_literal(value)}"
+            params["filter"] = f"{column} {op} {value}"
+
+        if groups.get("direction"):
+            params["order"] = "DESC" if groups["direction"] == "top" else "ASC"
+            params["direction_title"] = groups["direction"].title()
+            params["n"] = int(groups["n"])
+
+        return {
+            "table": table,
+            "schema": schema,
+            "params": params,
+            "label_column": self._label_column(schema)
+        }
+
+    def resolve_table(self, word: str) -> Optional[str]:
+        """Match a word from the question to a table name (handles singular/plural)"""
+        tables = {t.lower(): t for t in self.cache.table_names() or self.db.list_tables()}
+        candidates = [word, word + "s", word + "es"]
+        if word.endswith("ies"):
+            candidates.append(word[:-3] + "y")
+        if word.endswith("y"):
+            candidates.append(word[:-1] + "ies")
+        if word.endswith("s"):
+            candidates.append(word[:-1])
+
+        for candidate in candidates:
+            if candidate in tables:
+                return tables[candidate]
+        return None
+
+    def resolve_column(self, words: str, schema: Dict[str, Any]) -> Optional[str]:
+        """
+        Match words from the question to a column name.
+
+        Tries the exact name, then the name with underscores read as spaces,
+        then a unique column that contains the words ("amount" -> total_amount).
+        """
+        words = words.strip().lower()
+        names = [c["name"] for c in schema["columns"]]
+
+        for name in names:
+            if words in (name.lower(), name.lower().replace("_", " ")):
+                return name
+
+        key = words.replace(" ", "_")
+        partial = [name for name in names if key in name.lower()]
+        return partial[0] if len(partial) == 1 else None
+
+    def _find_column_by_value(self, table: str, schema: Dict[str, Any],
+                              value: str) -> Optional[str]:
+        """Find the one text column that contains a value ("customers from USA" -> country)"""
+        matches = []
+        for col in schema["columns"]:
+            if not self._is_text(schema, col["name"]):
+                continue
+            result = self.db.execute_query(
+                f"SELECT 1 FROM {table} WHERE LOWER({col['name']}) = LOWER({sql_literal(value)}) LIMIT 1"
+            )
+            if result["success"] and result["row_count"]:
+                matches.append(col["name"])
+        return matches[0] if len(matches) == 1 else None
+
+    def _is_text(self, schema: Dict[str, Any], column: str) -> bool:
+        """Check if a column holds text"""
+        for col in schema["columns"]:
+            if col["name"] == column:
+                return any(t in (col["type"] or "").lower() for t in TEXT_TYPES)
+        return False
+
+    def _label_column(self, schema: Dict[str, Any]) -> str:
+        """Pick the column that best names a row (first non-key text column)"""
+        for col in schema["columns"]:
+            if col["key"] != "PRI" and self._is_text(schema, col["name"]):
+                return col["name"]
+        return schema["columns"][0]["name"]
+
+    def render_answer(self, route: Dict[str, Any], query_results: Dict[str, Any]) -> str:
+        """
+        Fill the route's answer template with query results.
+
+        Args:
+            route: Route returned by match()
+            query_results: Result of DatabaseTools.execute_query
+
+        Returns:
+            Answer sentence
+        """
+        data = to_records(query_results)
+        params = route["params"]
+        label = route["label_column"]
+
+        items = []
+        for row in data:
+            item = format_value(row.get(label))
+            if params.get("order") and params["column"] != label:
+                item += f" ({format_value(row.get(params['column']))})"
+            items.append(item)
+
+        count = next(iter(data[0].values())) if data else 0
+
+        return route["answer"].format(
+            **params,
+            count=format_value(count),
+            row_count=query_results["row_count"],
+            rows=", ".join(items) if items else "none"
+        )
@@ -16,13 +16,18 @@ class AgentState(TypedDict):
     # Conversation history
     messages: List[Dict[str, str]]
     
+    # Routing phase
+    direct_route: Optional[Dict[str, Any]]  # Direct SQL route (no LLM) if the question matched one
+    
     # Analysis phase
     identified_tables: List[str]
     table_schemas: Dict[str, Any]
+    join_hints: List[str]  # Join conditions between the identified tables (a.col=b.col)
     
     # SQL generation phase
     generated_sql: Optional[str]
     sql_attempts: int  # Track retries
+    validation_errors: Optional[List[Dict[str, Any]]]  # Diagnostics from local validation
     
     # Execution phase
     query_results: Optional[Dict[str, Any]]
@@ -34,6 +39,7 @@ class AgentState(TypedDict):
     # Token tracking
     tokens_used: int
     tokens_breakdown: Dict[str, int]  # Track where tokens were spent
+    prompt_tokens_saved: int  # Prompt tokens removed by the PromptCompactor
     
     # Metadata
     workflow_step: str  # Current step name
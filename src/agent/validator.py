@@ -0,0 +1,198 @@
+"""
+SQL Validator
+Checks generated SQL locally before it runs.
+Parses the statement, rejects anything that is not a single read-only
+query, checks every table and column against the cached schemas and
+asks the database to EXPLAIN it. Problems come back as structured
+diagnostics that feed a short fix prompt.
+"""
+
+from typing import Dict, Any, List, Optional
+import difflib
+from ..mcp.tools import DatabaseTools
+from ..cache.schema_cache import SchemaCache
+from ..cache.result_cache import is_read_only, referenced_tables
+
+try:
+    import sqlglot
+    from sqlglot import exp
+    HAS_SQLGLOT = True
+except ImportError:  # Optional dependency
+    HAS_SQLGLOT = False
+
+
+def suggest(name: str, candidates: List[str], n: int = 3) -> List[str]:
+    """Closest names to a misspelled identifier"""
+    lowered = {c.lower(): c for c in candidates}
+    return [lowered[m] for m in difflib.get_close_matches(name.lower(), list(lowered), n=n, cutoff=0.5)]
+
+
+def diagnostic(kind: str, message: str, name: Optional[str] = None,
+               table: Optional[str] = None, suggestions: Optional[List[str]] = None) -> Dict[str, Any]:
+    """One validation problem"""
+    return {
+        "kind": kind,
+        "message": message,
+        "name": name,
+        "table": table,
+        "suggestions": suggestions or []
+    }
+
+
+class SQLValidator:
+    """Validates SQL against the live schema without running it"""
+
+    def __init__(self, db_tools: DatabaseTools, schema_cache: SchemaCache, explain: bool = True):
+        """
+        Initialize validator.
+
+        Args:
+            db_tools: Database tools (table list, schemas, EXPLAIN)
+            schema_cache: Schema cache used to check tables and columns
+            explain: Also ask the database to EXPLAIN statements that pass the local checks
+        """
+        self.db = db_tools
+        self.cache = schema_cache
+        self.explain = explain
+
+    def validate(self, sql_query: str) -> Dict[str, Any]:
+        """
+        Validate a SQL statement.
+
+        Args:
+            sql_query: SQL statement (usually LLM-generated)
+
+        Returns:
+            Dictionary with valid flag, diagnostics (kind, message, name,
+            table, suggestions) and the query plan if EXPLAIN ran
+        """
+        tables = {t.lower(): t for t in self.cache.table_names() or self.db.list_tables()}
+
+        if HAS_SQLGLOT:
+            diagnostics = self._check_parsed(sql_query, tables)
+        else:
+            diagnostics = self._check_text(sql_query, tables)
+
+        plan = None
+        if not diagnostics and self.explain:
+            explained = self.db.explain_query(sql_query)
+            if explained["success"]:
+                plan = explained["plan"]
+            else:
+                diagnostics.append(diagnostic("explain_error", explained["error"]))
+
+        return {
+            "valid": not diagnostics,
+            "diagnostics": diagnostics,
+            "plan": plan
+        }
+
+    def _check_text(self, sql_query: str, tables: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Checks without a parser: read-only and table names (EXPLAIN catches the rest)"""
+        if not is_read_only(sql_query):
+            return [diagnostic("not_read_only", "Only SELECT queries are allowed.")]
+
+        diagnostics = []
+        for name in referenced_tables(sql_query):
+            if name.lower() not in tables:
+                diagnostics.append(self._unknown_table(name, tables))
+        return diagnostics
+
+    def _check_parsed(self, sql_query: str, tables: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Parse the statement and check its structure, tables and columns"""
+        try:
+            statements = [s for s in sqlglot.parse(sql_query, read=self.db.db_type) if s is not None]
+        except Exception as e:
+            return [diagnostic("parse_error", f"Syntax error: {e}".splitlines()[0])]
+
+        if len(statements) != 1:
+            return [diagnostic("multiple_statements", "Send exactly one SQL statement.")]
+
+        tree = statements[0]
+        writes = (exp.Insert, exp.Update, exp.Delete, exp.Drop, exp.Create, exp.Alter, exp.Merge, exp.Command)
+        if not isinstance(tree, exp.Query) or tree.find(*writes):
+            return [diagnostic("not_read_only", "Only SELECT queries are allowed.")]
+
+        diagnostics = []
+
+        # Names that are not real tables: CTEs and derived tables (subqueries in FROM/JOIN)
+        derived = {cte.alias_or_name.lower() for cte in tree.find_all(exp.CTE)}
+        derived |= {s.alias.lower() for s in tree.find_all(exp.Subquery) if s.alias}
+
+        # alias (or table name) -> real table
+        sources: Dict[str, str] = {}
+        for node in tree.find_all(exp.Table):
+            name = node.name
+            if name.lower() in derived:
+                continue
+            if name.lower() not in tables:
+                diagnostics.append(self._unknown_table(name, tables))
+                continue
+            sources[node.alias_or_name.lower()] = tables[name.lower()]
+            sources[name.lower()] = tables[name.lower()]
+
+        if diagnostics:
+            return diagnostics
+
+        schemas = {table: self.cache.get_or_load(table, self.db.get_table_schema) for table in set(sources.values())}
+        columns = {table: {c["name"].lower() for c in schema["columns"]} for table, schema in schemas.items()}
+        output_aliases = {a.alias.lower() for a in tree.find_all(exp.Alias)}
+
+        seen = set()
+        for node in tree.find_all(exp.Column):
+            name, qualifier = node.name, node.table.lower()
+            if not name or (qualifier, name.lower()) in seen:
+                continue
+            seen.add((qualifier, name.lower()))
+
+            if qualifier:
+                if qualifier in derived:
+                    continue
+                if qualifier not in sources:
+                    diagnostics.append(diagnostic(
+                        "unknown_table",
+                        f"Unknown table or alias {node.table} (in {node.table}.{name}).",
+                        name=node.table,
+                        suggestions=suggest(qualifier, list(sources))
+                    ))
+                elif name.lower() not in columns[sources[qualifier]]:
+                    diagnostics.append(self._unknown_column(name, [sources[qualifier]]))
+            else:
+                # Unqualified names could come from a derived table we can't see into
+                if name.lower() in output_aliases or derived:
+                    continue
+                # SQLite reads an unknown "double quoted" name as a string literal
+                if self.db.db_type == 'sqlite' and node.this.args.get("quoted"):
+                    continue
+                if not any(name.lower() in cols for cols in columns.values()):
+                    diagnostics.append(self._unknown_column(name, sorted(columns)))
+
+        return diagnostics
+
+    def _unknown_table(self, name: str, tables: Dict[str, str]) -> Dict[str, Any]:
+        """Diagnostic for a table that doesn't exist"""
+        suggestions = suggest(name, list(tables.values()))
+        hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+        return diagnostic(
+            "unknown_table",
+            f"Unknown table {name}.{hint} Tables: {', '.join(tables.values())}",
+            name=name,
+            suggestions=suggestions
+        )
+
+    def _unknown_column(self, name: str, tables: List[str]) -> Dict[str, Any]:
+        """Diagnostic for a column that none of the given tables have"""
+        schemas = {table: self.cache.get_or_load(table, self.db.get_table_schema) for table in tables}
+        candidates = {c["name"]: table for table, schema in schemas.items() for c in schema["columns"]}
+        suggestions = suggest(name, list(candidates))
+        hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+        listing = "; ".join(
+            f"{table}: {', '.join(c['name'] for c in schema['columns'])}" for table, schema in schemas.items()
+        )
+        return diagnostic(
+            "unknown_column",
+            f"Unknown column {name} in {', '.join(tables)}.{hint} Columns: {listing}",
+            name=name,
+            table=candidates[suggestions[0]] if suggestions else (tables[0] if len(tables) == 1 else None),
+            suggestions=suggestions
+        )
@@ -0,0 +1,139 @@
+"""
+Join Graph
+Tables as nodes, foreign keys as edges, built from the cached schemas.
+Used to add the bridge tables a question needs but didn't name
+(customers + products -> orders) and to give the model its join conditions.
+Databases without declared foreign keys (e.g. converted from a dump) get
+edges inferred from columns named like another table's primary key.
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+from collections import deque
+
+
+class JoinGraph:
+    """Foreign-key graph of a database's tables"""
+
+    def __init__(self, schemas: Dict[str, Dict[str, Any]]):
+        """
+        Build the graph.
+
+        Args:
+            schemas: Every table's schema (get_all_schemas format, with foreign_keys)
+        """
+        self.tables = {name.lower(): name for name in schemas}
+        # table -> [(neighbour, join condition)], both directions
+        self.edges: Dict[str, List[Tuple[str, str]]] = {name: [] for name in schemas}
+        self.inferred = False
+
+        for table, schema in schemas.items():
+            for fk in schema.get("foreign_keys", []):
+                target = self.tables.get(str(fk["references_table"]).lower())
+                if target is None:
+                    continue
+                # SQLite leaves the column out for references to the primary key
+                column = fk["references_column"] or next(iter(self._primary_key(schemas[target])), None)
+                if column:
+                    self._add(table, fk["column"], target, column)
+
+        if not any(self.edges.values()):
+            self._infer(schemas)
+
+    @staticmethod
+    def _primary_key(schema: Dict[str, Any]) -> List[str]:
+        return [c["name"] for c in schema["columns"] if c.get("key") == "PRI"]
+
+    def _add(self, table: str, column: str, target: str, target_column: str):
+        condition = f"{table}.{column}={target}.{target_column}"
+        if table == target or any(c == condition for _, c in self.edges[table]):
+            return
+        self.edges[table].append((target, condition))
+        self.edges[target].append((table, condition))
+
+    def _infer(self, schemas: Dict[str, Dict[str, Any]]):
+        """Edges from columns that share the name of another table's single-column primary key"""
+        keys = {}
+        for table, schema in schemas.items():
+            primary = self._primary_key(schema)
+            if len(primary) == 1 and primary[0].lower() != "id":
+                keys.setdefault(primary[0].lower(), (table, primary[0]))
+        for table, schema in schemas.items():
+            own = {k.lower() for k in self._primary_key(schema)}
+            for column in schema["columns"]:
+                target = keys.get(column["name"].lower())
+                if target is not None and column["name"].lower() not in own:
+                    self._add(table, column["name"], *target)
+                    self.inferred = True
+
+    def _path(self, sources: List[str], goal: str) -> Optional[List[str]]:
+        """Shortest path (BFS, every join costs the same) from any source to goal"""
+        previous = {source: None for source in sources}
+        queue = deque(sources)
+        while queue:
+            table = queue.popleft()
+            if table == goal:
+                path = []
+                while table is not None:
+                    path.append(table)
+                    table = previous[table]
+                return path[::-1]
+            for neighbour, _ in self.edges[table]:
+                if neighbour not in previous:
+                    previous[neighbour] = table
+                    queue.append(neighbour)
+        return None
+
+    def connect(self, tables: List[str]) -> List[str]:
+        """
+        Tables to add so that all of tables can be joined.
+        Grows a tree from the first table along shortest paths to each of
+        the others in turn (a Steiner tree approximation, exact for two).
+
+        Returns:
+            Bridge tables in path order, empty if none are needed or the
+            tables aren't connected
+        """
+        selected = [self.tables[t.lower()] for t in tables if t.lower() in self.tables]
+        if len(selected) < 2:
+            return []
+
+        tree = [selected[0]]
+        added = []
+        for goal in selected[1:]:
+            if goal in tree:
+                continue
+            path = self._path(tree, goal)
+            if path is None:
+                tree.append(goal)  # Not connected, the model has to cross join or filter
+                continue
+            for table in path[1:]:
+                if table not in tree:
+                    tree.append(table)
+                    if table not in selected:
+                        added.append(table)
+        return added
+
+    def neighbours(self, table: str) -> List[str]:
+        """Tables directly joined to table, each once"""
+        name = self.tables.get(table.lower())
+        if name is None:
+            return []
+        return list(dict.fromkeys(neighbour for neighbour, _ in self.edges[name]))
+
+    def join_hints(self, tables: List[str]) -> List[str]:
+        """Join conditions between the given tables (a.col=b.col)"""
+        names = {self.tables[t.lower()] for t in tables if t.lower() in self.tables}
+        hints = []
+        for table in sorted(names):
+            for neighbour, condition in self.edges[table]:
+                if neighbour in names and condition not in hints:
+                    hints.append(condition)
+        return hints
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get graph statistics"""
+        return {
+            "tables": len(self.edges),
+            "edges": sum(len(e) for e in self.edges.values()) // 2,
+            "inferred": self.inferred
+        }
@@ -0,0 +1,203 @@
+"""
+Question Cache
+Caches complete answers for questions that were already asked.
+A hit skips every LLM call (analyze, generate SQL, generate answer).
+"""
+
+from typing import Dict, Any, Optional, List, Callable
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import threading
+import re
+
+
+# Phrases that mean the same thing, mapped to one canonical form.
+# Longer phrases come first so they win over their sub-phrases.
+DEFAULT_SYNONYMS = [
+    ("what is the total number of", "count"),
+    ("what is the number of", "count"),
+    ("total number of", "count"),
+    ("number of", "count"),
+    ("how many", "count"),
+    ("show me", "list"),
+    ("give me", "list"),
+    ("display", "list"),
+    ("show", "list"),
+    ("what are", "list"),
+    ("what s", "what is"),
+    ("whats", "what is"),
+]
+
+# Comparison operators spelled as words, so "> 500" and "< 500" get different keys.
+# Two-character operators come first so they win over their first character.
+COMPARISONS = [
+    ("<=", "lte"),
+    (">=", "gte"),
+    ("!=", "ne"),
+    ("<>", "ne"),
+    ("==", "eq"),
+    ("<", "lt"),
+    (">", "gt"),
+    ("=", "eq"),
+]
+
+# Words and numbers of a question; numbers keep their sign and decimals ("-1.5")
+TOKEN = re.compile(r"(?<!\w)-?\d+(?:\.\d+)*|\w+")
+
+# Words that do not change the meaning of a question
+FILLER_WORDS = {"please", "the", "a", "an", "do", "we", "have", "are", "there", "all", "our", "in"}
+
+
+class QuestionCache:
+    """LRU + TTL cache of answered questions"""
+
+    def __init__(self, max_entries: int = 256, ttl_minutes: int = 60,
+                 synonyms: Optional[List[tuple]] = None):
+        """
+        Initialize question cache.
+
+        Args:
+            max_entries: Maximum number of cached answers (least recently used are evicted)
+            ttl_minutes: Time-to-live for cache entries (minutes)
+            synonyms: Optional list of (phrase, replacement) pairs used for normalization
+        """
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.max_entries = max_entries
+        self.ttl = ttl_minutes
+        self.synonyms = synonyms if synonyms is not None else DEFAULT_SYNONYMS
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def normalize(self, question: str) -> str:
+        """
+        Build the cache key for a question.
+
+        Lowercases, spells out comparison operators, strips other
+        punctuation (numbers keep their sign and decimals), maps synonyms
+        and drops filler words, so "How many customers do we have?" and
+        "count customers" share one entry but "> 500" and "< 500" don't.
+
+        Args:
+            question: User's question in natural language
+
+        Returns:
+            Normalized question text
+        """
+        text = question.lower()
+        for operator, word in COMPARISONS:
+            text = text.replace(operator, f" {word} ")
+        text = " ".join(TOKEN.findall(text))
+
+        for phrase, replacement in self.synonyms:
+            text = re.sub(rf"\b{re.escape(phrase)}\b", replacement, text)
+
+        words = [w for w in text.split() if w not in FILLER_WORDS]
+        return " ".join(words)
+
+    def get(self, question: str,
+            version_fn: Optional[Callable[[List[str]], Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get cached result for a question.
+
+        Args:
+            question: User's question in natural language
+            version_fn: Returns the current data version for a list of tables.
+                        Entries cached under another version are dropped.
+
+        Returns:
+            Cached result or None if not found/expired/stale
+        """
+        key = self.normalize(question)
+
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            # Check if expired
+            if datetime.now() - entry["timestamp"] > timedelta(minutes=self.ttl):
+                del self.entries[key]
+                self.misses += 1
+                return None
+
+        # Check if the underlying tables changed (outside the lock, may hit the DB)
+        if version_fn is not None and version_fn(entry["tables"]) != entry["data_version"]:
+            with self.lock:
+                self.entries.pop(key, None)
+                self.misses += 1
+            return None
+
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+            self.hits += 1
+
+        return entry["result"]
+
+    def set(self, question: str, result: Dict[str, Any], tables: List[str],
+            data_version: Any = None):
+        """
+        Cache the result of a question.
+
+        Args:
+            question: User's question in natural language
+            result: Result dictionary (answer, SQL, query results)
+            tables: Tables the answer was computed from
+            data_version: Data version of those tables when the answer was computed
+        """
+        key = self.normalize(question)
+
+        with self.lock:
+            self.entries[key] = {
+                "result": result,
+                "tables": list(tables),
+                "data_version": data_version,
+                "timestamp": datetime.now()
+            }
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tables: Optional[List[str]] = None):
+        """
+        Drop cached answers that depend on the given tables.
+
+        Args:
+            tables: Table names, or None to drop everything
+        """
+        with self.lock:
+            if tables is None:
+                self.entries = OrderedDict()
+                return
+
+            changed = set(tables)
+            stale = [key for key, entry in self.entries.items()
+                     if changed.intersection(entry["tables"])]
+            for key in stale:
+                del self.entries[key]
+
+    def clear(self):
+        """Clear all cached answers and counters"""
+        with self.lock:
+            self.entries = OrderedDict()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
@@ -0,0 +1,178 @@
+"""
+Result Cache
+Caches SQL query results so identical queries are served from memory.
+Entries are tied to the database's data version and dropped when the data changes.
+"""
+
+from typing import Dict, Any, Optional, List, Tuple
+from collections import OrderedDict
+import threading
+import sys
+import re
+
+
+READ_ONLY_PREFIXES = ("select", "with")
+
+# Statements that change data or schema (others, like EXPLAIN or PRAGMA, leave cached results valid)
+WRITE_PREFIXES = ("insert", "update", "delete", "replace", "merge", "upsert", "create", "drop",
+                  "alter", "truncate", "rename", "attach", "detach", "load")
+
+
+def canonicalize_sql(sql_query: str) -> str:
+    """
+    Canonical form of a SQL statement used as cache key.
+
+    Collapses whitespace outside string literals and drops a trailing semicolon,
+    so formatting differences between identical queries don't cause misses.
+    """
+    parts = re.split(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")", sql_query.strip())
+    canonical = []
+    for i, part in enumerate(parts):
+        if i % 2:  # String literal, keep as is
+            canonical.append(part)
+        else:
+            canonical.append(" ".join(part.split()))
+    return "".join(canonical).rstrip(";").strip()
+
+
+def cache_key(sql_query: str, params: tuple = ()) -> str:
+    """Cache key of a statement and its bound parameters"""
+    key = canonicalize_sql(sql_query)
+    return f"{key}\x00{params!r}" if params else key
+
+
+def is_read_only(sql_query: str) -> bool:
+    """Check if a statement only reads data (safe to cache)"""
+    return sql_query.lstrip("( \n\t").lower().startswith(READ_ONLY_PREFIXES)
+
+
+def is_write(sql_query: str) -> bool:
+    """Check if a statement changes data or schema (cached results may be stale after it)"""
+    return sql_query.lstrip("( \n\t").lower().startswith(WRITE_PREFIXES)
+
+
+def referenced_tables(sql_query: str) -> List[str]:
+    """Table names that appear after FROM/JOIN in a statement"""
+    names = re.findall(r"\b(?:from|join)\s+[`\"\[]?(\w+)", sql_query, flags=re.IGNORECASE)
+    return sorted(set(names))
+
+
+def estimate_size(columns: Tuple[str, ...], rows: List[tuple]) -> int:
+    """Approximate memory footprint of a cached result in bytes"""
+    size = sys.getsizeof(rows) + sum(sys.getsizeof(c) for c in columns)
+    for row in rows:
+        size += sys.getsizeof(row)
+        for value in row:
+            size += sys.getsizeof(value)
+    return size
+
+
+class ResultCache:
+    """LRU cache of query results with a byte budget"""
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        """
+        Initialize result cache.
+
+        Args:
+            max_bytes: Memory budget for cached rows (least recently used are evicted)
+        """
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, sql_query: str, data_version: Any,
+            params: tuple = ()) -> Optional[Tuple[Tuple[str, ...], List[tuple]]]:
+        """
+        Get cached result for a query.
+
+        Args:
+            sql_query: SQL statement
+            data_version: Current data version of the tables the query reads
+            params: Bound parameters of the statement
+
+        Returns:
+            (columns, rows) with rows as tuples, or None if not found/stale
+        """
+        key = cache_key(sql_query, params)
+
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry["data_version"] != data_version:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry["columns"], entry["rows"]
+
+    def set(self, sql_query: str, columns: List[str], rows: List[tuple], data_version: Any,
+            params: tuple = ()):
+        """
+        Cache the result of a query.
+
+        Args:
+            sql_query: SQL statement
+            columns: Column names
+            rows: Result rows as tuples
+            data_version: Data version the result was computed on
+            params: Bound parameters of the statement
+        """
+        key = cache_key(sql_query, params)
+        columns = tuple(columns)
+        size = estimate_size(columns, rows)
+
+        # Never let one huge result flush the whole cache
+        if size > self.max_bytes // 4:
+            return
+
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+
+            self.entries[key] = {
+                "columns": columns,
+                "rows": rows,
+                "data_version": data_version,
+                "size": size
+            }
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes and self.entries:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        """Remove an entry and release its bytes (caller holds the lock)"""
+        entry = self.entries.pop(key)
+        self.current_bytes -= entry["size"]
+
+    def clear(self):
+        """Clear all cached results"""
+        with self.lock:
+            self.entries = OrderedDict()
+            self.current_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "bytes_used": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
@@ -2,28 +2,180 @@
 Schema Cache
 Caches table schemas to avoid repeatedly fetching them.
 Saves ~100 tokens per table per question after first fetch.
+Entries stay until the database reports a new schema version
+(TTL and question-count clearing are optional fallbacks).
+With a loader, all schemas are loaded at once (at startup, after each
+schema change and on first use after a clear), so questions never wait
+for one catalog read per table.
+With a store, loads are shared with other workers and later restarts.
+Once every schema is loaded, the foreign keys form a join graph.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, List
 from datetime import datetime, timedelta
+from contextlib import contextmanager
+import time
+
+from .join_graph import JoinGraph
 
 
 class SchemaCache:
     """Caches database schema information to save tokens"""
     
-    def __init__(self, ttl_minutes: int = 30, max_questions: int = 20):
+    def __init__(self, ttl_minutes: int = 30, max_questions: int = 20,
+                 version_source: Optional[Callable[[], str]] = None,
+                 check_seconds: float = 5.0,
+                 loader: Optional[Callable[[], Dict[str, Dict[str, Any]]]] = None,
+                 store=None, db_identity: str = ""):
         """
         Initialize schema cache.
         
         Args:
-            ttl_minutes: Time-to-live for cache entries (minutes)
-            max_questions: Clear cache after this many questions
+            ttl_minutes: Time-to-live for cache entries (minutes, 0 = no expiry)
+            max_questions: Clear cache after this many questions (0 = never)
+            version_source: Returns the database's schema version
+                (e.g. DatabaseTools.get_schema_version); the cache is
+                cleared whenever it changes
+            check_seconds: Ask version_source at most this often
+            loader: Returns every table's schema at once
+                (e.g. DatabaseTools.get_all_schemas), used by load()
+            store: SchemaStore that load() reads first and writes after the loader
+                (needs version_source, entries are keyed by schema version)
+            db_identity: Identifies the database in the store
+                (e.g. DatabaseTools.identity)
         """
         self.cache: Dict[str, Dict[str, Any]] = {}
         self.ttl = ttl_minutes
         self.max_questions = max_questions
         self.question_count = 0
         self.created_at = datetime.now()
+        self.active_batches = 0
+        
+        self.version_source = version_source
+        self.check_seconds = check_seconds
+        self.version: Optional[str] = None
+        self.checked_at = 0.0
+        self.invalidations = 0
+        self.hits = 0
+        self.misses = 0
+        
+        self.loader = loader
+        self.tables: Optional[List[str]] = None  # All table names, once loaded
+        self.graph: Optional[JoinGraph] = None
+        self.loads = 0
+        
+        self.store = store if version_source is not None else None
+        self.db_identity = db_identity
+        self.store_loads = 0
+    
+    def load(self) -> int:
+        """
+        Fill the cache with every table's schema from the loader.
+        
+        Returns:
+            Number of tables loaded
+        """
+        if self.loader is None:
+            return 0
+        
+        # Version first, so a change during the load is caught by the next check
+        if self.version_source is not None:
+            self.version = self.version_source()
+            self.checked_at = time.monotonic()
+        
+        schemas = self._load_stored()
+        if schemas is None:
+            schemas = self.loader()
+            self._store(schemas)
+        self.set_many(schemas)
+        self.loads += 1
+        return len(schemas)
+    
+    def _load_stored(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Schemas another worker (or an earlier run) stored for this version"""
+        if self.store is None:
+            return None
+        try:
+            schemas = self.store.get(self.db_identity, "schemas", self.version)
+        except Exception as e:
+            print(f">> Schema store read failed: {e}")
+            return None
+        if schemas is not None:
+            self.store_loads += 1
+        return schemas
+    
+    def _store(self, schemas: Dict[str, Dict[str, Any]]):
+        """Share freshly loaded schemas through the store"""
+        if self.store is None:
+            return
+        try:
+            self.store.put(self.db_identity, "schemas", self.version, schemas)
+        except Exception as e:
+            print(f">> Schema store write failed: {e}")
+    
+    def set_many(self, schemas: Dict[str, Dict[str, Any]]):
+        """Cache the schemas of all tables (remembers the table list too)"""
+        for table_name, schema in schemas.items():
+            self.set(table_name, schema)
+        self.tables = list(schemas.keys())
+        self.graph = JoinGraph(schemas)
+    
+    def table_names(self) -> Optional[List[str]]:
+        """All table names if every schema was loaded, else None (ask the database)"""
+        self.check_version()
+        self._reload()
+        return self.tables
+    
+    def join_graph(self) -> Optional[JoinGraph]:
+        """Foreign-key graph of all tables, or None until every schema is loaded"""
+        self.check_version()
+        self._reload()
+        return self.graph
+    
+    def _reload(self):
+        """Load every schema again after clear() (reset, TTL or question count)"""
+        if self.loader is None or self.tables is not None:
+            return
+        try:
+            print(f">> Reloaded {self.load()} table schemas")
+        except Exception as e:
+            print(f">> Schema reload failed: {e}")
+    
+    def check_version(self, force: bool = False) -> bool:
+        """
+        Clear the cache if the database schema changed since the last check.
+        Asks the database at most once per check_seconds unless forced.
+        
+        Returns:
+            True if the cache was cleared
+        """
+        if self.version_source is None:
+            return False
+        
+        now = time.monotonic()
+        if not force and now - self.checked_at < self.check_seconds:
+            return False
+        self.checked_at = now
+        
+        try:
+            version = self.version_source()
+        except Exception as e:
+            print(f">> Schema version check failed: {e}")
+            return False
+        
+        if self.version is None:
+            self.version = version
+            return False
+        if version == self.version:
+            return False
+        
+        self.version = version
+        self.clear()
+        self.invalidations += 1
+        print(">> Schema changed, cache cleared")
+        
+        self._reload()
+        return True
     
     def get(self, table_name: str) -> Optional[Dict[str, Any]]:
         """
@@ -35,16 +187,20 @@ class SchemaCache:
         Returns:
             Cached schema or None if not found/expired
         """
-        if table_name not in self.cache:
-            return None
+        self.check_version()
         
-        entry = self.cache[table_name]
+        entry = self.cache.get(table_name)
+        if entry is None:
+            self.misses += 1
+            return None
         
         # Check if expired
-        if datetime.now() - entry["timestamp"] > timedelta(minutes=self.ttl):
-            del self.cache[table_name]
+        if self.ttl and datetime.now() - entry["timestamp"] > timedelta(minutes=self.ttl):
+            self.cache.pop(table_name, None)
+            self.misses += 1
             return None
         
+        self.hits += 1
         return entry["schema"]
     
     def set(self, table_name: str, schema: Dict[str, Any]):
@@ -60,25 +216,64 @@ class SchemaCache:
             "timestamp": datetime.now()
         }
     
+    def get_or_load(self, table_name: str, loader: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Get a table schema, from cache if possible.
+        
+        Args:
+            table_name: Name of the table
+            loader: Reads one table's schema on a miss
+                (e.g. DatabaseTools.get_table_schema); the result is cached
+            
+        Returns:
+            Schema dictionary
+        """
+        schema = self.get(table_name)
+        if schema is None:
+            schema = loader(table_name)
+            self.set(table_name, schema)
+        return schema
+    
     def increment_question_count(self):
         """Increment question counter and clear if limit reached"""
         self.question_count += 1
         
-        if self.question_count >= self.max_questions:
+        # Don't drop schemas a running batch has prefetched
+        if self.max_questions and self.question_count >= self.max_questions and not self.active_batches:
             self.clear()
             print(f">> Cache cleared after {self.max_questions} questions")
     
+    @contextmanager
+    def batch(self):
+        """Hold off question-count clearing while a batch of questions runs"""
+        self.active_batches += 1
+        try:
+            yield self
+        finally:
+            self.active_batches -= 1
+    
     def clear(self):
         """Clear all cached schemas"""
         self.cache = {}
+        self.tables = None
+        self.graph = None
         self.question_count = 0
         self.created_at = datetime.now()
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
+        lookups = self.hits + self.misses
         return {
             "cached_tables": list(self.cache.keys()),
             "cache_size": len(self.cache),
             "questions_asked": self.question_count,
-            "cache_age_minutes": (datetime.now() - self.created_at).seconds // 60
+            "cache_age_minutes": (datetime.now() - self.created_at).seconds // 60,
+            "schema_version": self.version,
+            "invalidations": self.invalidations,
+            "loads": self.loads,
+            "store_loads": self.store_loads,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "join_graph": self.graph.get_stats() if self.graph else {}
         }
@@ -0,0 +1,121 @@
+"""
+Schema Store
+Persistent backend for SchemaCache (and the stats catalog), shared by every
+worker process on a host and kept across restarts.
+Entries are keyed by database identity and version, so a worker only reuses
+what was read from the same database at the same schema (or data) version.
+A cold start reads one row from a local SQLite file instead of the catalog.
+"""
+
+from typing import Dict, Any, Optional
+from abc import ABC, abstractmethod
+from contextlib import closing
+import tempfile
+import sqlite3
+import json
+import time
+import os
+
+
+class SchemaStore(ABC):
+    """Backend interface: one payload per database identity and kind"""
+
+    @abstractmethod
+    def get(self, identity: str, kind: str, version: str) -> Optional[Dict[str, Any]]:
+        """Stored payload, or None if missing or stored for another version"""
+
+    @abstractmethod
+    def put(self, identity: str, kind: str, version: str, payload: Dict[str, Any]):
+        """Store payload, replacing any older version"""
+
+    def close(self):
+        """Release the backend"""
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics"""
+        return {}
+
+
+class SQLiteSchemaStore(SchemaStore):
+    """SQLite file in WAL mode, safe to share between processes"""
+
+    def __init__(self, path: str = "", busy_timeout_seconds: float = 5.0):
+        """
+        Initialize store.
+
+        Args:
+            path: Store file ("" = sql_analyst_schema_store.db in the temp directory,
+                which is writable on serverless hosts too)
+            busy_timeout_seconds: Wait this long for another process's write
+        """
+        self.path = path or os.path.join(tempfile.gettempdir(), "sql_analyst_schema_store.db")
+        self.busy_timeout = busy_timeout_seconds
+        self.reads = 0
+        self.hits = 0
+        self.writes = 0
+
+        # closing() closes the connection, its own with block only ends the transaction
+        with closing(self._open()) as connection, connection:
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS schema_store ("
+                "db_identity TEXT, kind TEXT, version TEXT, payload TEXT, stored_at REAL, "
+                "PRIMARY KEY (db_identity, kind))"
+            )
+
+    def _open(self) -> sqlite3.Connection:
+        """Short-lived connection (reads and writes are rare, once per load)"""
+        return sqlite3.connect(self.path, timeout=self.busy_timeout)
+
+    def get(self, identity: str, kind: str, version: str) -> Optional[Dict[str, Any]]:
+        self.reads += 1
+        with closing(self._open()) as connection:
+            row = connection.execute(
+                "SELECT payload FROM schema_store WHERE db_identity = ? AND kind = ? AND version = ?",
+                (identity, kind, version)
+            ).fetchone()
+        if row is None:
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, identity: str, kind: str, version: str, payload: Dict[str, Any]):
+        with closing(self._open()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO schema_store (db_identity, kind, version, payload, stored_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (identity, kind, version, json.dumps(payload, default=str), time.time())
+            )
+        self.writes += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "reads": self.reads,
+            "hits": self.hits,
+            "writes": self.writes
+        }
+
+
+def create_schema_store(config: Dict[str, Any]) -> Optional[SchemaStore]:
+    """
+    Build the store from the cache.store section of config.yaml.
+
+    Returns:
+        SchemaStore, or None when disabled or the file can't be opened
+        (caches then work in memory only)
+    """
+    if not config.get('enabled', True):
+        return None
+    backend = config.get('backend', 'sqlite')
+    if backend != 'sqlite':
+        raise ValueError(f"Unknown schema store backend: {backend}")
+    try:
+        return SQLiteSchemaStore(
+            path=config.get('path', ''),
+            busy_timeout_seconds=config.get('busy_timeout_seconds', 5)
+        )
+    except sqlite3.Error as e:
+        print(f">> Schema store unavailable, caching in memory only: {e}")
+        return None
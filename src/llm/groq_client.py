@@ -3,8 +3,8 @@ Groq API Client
 Handles communication with Groq LLM and tracks token usage.
 """
 
-from groq import Groq
-from typing import Dict, Any, List
+from groq import Groq, AsyncGroq
+from typing import Dict, Any, List, AsyncIterator
 import os
 
 
@@ -23,6 +23,7 @@ class GroqClient:
             temperature: Temperature for generation (0.1 = focused/deterministic)
         """
         self.client = Groq(api_key=api_key)
+        self.async_client = AsyncGroq(api_key=api_key)
         self.model = model
         self.max_tokens = max_tokens
         self.temperature = temperature
@@ -51,21 +52,36 @@ class GroqClient:
                 temperature=self.temperature
             )
             
-            # Extract response
-            content = response.choices[0].message.content
-            
-            # Track tokens
-            tokens_used = response.usage.total_tokens
-            self.session_tokens += tokens_used
-            self.question_tokens.append(tokens_used)
+            return self._parse_response(response)
             
+        except Exception as e:
             return {
-                "success": True,
-                "content": content,
-                "tokens_used": tokens_used,
-                "prompt_tokens": response.usage.prompt_tokens,
-                "completion_tokens": response.usage.completion_tokens
+                "success": False,
+                "error": str(e),
+                "tokens_used": 0
             }
+    
+    async def achat(self, messages: List[Dict[str, str]], 
+                    max_tokens: int = None) -> Dict[str, Any]:
+        """
+        Send chat request to Groq without blocking the event loop.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            max_tokens: Override default max_tokens
+            
+        Returns:
+            Dictionary with response and token usage (same shape as chat)
+        """
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens or self.max_tokens,
+                temperature=self.temperature
+            )
+            
+            return self._parse_response(response)
             
         except Exception as e:
             return {
@@ -74,6 +90,70 @@ class GroqClient:
                 "tokens_used": 0
             }
     
+    async def astream_chat(self, messages: List[Dict[str, str]], 
+                           max_tokens: int = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a chat response from Groq token by token.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            max_tokens: Override default max_tokens
+            
+        Yields:
+            {"type": "token", "content": ...} for each delta, then one
+            {"type": "done", "success": ..., "tokens_used": ...} at the end
+        """
+        stream = None
+        tokens_used = 0
+        
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens or self.max_tokens,
+                temperature=self.temperature,
+                stream=True
+            )
+            
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield {"type": "token", "content": chunk.choices[0].delta.content}
+                
+                # Groq reports usage on the last chunk
+                usage = chunk.x_groq.usage if chunk.x_groq else None
+                if usage:
+                    tokens_used = usage.total_tokens
+            
+            self.session_tokens += tokens_used
+            self.question_tokens.append(tokens_used)
+            yield {"type": "done", "success": True, "tokens_used": tokens_used}
+            
+        except Exception as e:
+            yield {"type": "done", "success": False, "error": str(e), "tokens_used": tokens_used}
+        
+        finally:
+            # Stop reading from Groq if the consumer went away mid-stream
+            if stream is not None:
+                await stream.close()
+    
+    def _parse_response(self, response) -> Dict[str, Any]:
+        """Extract content and track token usage of a completion"""
+        # Extract response
+        content = response.choices[0].message.content
+        
+        # Track tokens
+        tokens_used = response.usage.total_tokens
+        self.session_tokens += tokens_used
+        self.question_tokens.append(tokens_used)
+        
+        return {
+            "success": True,
+            "content": content,
+            "tokens_used": tokens_used,
+            "prompt_tokens": response.usage.prompt_tokens,
+            "completion_tokens": response.usage.completion_tokens
+        }
+    
     def get_token_stats(self) -> Dict[str, Any]:
         """Get token usage statistics"""
         return {
@@ -4,7 +4,7 @@ Short, efficient prompts to minimize token usage.
 Each prompt is designed to get the job done with minimum tokens.
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 
 def analyze_question_prompt(user_question: str, available_tables: list) -> str:
@@ -21,24 +21,82 @@ Question: {user_question}
 Which tables do you need to answer this? Reply with ONLY the table names, comma-separated. Nothing else."""
 
 
-def generate_sql_prompt(user_question: str, schemas: Dict[str, Any]) -> str:
+def join_hints_text(join_hints: Optional[List[str]]) -> str:
+    """One line of join conditions (empty without hints)"""
+    return f"\nJoins: {', '.join(join_hints)}" if join_hints else ""
+
+
+def generate_sql_prompt(user_question: str, schemas: Dict[str, Any], dialect: str = "MySQL",
+                        join_hints: Optional[List[str]] = None) -> str:
     """
     Prompt to generate SQL query.
-    Provides only necessary schema information.
+    Provides only necessary schema information, plus the join
+    conditions between the tables so bridge tables aren't skipped.
     """
     schema_text = ""
     for table_name, schema in schemas.items():
         cols = [f"{c['name']} ({c['type']})" for c in schema['columns']]
         schema_text += f"\n{table_name}: {', '.join(cols)}"
+    schema_text += join_hints_text(join_hints)
     
     return f"""Tables and columns:{schema_text}
 
 Question: {user_question}
 
-Write a MySQL query to answer this. Return ONLY the SQL query, no explanation or formatting."""
+Write a {dialect} query to answer this. Return ONLY the SQL query, no explanation or formatting."""
+
+
+def compact_sql_prompt(user_question: str, schema_text: str, dialect: str = "MySQL") -> str:
+    """
+    generate_sql_prompt with schema text from the PromptCompactor
+    (short types, shared columns once, irrelevant columns dropped).
+    """
+    return f"""Schema:
+{schema_text}
+
+Question: {user_question}
+
+Write a {dialect} query to answer this. Return ONLY the SQL query, no explanation or formatting."""
+
+
+def compact_schema_text(schemas: Dict[str, Any]) -> str:
+    """
+    One line per table: table(col TYPE, ...).
+    Marks primary keys with PK to save a separate key listing.
+    """
+    lines = []
+    for table_name, schema in schemas.items():
+        cols = []
+        for c in schema['columns']:
+            col = f"{c['name']} {c['type']}".strip()
+            if c.get('key') == "PRI":
+                col += " PK"
+            cols.append(col)
+        lines.append(f"{table_name}({', '.join(cols)})")
+    return "\n".join(lines)
+
+
+def plan_sql_prompt(user_question: str, schemas: Dict[str, Any], dialect: str = "MySQL",
+                    join_hints: Optional[List[str]] = None) -> str:
+    """
+    Prompt to pick tables and write SQL in a single call.
+    Sends the whole schema in compact form instead of asking for tables first.
+    """
+    return f"""Schema:
+{compact_schema_text(schemas)}{join_hints_text(join_hints)}
+
+Question: {user_question}
+
+Write a {dialect} query to answer this, using only the tables you need. Return ONLY the SQL query, no explanation or formatting."""
+
 
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return len(text) // 4 + 1
 
-def fix_sql_prompt(original_sql: str, error_message: str, user_question: str) -> str:
+
+def fix_sql_prompt(original_sql: str, error_message: str, user_question: str,
+                   dialect: str = "MySQL") -> str:
     """
     Prompt to fix a failed SQL query.
     Used when query has syntax errors.
@@ -50,10 +108,29 @@ Error: {error_message}
 
 Question was: {user_question}
 
-Fix the query. Return ONLY the corrected SQL, no explanation."""
+Fix the query for {dialect}. Return ONLY the corrected SQL, no explanation."""
+
+
+def repair_sql_prompt(original_sql: str, diagnostics: List[Dict[str, Any]],
+                      dialect: str = "MySQL") -> str:
+    """
+    Prompt to fix SQL that failed local validation.
+    The diagnostics already name the problem and the valid names,
+    so the question and full schema are left out.
+    """
+    problems = "\n".join(f"- {d['message']}" for d in diagnostics)
+
+    return f"""Fix this {dialect} query:
+{original_sql}
+
+Problems:
+{problems}
 
+Return ONLY the corrected SQL."""
 
-def generate_answer_prompt(user_question: str, query_results: List[Dict]) -> str:
+
+def generate_answer_prompt(user_question: str, query_results: List[Dict],
+                           total_rows: Optional[int] = None) -> str:
     """
     Prompt to generate human-friendly answer from query results.
     Keeps it short.
@@ -61,21 +138,59 @@ def generate_answer_prompt(user_question: str, query_results: List[Dict]) -> str
     # Limit results shown to save tokens (max 10 rows)
     results_preview = query_results[:10]
     
+    # Say how many rows there are when only some are shown
+    total_rows = total_rows if total_rows is not None else len(query_results)
+    label = f"Query results (first {len(results_preview)} of {total_rows} rows)" \
+        if total_rows > len(results_preview) else "Query results"
+    
     return f"""Question: {user_question}
 
-Query results: {results_preview}
+{label}: {results_preview}
 
 Explain the answer in 1-2 clear sentences."""
 
 
-def direct_sql_patterns() -> Dict[str, str]:
+def direct_sql_patterns() -> Dict[str, Dict[str, str]]:
     """
     Patterns for direct SQL generation (no LLM needed).
     Ultra-fast, 0 tokens.
+    
+    Each regex is matched against the whole lowercased question. Named groups
+    (table, column, op, value, n, direction) are resolved against the schema
+    and filled into the SQL and answer templates.
     """
+    count = r"(?:what is the )?(?:how many|count(?: of)?|count all|total number of|number of)"
+    show = r"(?:show(?: me)?|list|display|give me|what are|who are)(?: all)?(?: the)?"
+    suffix = r"(?: (?:do we have|are there|exist|in total|in the database|we have|there are))?"
+    op = r"(?P<op>is not|is|equals|=|!=|greater than|more than|above|over|>|less than|below|under|<)"
+    
     return {
-        r"how many (\w+)": "SELECT COUNT(*) FROM {table}",
-        r"count (\w+)": "SELECT COUNT(*) FROM {table}",
-        r"show me (\w+)": "SELECT * FROM {table} LIMIT 10",
-        r"list (\w+)": "SELECT * FROM {table} LIMIT 10"
+        rf"^{count} (?P<table>\w+){suffix}$": {
+            "sql": "SELECT COUNT(*) AS count FROM {table}",
+            "answer": "There are {count} {table}."
+        },
+        rf"^{count} (?P<table>\w+) (?:where|with) (?P<column>[\w ]+?) {op} (?P<value>.+?){suffix}$": {
+            "sql": "SELECT COUNT(*) AS count FROM {table} WHERE {condition}",
+            "answer": "There are {count} {table} where {filter}."
+        },
+        rf"^{count} (?P<table>\w+) (?:from|in) (?P<value>.+?){suffix}$": {
+            "sql": "SELECT COUNT(*) AS count FROM {table} WHERE {condition}",
+            "answer": "There are {count} {table} where {filter}."
+        },
+        rf"^(?:{show} )?(?P<direction>top|bottom) (?P<n>\d+) (?P<table>\w+) by (?P<column>[\w ]+)$": {
+            "sql": "SELECT * FROM {table} ORDER BY {column} {order} LIMIT {n}",
+            "answer": "{direction_title} {n} {table} by {column}: {rows}."
+        },
+        rf"^{show} (?P<table>\w+) (?:where|with) (?P<column>[\w ]+?) {op} (?P<value>.+)$": {
+            "sql": "SELECT * FROM {table} WHERE {condition} LIMIT 10",
+            "answer": "Here are {row_count} {table} where {filter}: {rows}."
+        },
+        rf"^{show} (?P<table>\w+) (?:from|in) (?P<value>.+)$": {
+            "sql": "SELECT * FROM {table} WHERE {condition} LIMIT 10",
+            "answer": "Here are {row_count} {table} where {filter}: {rows}."
+        },
+        rf"^{show} (?P<table>\w+)$": {
+            "sql": "SELECT * FROM {table} LIMIT 10",
+            "answer": "Here are the first {row_count} {table}: {rows}."
+        }
     }
@@ -0,0 +1,222 @@
+"""
+Stats Catalog
+Row counts, approximate sizes and column cardinalities of every table,
+kept in memory so listing tables doesn't scan them.
+- SQLite: sqlite_stat1 (written by ANALYZE) when present, otherwise one
+  COUNT(*) per table; sizes from dbstat; distinct counts from a sample
+- MySQL: information_schema.TABLES and STATISTICS (estimates)
+Refreshed when the data version changes, in the background once filled.
+With a store, statistics read at a data version are reused by other
+workers and later restarts instead of being read again.
+"""
+
+from typing import Dict, Any, Optional
+import threading
+import time
+
+
+class StatsCatalog:
+    """In-memory table statistics, refreshed when the data changes"""
+
+    def __init__(self, db_tools, check_seconds: float = 30.0, sample_rows: int = 10000, store=None):
+        """
+        Initialize catalog.
+
+        Args:
+            db_tools: DatabaseTools to read statistics from
+            check_seconds: Look at the data version at most this often
+            sample_rows: Rows sampled per table for distinct counts not in the stats tables
+            store: Optional SchemaStore shared with other workers
+        """
+        self.db = db_tools
+        self.check_seconds = check_seconds
+        self.sample_rows = sample_rows
+        self.store = store
+
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.version: Optional[str] = None
+        self.checked_at = 0.0
+        self.refreshed_at: Optional[float] = None
+        self.refreshes = 0
+        self.store_loads = 0
+        self.lock = threading.Lock()
+        self.refreshing = False
+
+    def tables(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Statistics of all tables: {name: {row_count, size_bytes, cardinality,
+        approximate, source}}.
+
+        The first call fills the catalog; later calls serve from memory and
+        start a background refresh if the data version has changed.
+        """
+        if self.refreshed_at is None:
+            self.refresh()
+            return self.entries
+
+        now = time.monotonic()
+        if now - self.checked_at >= self.check_seconds:
+            self.checked_at = now
+            try:
+                changed = self.db.get_data_version() != self.version
+            except Exception:
+                changed = False
+            if changed:
+                self.refresh_in_background()
+        return self.entries
+
+    def table(self, table_name: str) -> Optional[Dict[str, Any]]:
+        """Statistics of one table, or None if unknown"""
+        entries = self.tables()
+        if table_name in entries:
+            return entries[table_name]
+        lowered = table_name.lower()
+        for name, entry in entries.items():
+            if name.lower() == lowered:
+                return entry
+        return None
+
+    def row_count(self, table_name: str) -> Optional[int]:
+        """Row count of a table (approximate for MySQL), or None if unknown"""
+        entry = self.table(table_name)
+        return entry["row_count"] if entry is not None else None
+
+    def refresh(self):
+        """Read the statistics now"""
+        version = self.db.get_data_version()
+        entries = self._load_stored(version)
+        if entries is None:
+            if self.db.db_type == 'sqlite':
+                entries = self._sqlite_stats()
+            else:
+                entries = self._mysql_stats()
+            self._store(version, entries)
+
+        # Swap in one step, readers never see a half-filled catalog
+        self.entries = entries
+        self.version = version
+        self.refreshed_at = time.time()
+        self.checked_at = time.monotonic()
+        self.refreshes += 1
+
+    def _load_stored(self, version: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Statistics stored for this data version, by another worker or an earlier run"""
+        # MySQL statistics are one cheap query, and UPDATE_TIME (the data version)
+        # is NULL for tables not written since the server started
+        if self.store is None or self.db.db_type != 'sqlite':
+            return None
+        try:
+            entries = self.store.get(self.db.identity, "stats", version)
+        except Exception as e:
+            print(f">> Stats store read failed: {e}")
+            return None
+        if entries is not None:
+            self.store_loads += 1
+        return entries
+
+    def _store(self, version: str, entries: Dict[str, Dict[str, Any]]):
+        """Share freshly read statistics through the store"""
+        if self.store is None or self.db.db_type != 'sqlite':
+            return
+        try:
+            self.store.put(self.db.identity, "stats", version, entries)
+        except Exception as e:
+            print(f">> Stats store write failed: {e}")
+
+    def refresh_in_background(self):
+        """Refresh on a daemon thread, unless a refresh is already running"""
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f">> Stats refresh failed: {e}")
+            finally:
+                self.refreshing = False
+
+        threading.Thread(target=run, name="stats-catalog", daemon=True).start()
+
+    def _sqlite_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Row counts, sizes and distinct counts of SQLite tables"""
+        schemas = self.db.get_all_schemas()
+        entries = {table: {"row_count": None, "size_bytes": None, "cardinality": {},
+                           "approximate": False, "source": "count"} for table in schemas}
+
+        # ANALYZE results: "nrows" for a table, "nrows avg-rows-per-key ..." for an index
+        has_stat1 = self.db.fetch_rows(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        )
+        if has_stat1:
+            for table, index, stat in self.db.fetch_rows("SELECT tbl, idx, stat FROM sqlite_stat1"):
+                entry = entries.get(table)
+                numbers = [int(n) for n in str(stat).split() if n.isdigit()]
+                if entry is None or not numbers:
+                    continue
+                entry["row_count"] = numbers[0]
+                entry["source"] = "sqlite_stat1"
+                entry["approximate"] = True  # As of the last ANALYZE
+                if index and len(numbers) > 1 and numbers[1]:
+                    first = self.db.fetch_rows(f'PRAGMA index_info("{index}")')
+                    if first:
+                        entry["cardinality"][first[0][2]] = numbers[0] // numbers[1]
+
+        for table, entry in entries.items():
+            if entry["row_count"] is None:
+                entry["row_count"] = self.db.fetch_rows(f'SELECT COUNT(*) FROM "{table}"')[0][0]
+
+        # dbstat is missing from some SQLite builds
+        try:
+            for name, size in self.db.fetch_rows("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"):
+                if name in entries:
+                    entries[name]["size_bytes"] = size
+        except Exception:
+            pass
+
+        for table, entry in entries.items():
+            self._sample_cardinality(table, entry, schemas[table])
+        return entries
+
+    def _sample_cardinality(self, table: str, entry: Dict[str, Any], schema: Dict[str, Any]):
+        """Distinct counts of columns the stats tables don't cover, from the first sample_rows rows"""
+        columns = [c["name"] for c in schema["columns"]
+                   if c["name"] not in entry["cardinality"]]
+        if not columns or not self.sample_rows:
+            return
+
+        counts = ", ".join(f'COUNT(DISTINCT "{c}")' for c in columns)
+        row = self.db.fetch_rows(f'SELECT {counts} FROM (SELECT * FROM "{table}" LIMIT {int(self.sample_rows)})')[0]
+        entry["cardinality"].update(zip(columns, row))
+        if entry["row_count"] > self.sample_rows:
+            entry["approximate"] = True
+
+    def _mysql_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Row estimates, sizes and index cardinalities from information_schema"""
+        entries = {}
+        for table, rows, size in self.db.fetch_rows(
+            "SELECT TABLE_NAME, TABLE_ROWS, DATA_LENGTH + INDEX_LENGTH FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'"
+        ):
+            entries[table] = {"row_count": int(rows or 0), "size_bytes": int(size or 0), "cardinality": {},
+                              "approximate": True, "source": "information_schema"}
+
+        for table, column, cardinality in self.db.fetch_rows(
+            "SELECT TABLE_NAME, COLUMN_NAME, MAX(CARDINALITY) FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND SEQ_IN_INDEX = 1 GROUP BY TABLE_NAME, COLUMN_NAME"
+        ):
+            if table in entries and cardinality is not None:
+                entries[table]["cardinality"][column] = int(cardinality)
+        return entries
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get catalog statistics"""
+        return {
+            "tables": len(self.entries),
+            "refreshes": self.refreshes,
+            "store_loads": self.store_loads,
+            "refreshing": self.refreshing,
+            "age_seconds": round(time.time() - self.refreshed_at, 1) if self.refreshed_at else None
+        }
@@ -0,0 +1,99 @@
+"""
+SQL Dialect Transpiler
+Rewrites generated SQL into the active database's dialect before it runs.
+MySQL-isms on SQLite (DATE_FORMAT, CONCAT, YEAR(), backticks, ...) are
+fixed locally in microseconds instead of by a fix_sql LLM round-trip.
+Uses sqlglot when it is installed.
+"""
+
+from typing import Dict, Any
+import re
+
+try:
+    import sqlglot
+    from sqlglot import exp
+    HAS_SQLGLOT = True
+except ImportError:  # Optional dependency
+    HAS_SQLGLOT = False
+
+
+DIALECT_NAMES = {"sqlite": "SQLite", "mysql": "MySQL"}
+
+# Constructs that only exist in the *other* dialect, by target dialect
+FOREIGN_MARKERS = {
+    "sqlite": re.compile(
+        r"`|\b(?:DATE_FORMAT|CONCAT|CONCAT_WS|NOW|CURDATE|CURRENT_DATE|YEAR|MONTH|DAY|IF|DATE_SUB|DATE_ADD"
+        r"|DATEDIFF|SUBSTRING_INDEX|STR_TO_DATE|UNIX_TIMESTAMP)\s*\(|\bINTERVAL\b",
+        re.IGNORECASE
+    ),
+    "mysql": re.compile(
+        r"\|\||\b(?:STRFTIME|JULIANDAY|IIF|DATETIME)\s*\(|\"\w+\"\.",
+        re.IGNORECASE
+    )
+}
+
+# Source dialect to read foreign SQL as, by target dialect
+SOURCE_DIALECT = {"sqlite": "mysql", "mysql": "sqlite"}
+
+
+def dialect_name(db_type: str) -> str:
+    """Human-readable dialect name for prompts"""
+    return DIALECT_NAMES.get(db_type, db_type)
+
+
+def _sqlite_date_functions(node):
+    """Rewrite date functions sqlglot leaves in MySQL form for SQLite"""
+    for cls, fmt in ((exp.Year, "%Y"), (exp.Month, "%m"), (exp.Day, "%d")):
+        if isinstance(node, cls):
+            return exp.Cast(
+                this=exp.Anonymous(this="STRFTIME", expressions=[exp.Literal.string(fmt), node.this]),
+                to=exp.DataType.build("INTEGER")
+            )
+
+    if isinstance(node, (exp.DateAdd, exp.DateSub)):
+        amount = node.expression
+        unit = node.unit.name.lower() if node.unit else "day"
+        if isinstance(amount, exp.Literal):
+            sign = "-" if isinstance(node, exp.DateSub) else "+"
+            modifier = exp.Literal.string(f"{sign}{amount.name} {unit}")
+            base = exp.Literal.string("now") if isinstance(node.this, exp.CurrentDate) else node.this
+            return exp.Anonymous(this="DATE", expressions=[base, modifier])
+
+    return node
+
+
+def transpile_sql(sql_query: str, db_type: str) -> Dict[str, Any]:
+    """
+    Rewrite a query into the dialect of the active database.
+
+    Only touches queries that contain constructs foreign to the target
+    dialect, so valid queries pass through unchanged.
+
+    Args:
+        sql_query: SQL statement (usually LLM-generated); None or empty
+            is returned unchanged
+        db_type: Target database type ("sqlite" or "mysql")
+
+    Returns:
+        Dictionary with the (possibly rewritten) sql, whether it changed,
+        and an error message if transpilation failed
+    """
+    markers = FOREIGN_MARKERS.get(db_type)
+    if not sql_query or markers is None or not markers.search(sql_query):
+        return {"sql": sql_query, "changed": False, "error": None}
+
+    if not HAS_SQLGLOT:
+        # Without sqlglot only fix the most common issue: MySQL backtick quoting
+        if db_type == "sqlite" and "`" in sql_query:
+            return {"sql": sql_query.replace("`", '"'), "changed": True, "error": None}
+        return {"sql": sql_query, "changed": False, "error": "sqlglot not installed"}
+
+    try:
+        tree = sqlglot.parse_one(sql_query, read=SOURCE_DIALECT[db_type])
+        if db_type == "sqlite":
+            tree = tree.transform(_sqlite_date_functions)
+        rewritten = tree.sql(dialect=db_type)
+    except Exception as e:
+        return {"sql": sql_query, "changed": False, "error": str(e)}
+
+    return {"sql": rewritten, "changed": rewritten != sql_query, "error": None}
@@ -0,0 +1,68 @@
+"""
+Result Formats
+Shapes for query result rows.
+- records: one dict per row (column names repeated in every row)
+- compact: one list per row, column names once in "columns"
+- columnar: one array per column, in "columns" order (typed array for
+  all-int / all-float columns)
+"""
+
+from typing import Dict, Any, List, Optional, Sequence
+from array import array
+
+
+RESULT_FORMATS = ("records", "compact", "columnar")
+
+
+def column_array(values: List[Any]):
+    """Typed array for all-int or all-float values, plain list otherwise"""
+    if values and all(type(v) is int for v in values):
+        try:
+            return array("q", values)
+        except OverflowError:
+            return values
+    if values and all(type(v) is float for v in values):
+        return array("d", values)
+    return values
+
+
+def format_rows(columns: Sequence[str], rows: List[tuple], result_format: str = "records"):
+    """
+    Shape row tuples for a result's "data".
+
+    Args:
+        columns: Column names
+        rows: Row tuples
+        result_format: "records", "compact" or "columnar"
+    """
+    if result_format == "records":
+        return [dict(zip(columns, row)) for row in rows]
+    if result_format == "compact":
+        return [list(row) for row in rows]
+    if result_format == "columnar":
+        return [column_array([row[i] for row in rows]) for i in range(len(columns))]
+    raise ValueError(f"Unknown result format '{result_format}', expected one of {RESULT_FORMATS}")
+
+
+def to_records(query_results: Dict[str, Any], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    First rows of a result as dicts, whatever its format.
+
+    Args:
+        query_results: Result of DatabaseTools.execute_query
+        limit: Convert at most this many rows (all if None)
+    """
+    data = query_results["data"]
+    columns = query_results["columns"]
+    result_format = query_results.get("format", "records")
+
+    if result_format == "records":
+        return data[:limit] if limit is not None else data
+    if result_format == "compact":
+        rows = data[:limit] if limit is not None else data
+        return [dict(zip(columns, row)) for row in rows]
+
+    # columnar
+    count = query_results["row_count"] if limit is None else min(limit, query_results["row_count"])
+    return [{col: data[j][i] for j, col in enumerate(columns)} for i in range(count)]
+
@@ -0,0 +1,256 @@
+"""
+Query Guard
+Bounds what a single query can cost before and while it runs.
+- Rejects joins the query plan says will multiply large tables (cross joins)
+- Caps the rows of SELECTs that have no LIMIT
+- Stops queries that run longer than the timeout
+Rejections come back as structured errors the agent can act on.
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+from contextlib import contextmanager
+import re
+import time
+
+try:
+    import sqlglot
+    HAS_SQLGLOT = True
+except ImportError:  # Optional dependency
+    HAS_SQLGLOT = False
+
+
+# Names after FROM/JOIN/commas: "FROM orders o, customers AS c" -> orders:o, customers:c
+TABLE_ALIAS = re.compile(
+    r"(?:\bFROM|\bJOIN|,)\s*([\w.]+)(?:\s+(?:AS\s+)?(?!(?:FROM|WHERE|JOIN|ON|USING|GROUP|ORDER|LIMIT|HAVING"
+    r"|UNION|INNER|LEFT|RIGHT|CROSS|FULL|OUTER|NATURAL)\b)(\w+))?",
+    re.IGNORECASE
+)
+
+# SQLite plan lines for full table scans ("SCAN o", "SCAN TABLE orders AS o")
+SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?")
+
+# Comments outside string literals (strings are matched first and kept)
+COMMENTS = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")|--[^\n]*|#[^\n]*|/\*.*?\*/", re.DOTALL)
+
+# LIMIT at the end of a statement: "LIMIT 5", "LIMIT 5, 10", "LIMIT 5 OFFSET 10"
+TRAILING_LIMIT = re.compile(r"\bLIMIT\s+\d+(\s*(,|OFFSET)\s*\d+)?\s*$", re.IGNORECASE)
+
+TIMEOUT_ERRORS = ("interrupted", "maximum statement execution time exceeded")
+
+
+def rejection(reason: str, message: str, **details) -> Dict[str, Any]:
+    """Structured error in DatabaseTools.execute_query's result format"""
+    return {
+        "success": False,
+        "error": message,
+        "error_type": "QueryTimeout" if reason == "timeout" else "QueryRejected",
+        "guard": {"reason": reason, **details}
+    }
+
+
+def strip_comments(sql_query: str) -> str:
+    """SQL without -- # and /* */ comments (string literals untouched)"""
+    return COMMENTS.sub(lambda m: m.group(1) or " ", sql_query)
+
+
+def has_outer_limit(sql_query: str) -> bool:
+    """
+    Whether the outermost query has a LIMIT.
+    A LIMIT inside a subquery or CTE doesn't bound the result, so sqlglot
+    reads the outer query when installed; otherwise only a LIMIT ending the
+    statement counts.
+    """
+    if HAS_SQLGLOT:
+        try:
+            return sqlglot.parse_one(sql_query).args.get("limit") is not None
+        except Exception:
+            pass
+    return bool(TRAILING_LIMIT.search(sql_query))
+
+
+class QueryGuard:
+    """Row cap, join cost limit and timeout for queries"""
+
+    def __init__(self, max_rows: int = 10000, timeout_seconds: float = 10.0,
+                 max_join_rows: int = 1000000):
+        """
+        Initialize guard.
+
+        Args:
+            max_rows: LIMIT added to SELECTs that have none (0 = no cap)
+            timeout_seconds: Stop queries running longer than this (0 = no timeout)
+            max_join_rows: Reject joins estimated to visit more row combinations than this
+        """
+        self.max_rows = max_rows
+        self.timeout_seconds = timeout_seconds
+        self.max_join_rows = max_join_rows
+
+        # table -> (data version, row count)
+        self.row_counts: Dict[str, Tuple[str, int]] = {}
+
+    def cap_rows(self, sql_query: str) -> Tuple[str, bool]:
+        """
+        Add a LIMIT to a SELECT that has none.
+        Asks for one row more than max_rows, so truncation can be detected.
+
+        Returns:
+            (SQL to run, whether the cap was added)
+        """
+        if not self.max_rows:
+            return sql_query, False
+
+        # Without comments, so "LIMIT 5 -- top five" and "SELECT ...; -- done" end where the SQL ends
+        sql_query = strip_comments(sql_query).strip().rstrip(";").rstrip()
+        if has_outer_limit(sql_query):
+            return sql_query, False
+
+        return f"{sql_query}\nLIMIT {self.max_rows + 1}", True
+
+    def check_cost(self, db_tools, sql_query: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
+        """
+        Estimate how many row combinations a join visits from its query plan.
+
+        Args:
+            db_tools: DatabaseTools the query will run on
+            sql_query: SQL statement
+            params: Bound parameters of the statement
+
+        Returns:
+            Rejection error, or None if the query may run
+        """
+        # Only statements naming two or more sources can join
+        if not self.max_join_rows or len({t.lower() for t, _ in TABLE_ALIAS.findall(sql_query)}) < 2:
+            return None
+
+        explained = db_tools.explain_query(sql_query, params)
+        if not explained["success"]:
+            return None  # Let the real execution report the error
+
+        if db_tools.db_type == 'sqlite':
+            scans = self._sqlite_scans(db_tools, sql_query, explained["plan"])
+        else:
+            scans = self._mysql_scans(explained["plan"])
+
+        for group in scans:
+            if len(group) < 2:
+                continue
+            estimated = 1
+            for _, rows in group:
+                estimated *= max(rows, 1)
+            if estimated > self.max_join_rows:
+                names = [table for table, _ in group]
+                return rejection(
+                    "cross_join",
+                    f"Query rejected: joining {' x '.join(names)} without a usable join condition "
+                    f"would visit ~{estimated:,} row combinations (limit {self.max_join_rows:,}). "
+                    f"{self._join_hint(db_tools, names)}",
+                    tables=names,
+                    estimated_rows=estimated,
+                    limit=self.max_join_rows
+                )
+        return None
+
+    def _sqlite_scans(self, db_tools, sql_query: str,
+                      plan: List[Dict[str, Any]]) -> List[List[Tuple[str, int]]]:
+        """Full table scans per plan level (scans on one level are nested loops)"""
+        if getattr(db_tools, "catalog", None) is not None:
+            tables = list(db_tools.catalog.tables())
+        else:
+            tables = db_tools.list_tables()
+        known = {t.lower(): t for t in tables}
+        aliases = {}
+        for table, alias in TABLE_ALIAS.findall(sql_query):
+            if table.lower() in known:
+                aliases[table.lower()] = known[table.lower()]
+                if alias:
+                    aliases[alias.lower()] = known[table.lower()]
+
+        levels: Dict[Any, List[Tuple[str, int]]] = {}
+        for row in plan:
+            match = SQLITE_SCAN.match(row.get("detail", ""))
+            if not match:
+                continue
+            table = aliases.get((match.group(2) or match.group(1)).lower()) or known.get(match.group(1).lower())
+            if table is None:
+                continue  # Subquery or CTE
+            levels.setdefault(row.get("parent"), []).append((table, self._row_count(db_tools, table)))
+        return list(levels.values())
+
+    @staticmethod
+    def _mysql_scans(plan: List[Dict[str, Any]]) -> List[List[Tuple[str, int]]]:
+        """Tables joined per SELECT with MySQL's row estimates"""
+        selects: Dict[Any, List[Tuple[str, int]]] = {}
+        for row in plan:
+            if row.get("table") and row.get("rows") is not None:
+                selects.setdefault(row.get("id"), []).append((row["table"], int(row["rows"])))
+        return list(selects.values())
+
+    def _row_count(self, db_tools, table: str) -> int:
+        """Row count of a table, from the stats catalog or recounted only when its data changed"""
+        if getattr(db_tools, "catalog", None) is not None:
+            try:
+                count = db_tools.catalog.row_count(table)
+            except Exception:
+                count = None
+            if count is not None:
+                return count
+
+        try:
+            version = db_tools.get_data_version([table])
+        except Exception:
+            version = None
+        cached = self.row_counts.get(table)
+        if cached is not None and version is not None and cached[0] == version:
+            return cached[1]
+        count = db_tools.get_table_count(table)
+        self.row_counts[table] = (version, count)
+        return count
+
+    @staticmethod
+    def _join_hint(db_tools, tables: List[str]) -> str:
+        """Suggest join columns the tables share (e.g. customer_id)"""
+        columns = []
+        for table in tables:
+            try:
+                columns.append({c["name"] for c in db_tools.get_table_schema(table)["columns"]})
+            except Exception:
+                return "Add a join condition (ON ...) or filters."
+        shared = sorted(set.intersection(*columns)) if columns else []
+        if shared:
+            return f"Join them ON their shared column: {', '.join(shared)}."
+        return "Add a join condition (ON ...) or filters."
+
+    def deadline(self) -> float:
+        """Monotonic time a query started now must finish by"""
+        return time.monotonic() + self.timeout_seconds
+
+    @contextmanager
+    def time_limit(self, connection, db_type: str, deadline: Optional[float] = None):
+        """
+        Stop the query if it runs past the timeout.
+
+        SQLite: a progress handler interrupts the statement at the deadline.
+        Pass the same deadline for execute and each fetch of one query.
+        MySQL: enforced by the server (max_execution_time is set per session).
+        """
+        if db_type != 'sqlite' or not self.timeout_seconds:
+            yield
+            return
+
+        deadline = deadline or self.deadline()
+        connection.set_progress_handler(lambda: time.monotonic() > deadline, 1000)
+        try:
+            yield
+        finally:
+            connection.set_progress_handler(None, 0)
+
+    def timeout_error(self, error: Exception) -> Optional[Dict[str, Any]]:
+        """Structured error if a database error means the timeout was hit"""
+        if not any(text in str(error).lower() for text in TIMEOUT_ERRORS):
+            return None
+        return rejection(
+            "timeout",
+            f"Query stopped after {self.timeout_seconds:g}s. "
+            "Add filters, aggregate, or avoid joining large tables without a condition.",
+            timeout_seconds=self.timeout_seconds
+        )
@@ -0,0 +1,53 @@
+"""
+Keyset Paging
+Opaque cursors for paging through a table by its key instead of OFFSET,
+so every page costs the same however deep it is.
+A cursor holds the table, a direction and the key of the row to continue from:
+- "after": rows with a larger key (next page)
+- "before": rows with a smaller key (previous page)
+- "offset": plain row offset, for tables without a usable key
+"""
+
+from typing import Dict, Any
+import base64
+import json
+
+
+DIRECTIONS = ("after", "before", "offset")
+
+
+def encode_cursor(table_name: str, direction: str, value: Any) -> str:
+    """URL-safe cursor for continuing a table from a key (or offset)"""
+    payload = json.dumps({"t": table_name, direction: value}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, table_name: str) -> Dict[str, Any]:
+    """
+    Read a cursor made by encode_cursor.
+
+    Returns:
+        {"direction": "after"|"before"|"offset", "value": key values or offset}
+
+    Raises:
+        ValueError: Malformed cursor or cursor of another table
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(payload, dict) or payload.get("t") != table_name:
+        raise ValueError(f"Cursor does not belong to table '{table_name}'")
+
+    for direction in DIRECTIONS:
+        if direction in payload:
+            value = payload[direction]
+            if direction == "offset" and not (isinstance(value, int) and value >= 0):
+                break
+            if direction != "offset" and not isinstance(value, list):
+                break
+            return {"direction": direction, "value": value}
+    raise ValueError("Invalid cursor")
+
@@ -0,0 +1,498 @@
+"""
+Connection Pools
+Hand out database connections so concurrent requests don't share one handle.
+- SQLite: one connection per thread (read-only by default), optionally
+  tuned for serving a snapshot that never changes (see SQLitePool)
+- MySQL: a pool of mysql.connector connections kept per checkout
+Both bound how many connections are checked out at once, wait up to a
+timeout for a free one, health-check idle connections and keep metrics.
+"""
+
+from typing import Dict, Any, Optional, Tuple, List
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import threading
+import sqlite3
+import time
+import os
+
+import mysql.connector
+from mysql.connector import Error
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the acquire timeout"""
+
+
+class ConnectionPool(ABC):
+    """Bounded checkout, acquire timeout and metrics shared by both pools"""
+
+    def __init__(self, size: int = 8, acquire_timeout: float = 5.0, health_check_seconds: float = 30.0):
+        """
+        Initialize pool.
+
+        Args:
+            size: Most connections checked out at once
+            acquire_timeout: Seconds to wait for a free connection before PoolTimeout
+            health_check_seconds: Check a connection idle longer than this before handing it out
+        """
+        self.size = max(1, int(size))
+        self.acquire_timeout = acquire_timeout
+        self.health_check_seconds = health_check_seconds
+        self.slots = threading.BoundedSemaphore(self.size)
+        self.lock = threading.Lock()
+
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.acquired = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self.created = 0
+        self.health_failures = 0
+
+    def _take_slot(self):
+        """Wait for a free slot, up to the acquire timeout"""
+        if self.slots.acquire(blocking=False):
+            waited = 0.0
+        else:
+            started = time.monotonic()
+            if not self.slots.acquire(timeout=self.acquire_timeout):
+                with self.lock:
+                    self.timeouts += 1
+                raise PoolTimeout(
+                    f"No database connection free after {self.acquire_timeout:g}s "
+                    f"({self.size} in use)"
+                )
+            waited = time.monotonic() - started
+
+        with self.lock:
+            self.acquired += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            if waited:
+                self.waited += 1
+                self.wait_seconds += waited
+
+    def _free_slot(self):
+        """Give a slot back"""
+        with self.lock:
+            self.in_use -= 1
+        self.slots.release()
+
+    @abstractmethod
+    def acquire(self):
+        """Check out a connection (give it back with release)"""
+
+    @abstractmethod
+    def release(self, connection):
+        """Return a connection checked out with acquire"""
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of a with block"""
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    @abstractmethod
+    def close(self):
+        """Close all connections"""
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics"""
+        return {
+            "size": self.size,
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "avg_wait_ms": round(self.wait_seconds / self.waited * 1000, 1) if self.waited else 0.0,
+            "timeouts": self.timeouts,
+            "connections_created": self.created,
+            "health_failures": self.health_failures
+        }
+
+
+class SQLitePool(ConnectionPool):
+    """
+    One SQLite connection per thread.
+
+    A thread keeps its connection between checkouts and gets the same one
+    back if it acquires again while holding it (nested calls don't use up
+    slots). Connections of finished threads are closed on the next acquire.
+
+    The serving profile tunes connections for a snapshot that is only read:
+    - immutable: open with immutable=1, so SQLite skips file locks and
+      change checks (the file must not change while served)
+    - mmap_mb / cache_mb: map the file into memory / bigger page cache
+    - temp_store_memory: sorts and temp tables in memory
+    - query_only: refuse writes on every connection
+    - in_memory: copy the whole file into a shared in-memory database at
+      startup (backup API) and serve every thread from that copy
+    """
+
+    def __init__(self, db_file: str, read_only: bool = True,
+                 serving: Optional[Dict[str, Any]] = None, **kwargs):
+        """
+        Initialize pool.
+
+        Args:
+            db_file: Path of the database file
+            read_only: Open connections with mode=ro (writes fail)
+            serving: Serving profile (database.serving in config.yaml)
+            **kwargs: size, acquire_timeout, health_check_seconds
+        """
+        super().__init__(**kwargs)
+        self.db_file = db_file
+        self.read_only = read_only
+        self.serving = serving or {}
+        self.local = threading.local()
+
+        # thread ident -> (thread, connection), to close them all on shutdown
+        self.connections: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+
+        # Shared in-memory copy, kept alive by holding one connection to it
+        self.memory_uri = None
+        self.memory_anchor = None
+        if self.serving.get('in_memory', False):
+            self._load_into_memory()
+
+        # Data can't change under an immutable file or an in-memory copy
+        self.static = bool(self.memory_uri) or (read_only and self.serving.get('immutable', False))
+
+    def _file_uri(self, immutable: bool = False) -> str:
+        """URI of the database file, read-only"""
+        path = os.path.abspath(self.db_file).replace("?", "%3f").replace("#", "%23")
+        return f"file:{path}?mode=ro" + ("&immutable=1" if immutable else "")
+
+    def _load_into_memory(self):
+        """Copy the database file into a shared in-memory database"""
+        if not os.path.exists(self.db_file):
+            raise FileNotFoundError(f"Database file not found: {self.db_file}")
+
+        self.memory_uri = f"file:sql_analyst_{id(self)}?mode=memory&cache=shared"
+        self.memory_anchor = sqlite3.connect(self.memory_uri, uri=True, check_same_thread=False)
+        source = sqlite3.connect(self._file_uri(self.serving.get('immutable', False)), uri=True)
+        try:
+            source.backup(self.memory_anchor)
+        finally:
+            source.close()
+        print(f">> Loaded {os.path.getsize(self.db_file) / (1024 * 1024):.1f} MB into memory")
+
+    def _open(self) -> sqlite3.Connection:
+        """New connection for the current thread"""
+        if self.memory_uri:
+            connection = sqlite3.connect(self.memory_uri, uri=True, check_same_thread=False)
+        elif self.read_only:
+            connection = sqlite3.connect(self._file_uri(self.serving.get('immutable', False)),
+                                         uri=True, check_same_thread=False)
+        else:
+            connection = sqlite3.connect(self.db_file, check_same_thread=False)
+        connection.row_factory = sqlite3.Row  # Enable column access by name
+        self._apply_serving(connection)
+
+        with self.lock:
+            self.created += 1
+            self.connections[threading.get_ident()] = (threading.current_thread(), connection)
+        return connection
+
+    def _apply_serving(self, connection: sqlite3.Connection):
+        """Per-connection PRAGMAs of the serving profile"""
+        serving = self.serving
+        if serving.get('mmap_mb') and not self.memory_uri:
+            connection.execute(f"PRAGMA mmap_size = {int(serving['mmap_mb'] * 1024 * 1024)}")
+        if serving.get('cache_mb'):
+            # Negative cache_size is in KiB
+            connection.execute(f"PRAGMA cache_size = {-int(serving['cache_mb'] * 1024)}")
+        if serving.get('temp_store_memory', False):
+            connection.execute("PRAGMA temp_store = MEMORY")
+        if serving.get('query_only', False) or self.memory_uri:
+            connection.execute("PRAGMA query_only = ON")
+
+    def _healthy(self, connection: sqlite3.Connection) -> bool:
+        """Run a trivial statement on the connection"""
+        try:
+            connection.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _close_finished(self):
+        """Close connections whose threads have ended"""
+        with self.lock:
+            finished = [ident for ident, (thread, _) in self.connections.items() if not thread.is_alive()]
+            closing = [self.connections.pop(ident)[1] for ident in finished]
+        for connection in closing:
+            try:
+                connection.close()
+            except sqlite3.Error:
+                pass
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check out this thread's connection"""
+        depth = getattr(self.local, "depth", 0)
+        if depth:
+            self.local.depth = depth + 1
+            return self.local.connection
+
+        self._take_slot()
+        try:
+            self._close_finished()
+            connection = getattr(self.local, "connection", None)
+            if connection is not None and time.monotonic() - self.local.checked > self.health_check_seconds:
+                if not self._healthy(connection):
+                    with self.lock:
+                        self.health_failures += 1
+                        self.connections.pop(threading.get_ident(), None)
+                    try:
+                        connection.close()
+                    except sqlite3.Error:
+                        pass
+                    connection = None
+            if connection is None:
+                connection = self._open()
+            self.local.connection = connection
+        except Exception:
+            self._free_slot()
+            raise
+
+        self.local.checked = time.monotonic()
+        self.local.depth = 1
+        return connection
+
+    def release(self, connection: sqlite3.Connection):
+        """Give the slot back (the thread keeps its connection)"""
+        self.local.depth -= 1
+        if self.local.depth:
+            return
+        self.local.checked = time.monotonic()
+        self._free_slot()
+
+    def close(self):
+        """Close every thread's connection"""
+        with self.lock:
+            closing = [connection for _, connection in self.connections.values()]
+            self.connections = {}
+        for connection in closing:
+            try:
+                connection.close()
+            except sqlite3.Error:
+                pass
+        self.local = threading.local()
+
+        if self.memory_anchor is not None:
+            self.memory_anchor.close()
+            self.memory_anchor = None
+            self.memory_uri = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics"""
+        stats = super().get_stats()
+        stats["open_connections"] = len(self.connections)
+        stats["read_only"] = self.read_only
+        stats["in_memory"] = bool(self.memory_uri)
+        stats["immutable"] = bool(self.serving.get('immutable', False))
+        return stats
+
+
+class MySQLPool(ConnectionPool):
+    """
+    Pool of mysql.connector connections.
+
+    Idle connections are reused most recently used first and pinged when
+    they sat idle longer than the health check interval. A thread that
+    acquires again while holding a connection gets the same one back
+    (nested calls don't use up slots), unless a stream on it still has
+    unread rows, which MySQL won't interleave with another statement.
+    Session settings go into
+    init_command, so they are reapplied whenever a connection reconnects.
+    """
+
+    def __init__(self, connect_args: Dict[str, Any], session_settings: Tuple[str, ...] = (), **kwargs):
+        """
+        Initialize pool.
+
+        Args:
+            connect_args: Arguments for mysql.connector.connect
+            session_settings: "name = value" assignments for every session
+                (ones the server rejects are left out)
+            **kwargs: size, acquire_timeout, health_check_seconds
+        """
+        super().__init__(**kwargs)
+        self.connect_args = dict(connect_args)
+
+        settings = self._supported(session_settings)
+        if settings:
+            self.connect_args["init_command"] = "SET " + ", ".join(f"SESSION {s}" for s in settings)
+
+        # (connection, last used) of connections not checked out, most recent last
+        self.idle: List[Tuple[Any, float]] = []
+        # thread ident -> stack of [connection, nesting depth] checked out by that thread
+        self.held: Dict[int, List[List[Any]]] = {}
+        self.closed = False
+
+    def _supported(self, settings: Tuple[str, ...]) -> Tuple[str, ...]:
+        """Settings this server accepts (e.g. MySQL 5.7 lacks information_schema_stats_expiry)"""
+        if not settings:
+            return ()
+        connection = mysql.connector.connect(**self.connect_args)
+        supported = []
+        try:
+            cursor = connection.cursor()
+            for setting in settings:
+                try:
+                    cursor.execute(f"SET SESSION {setting}")
+                    supported.append(setting)
+                except Error:
+                    pass
+            cursor.close()
+        finally:
+            connection.close()
+        return tuple(supported)
+
+    def _open(self):
+        """New connection with the session settings"""
+        connection = mysql.connector.connect(**self.connect_args)
+        with self.lock:
+            self.created += 1
+        return connection
+
+    @staticmethod
+    def _discard(connection):
+        """Close a connection, ignoring errors from one that is already gone"""
+        try:
+            connection.close()
+        except Error:
+            pass
+
+    def _checked_out(self):
+        """An idle connection that still answers, or a new one"""
+        with self.lock:
+            entry = self.idle.pop() if self.idle else None
+        if entry is None:
+            return self._open()
+
+        connection, last_used = entry
+        if time.monotonic() - last_used > self.health_check_seconds:
+            # The server may have closed it while it sat idle
+            try:
+                connection.ping(reconnect=True, attempts=1)
+            except Error:
+                with self.lock:
+                    self.health_failures += 1
+                self._discard(connection)
+                return self._open()
+        return connection
+
+    def acquire(self):
+        """Check out a connection (the same one again for nested calls on a thread)"""
+        ident = threading.get_ident()
+        with self.lock:
+            stack = self.held.get(ident)
+            if stack and not getattr(stack[-1][0], "unread_result", False):
+                stack[-1][1] += 1
+                return stack[-1][0]
+
+        self._take_slot()
+        try:
+            connection = self._checked_out()
+        except Exception:
+            self._free_slot()
+            raise
+
+        with self.lock:
+            self.held.setdefault(ident, []).append([connection, 1])
+        return connection
+
+    def _held_entry(self, connection) -> Tuple[Optional[int], Optional[List[Any]]]:
+        """Thread and checkout entry of a connection (call with the lock held)"""
+        # Usually the current thread's, but a stream may be finished on another thread
+        current = threading.get_ident()
+        for ident in [current] + [i for i in self.held if i != current]:
+            for entry in self.held.get(ident, []):
+                if entry[0] is connection:
+                    return ident, entry
+        return None, None
+
+    def release(self, connection):
+        """Give the connection back once its outermost checkout ends"""
+        with self.lock:
+            ident, entry = self._held_entry(connection)
+            if entry is None:
+                return
+            entry[1] -= 1
+            if entry[1]:
+                return
+            remaining = [e for e in self.held[ident] if e is not entry]
+            if remaining:
+                self.held[ident] = remaining
+            else:
+                del self.held[ident]
+
+        try:
+            # Don't carry a read snapshot (REPEATABLE READ) into the next checkout
+            if connection.in_transaction:
+                connection.rollback()
+            keep = not self.closed
+        except Error:
+            with self.lock:
+                self.health_failures += 1
+            keep = False
+
+        if keep:
+            with self.lock:
+                self.idle.append((connection, time.monotonic()))
+        else:
+            self._discard(connection)
+        self._free_slot()
+
+    def close(self):
+        """Close idle connections (checked out ones close when released)"""
+        with self.lock:
+            self.closed = True
+            closing = [connection for connection, _ in self.idle]
+            self.idle = []
+        for connection in closing:
+            self._discard(connection)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics"""
+        stats = super().get_stats()
+        stats["idle_connections"] = len(self.idle)
+        return stats
+
+
+def create_pool(config: Dict[str, Any], session_settings: Tuple[str, ...] = ()) -> ConnectionPool:
+    """
+    Build the pool for a database config section.
+
+    Args:
+        config: database section of config.yaml (pool settings under "pool")
+        session_settings: MySQL session assignments for every connection
+    """
+    pool_config = config.get('pool', {})
+    options = {
+        "size": pool_config.get('size', 8),
+        "acquire_timeout": pool_config.get('acquire_timeout_seconds', 5),
+        "health_check_seconds": pool_config.get('health_check_seconds', 30)
+    }
+
+    if config.get('type', 'mysql') == 'sqlite':
+        return SQLitePool(
+            config.get('database', 'retail_analytics.db'),
+            read_only=pool_config.get('read_only', True),
+            serving=config.get('serving', {}),
+            **options
+        )
+
+    connect_args = {
+        "host": config['host'],
+        "user": config['user'],
+        "password": config['password'],
+        "database": config['database'],
+        "port": config.get('port', 3306)
+    }
+    return MySQLPool(connect_args, session_settings, **options)
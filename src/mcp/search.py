@@ -0,0 +1,284 @@
+"""
+Search Index
+Full-text search over the text columns of each table, for the data viewer.
+- SQLite: FTS5 tables in a separate index database (the served database
+  stays read-only), rebuilt when the data version changes
+- MySQL: FULLTEXT indexes, kept in sync by the server
+Searches bind the term as a parameter and return row keys best match first
+(SQLite: the first rank_limit matches found, ranked among themselves).
+Tables that can't be indexed return None, callers fall back to LIKE.
+"""
+
+from typing import Dict, Any, List, Optional
+import threading
+import sqlite3
+import json
+import time
+import re
+
+
+def text_columns(schema: Dict[str, Any]) -> List[str]:
+    """Columns of a table schema that hold text"""
+    return [col["name"] for col in schema["columns"]
+            if "char" in col["type"].lower() or "text" in col["type"].lower()]
+
+
+def match_terms(search: str) -> List[str]:
+    """Words of a search box entry (punctuation and FTS operators dropped)"""
+    return re.findall(r"\w+", search.lower())
+
+
+class SearchIndex:
+    """Ranked full-text search of table rows by key"""
+
+    def __init__(self, db_tools, index_path: str = "", check_seconds: float = 30.0,
+                 rank_limit: int = 1000, mysql_create_index: bool = False):
+        """
+        Initialize search index.
+
+        Args:
+            db_tools: DatabaseTools whose tables are searched
+            index_path: SQLite: file for the FTS5 index ("" = in memory, rebuilt at startup)
+            check_seconds: Look for data changes at most this often
+            rank_limit: SQLite: rank only the first this many matches found, in index
+                order (short, common prefixes match most rows and ranking them all
+                is a scan); pages and counts stop there too (0 = rank every match)
+            mysql_create_index: MySQL: add missing FULLTEXT indexes (needs ALTER privilege)
+        """
+        self.db = db_tools
+        self.check_seconds = check_seconds
+        self.rank_limit = rank_limit
+        # Most matches a search can page through, None = all of them
+        self.rank_cap = rank_limit if db_tools.db_type == 'sqlite' and rank_limit > 0 else None
+        self.mysql_create_index = mysql_create_index
+        self.lock = threading.Lock()
+
+        # table -> {"columns", "key", "version", "checked_at"} for indexed tables,
+        # None for tables that can't be indexed
+        self.tables: Dict[str, Optional[Dict[str, Any]]] = {}
+
+        self.index = None
+        if db_tools.db_type == 'sqlite':
+            self.index = sqlite3.connect(index_path or ":memory:", check_same_thread=False)
+            self.index.execute(
+                "CREATE TABLE IF NOT EXISTS search_meta "
+                "(table_name TEXT PRIMARY KEY, data_version TEXT, columns TEXT)"
+            )
+            self.index.commit()
+
+        self.searches = 0
+        self.rebuilds = 0
+
+    def search(self, table_name: str, search: str, offset: int, limit: int) -> Optional[List[List[Any]]]:
+        """
+        Keys of the rows matching every word of search (as prefixes), best first.
+        With rank_cap only the first rank_cap matches are ranked, so a better
+        match past them is not returned.
+
+        Args:
+            table_name: Table to search
+            search: Text typed by the user
+            offset: Matches to skip
+            limit: Most keys to return
+
+        Returns:
+            List of keys (each a list of key column values), or None if the
+            table has no index (use a LIKE scan instead)
+        """
+        terms = match_terms(search)
+        entry = self._prepare(table_name)
+        if entry is None or not terms:
+            return None
+        self.searches += 1
+
+        if self.index is not None:
+            # Each word as a quoted prefix: "ann"* "smi"*
+            query = " ".join(f'"{term}"*' for term in terms)
+            fts = self._fts_name(table_name)
+            # The first rank_cap matches in index order, not the best rank_cap ones;
+            # pages beyond them would be in match order, not rank order
+            candidates = self.rank_cap or -1
+            with self.lock:
+                rows = self.index.execute(
+                    f'SELECT key FROM (SELECT key, rank FROM "{fts}" WHERE "{fts}" MATCH ? LIMIT ?) '
+                    f'ORDER BY rank LIMIT ? OFFSET ?',
+                    (query, candidates, limit, offset)
+                ).fetchall()
+            return [json.loads(key) for key, in rows]
+
+        # MySQL boolean mode: every word required, as a prefix
+        match = self._mysql_match(entry)
+        keys = ", ".join(self.db.quote_identifier(k) for k in entry["key"])
+        rows = self.db.fetch_rows(
+            f"SELECT {keys} FROM {self.db.quote_identifier(table_name)} WHERE {match} "
+            f"ORDER BY {match} DESC LIMIT {int(limit)} OFFSET {int(offset)}",
+            (self._mysql_terms(terms), self._mysql_terms(terms))
+        )
+        return [list(row) for row in rows]
+
+    def count(self, table_name: str, search: str) -> Optional[int]:
+        """
+        Number of rows matching search, or None if the table has no index.
+        On SQLite counting stops at rank_cap + 1 (any more can't be paged to).
+        """
+        terms = match_terms(search)
+        entry = self._prepare(table_name)
+        if entry is None or not terms:
+            return None
+
+        if self.index is not None:
+            query = " ".join(f'"{term}"*' for term in terms)
+            fts = self._fts_name(table_name)
+            candidates = self.rank_cap + 1 if self.rank_cap else -1
+            with self.lock:
+                return self.index.execute(
+                    f'SELECT COUNT(*) FROM (SELECT 1 FROM "{fts}" WHERE "{fts}" MATCH ? LIMIT ?)',
+                    (query, candidates)
+                ).fetchone()[0]
+
+        return self.db.fetch_rows(
+            f"SELECT COUNT(*) FROM {self.db.quote_identifier(table_name)} WHERE {self._mysql_match(entry)}",
+            (self._mysql_terms(terms),)
+        )[0][0]
+
+    def _prepare(self, table_name: str) -> Optional[Dict[str, Any]]:
+        """Index entry of a table, building or rebuilding the index if needed"""
+        if table_name in self.tables and self.tables[table_name] is None:
+            return None
+
+        entry = self.tables.get(table_name)
+        now = time.monotonic()
+        if entry is not None and now - entry["checked_at"] < self.check_seconds:
+            return entry
+
+        try:
+            if self.index is not None:
+                entry = self._prepare_sqlite(table_name, entry)
+            else:
+                entry = self._prepare_mysql(table_name)
+        except Exception as e:
+            print(f">> Search index unavailable for {table_name}: {e}")
+            entry = None
+
+        if entry is not None:
+            entry["checked_at"] = now
+        self.tables[table_name] = entry
+        return entry
+
+    def _key_columns(self, table_name: str, schema: Dict[str, Any]) -> List[str]:
+        """Primary key columns, or rowid for SQLite tables without one"""
+        key = [col["name"] for col in schema["columns"] if col["key"] == "PRI"]
+        if not key and self.db.db_type == 'sqlite':
+            key = ["rowid"]
+        return key
+
+    @staticmethod
+    def _fts_name(table_name: str) -> str:
+        return f"fts_{table_name}"
+
+    def _prepare_sqlite(self, table_name: str, entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """FTS5 index of a table, rebuilt when the data version changed"""
+        version = self.db.get_data_version([table_name])
+        if entry is not None and entry["version"] == version:
+            return entry
+
+        schema = self.db.get_table_schema(table_name)
+        columns = text_columns(schema)
+        key = self._key_columns(table_name, schema)
+        if not columns:
+            return None
+
+        with self.lock:
+            # An index file from an earlier run (or another thread) may already be current
+            stored = self.index.execute(
+                "SELECT data_version, columns FROM search_meta WHERE table_name = ?", (table_name,)
+            ).fetchone()
+            if stored is None or stored[0] != version or stored[1] != json.dumps(columns):
+                self._rebuild_sqlite(table_name, columns, key, version)
+
+        return {"columns": columns, "key": key, "version": version}
+
+    def _rebuild_sqlite(self, table_name: str, columns: List[str], key: List[str], version: str):
+        """Copy the text columns of a table into a fresh FTS5 table (call with the lock held)"""
+        started = time.perf_counter()
+        fts = self._fts_name(table_name)
+        quoted = ", ".join(f'"{c}"' for c in columns)
+        keys = ", ".join(self.db.quote_identifier(k) if k != "rowid" else "rowid" for k in key)
+
+        # Build next to the live table, then swap, so an index file is never half built
+        building = self.index.cursor()
+        building.execute(f'DROP TABLE IF EXISTS "{fts}_new"')
+        building.execute(f'CREATE VIRTUAL TABLE "{fts}_new" USING fts5(key UNINDEXED, {quoted})')
+        placeholders = ", ".join(["?"] * (len(columns) + 1))
+        rows = 0
+        for batch in self.db.iter_rows(
+            f"SELECT {keys}, {', '.join(self.db.quote_identifier(c) for c in columns)} "
+            f"FROM {self.db.quote_identifier(table_name)}"
+        ):
+            building.executemany(
+                f'INSERT INTO "{fts}_new" VALUES ({placeholders})',
+                [(json.dumps(list(row[:len(key)]), default=str),) + row[len(key):] for row in batch]
+            )
+            rows += len(batch)
+        building.execute(f'DROP TABLE IF EXISTS "{fts}"')
+        building.execute(f'ALTER TABLE "{fts}_new" RENAME TO "{fts}"')
+        building.execute(
+            "INSERT OR REPLACE INTO search_meta (table_name, data_version, columns) VALUES (?, ?, ?)",
+            (table_name, version, json.dumps(columns))
+        )
+        self.index.commit()
+        building.close()
+
+        self.rebuilds += 1
+        print(f">> Search index for {table_name}: {rows} rows in {time.perf_counter() - started:.2f}s")
+
+    def _prepare_mysql(self, table_name: str) -> Optional[Dict[str, Any]]:
+        """FULLTEXT index covering the text columns of a table"""
+        schema = self.db.get_table_schema(table_name)
+        columns = text_columns(schema)
+        key = self._key_columns(table_name, schema)
+        if not columns or not key:
+            return None
+
+        indexed = self.db.fetch_rows(
+            "SELECT INDEX_NAME, GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX) FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_TYPE = 'FULLTEXT' GROUP BY INDEX_NAME",
+            (table_name,)
+        )
+        # MATCH() must name exactly the columns of one FULLTEXT index
+        for _, names in indexed:
+            if sorted(names.split(",")) == sorted(columns):
+                return {"columns": names.split(","), "key": key, "version": None}
+
+        if not self.mysql_create_index:
+            return None
+        quoted = ", ".join(self.db.quote_identifier(c) for c in columns)
+        self.db.fetch_rows(
+            f"ALTER TABLE {self.db.quote_identifier(table_name)} ADD FULLTEXT INDEX ft_search ({quoted})"
+        )
+        print(f">> Created FULLTEXT index on {table_name} ({', '.join(columns)})")
+        return {"columns": columns, "key": key, "version": None}
+
+    def _mysql_match(self, entry: Dict[str, Any]) -> str:
+        """MATCH ... AGAINST expression with one bound parameter"""
+        columns = ", ".join(self.db.quote_identifier(c) for c in entry["columns"])
+        return f"MATCH({columns}) AGAINST (%s IN BOOLEAN MODE)"
+
+    @staticmethod
+    def _mysql_terms(terms: List[str]) -> str:
+        """Boolean-mode query: every word required, as a prefix (+ann* +smi*)"""
+        return " ".join(f"+{term}*" for term in terms)
+
+    def close(self):
+        """Close the SQLite index"""
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get search index statistics"""
+        return {
+            "indexed_tables": sorted(t for t, entry in self.tables.items() if entry is not None),
+            "searches": self.searches,
+            "rebuilds": self.rebuilds
+        }
@@ -6,156 +6,587 @@ Provides functions to interact with both MySQL and SQLite databases.
 import mysql.connector
 from mysql.connector import Error
 import sqlite3
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from contextlib import contextmanager, nullcontext
 import json
+import zlib
 import os
 
+from ..cache.result_cache import ResultCache, is_read_only, is_write, referenced_tables
+from .guard import QueryGuard, strip_comments
+from .formats import format_rows
+from .pool import create_pool
+from .catalog import StatsCatalog
+from .paging import encode_cursor, decode_cursor
+from .search import SearchIndex, text_columns
+
 
 class DatabaseTools:
     """Tools for database operations - supports both MySQL and SQLite"""
     
-    def __init__(self, config: Dict[str, Any]):
-        """Initialize database connection"""
+    def __init__(self, config: Dict[str, Any], store=None):
+        """
+        Initialize database connection pool.
+        
+        Args:
+            config: database section of config.yaml
+            store: Optional SchemaStore that keeps the stats catalog across
+                workers and restarts
+        """
         self.config = config
-        self.connection = None
+        self.pool = None
         self.db_type = config.get('type', 'mysql')
+        self.static_version: Optional[str] = None
+        
+        # Cache results of read-only queries until the data changes
+        cache_config = config.get('result_cache', {})
+        self.result_cache = ResultCache(
+            max_bytes=int(cache_config.get('max_mb', 16) * 1024 * 1024)
+        ) if cache_config.get('enabled', True) else None
+        
+        # Bound rows, join size and runtime of each query
+        guard_config = config.get('guard', {})
+        self.guard = QueryGuard(
+            max_rows=guard_config.get('max_rows', 10000),
+            timeout_seconds=guard_config.get('timeout_seconds', 10),
+            max_join_rows=guard_config.get('max_join_rows', 1000000)
+        ) if guard_config.get('enabled', True) else None
+        
+        # Row counts and sizes for listing tables without scanning them
+        stats_config = config.get('stats', {})
+        self.catalog = StatsCatalog(
+            self,
+            check_seconds=stats_config.get('check_seconds', 30),
+            sample_rows=stats_config.get('sample_rows', 10000),
+            store=store
+        ) if stats_config.get('enabled', True) else None
+        
         self._connect()
+        
+        # Full-text index for searching table data (needs the pool for MySQL checks)
+        search_config = config.get('search', {})
+        self.search_index = SearchIndex(
+            self,
+            index_path=search_config.get('index_path', ''),
+            check_seconds=search_config.get('check_seconds', 30),
+            rank_limit=search_config.get('rank_limit', 1000),
+            mysql_create_index=search_config.get('mysql_create_index', False)
+        ) if search_config.get('enabled', True) else None
     
     def _connect(self):
-        """Establish database connection (MySQL or SQLite)"""
+        """Create the connection pool (MySQL or SQLite)"""
         try:
+            session_settings = ()
+            if self.db_type != 'sqlite':
+                # MySQL 8 caches information_schema UPDATE_TIME for a day by default,
+                # which would hide data changes from get_data_version()
+                session_settings = ("information_schema_stats_expiry = 0",)
+                if self.guard is not None and self.guard.timeout_seconds:
+                    session_settings += (f"max_execution_time = {int(self.guard.timeout_seconds * 1000)}",)
+            
+            self.pool = create_pool(self.config, session_settings)
             if self.db_type == 'sqlite':
-                # SQLite connection
-                db_file = self.config.get('database', 'retail_analytics.db')
-                self.connection = sqlite3.connect(db_file, check_same_thread=False)
-                self.connection.row_factory = sqlite3.Row  # Enable column access by name
-                print(f">> Connected to SQLite database: {db_file}")
+                # A snapshot never changes while served, but may differ from the last run's
+                self.static_version = "static:" + self._file_stamps() if self.pool.static else None
+                mode = "in-memory copy" if self.pool.memory_uri else \
+                    "immutable" if self.pool.static else "read-only" if self.pool.read_only else "read-write"
+                print(f">> Connected to SQLite database: {self.pool.db_file} (pool of {self.pool.size}, {mode})")
             else:
-                # MySQL connection
-                self.connection = mysql.connector.connect(
-                    host=self.config['host'],
-                    user=self.config['user'],
-                    password=self.config['password'],
-                    database=self.config['database'],
-                    port=self.config.get('port', 3306)
-                )
-                print(f">> Connected to MySQL database: {self.config['database']}")
+                print(f">> Connected to MySQL database: {self.config['database']} (pool of {self.pool.size})")
         except Exception as e:
             print(f"Error connecting to database: {e}")
             raise
     
     def _ensure_connection(self):
-        """Make sure connection is alive"""
-        if self.db_type == 'sqlite':
-            if self.connection is None:
-                self._connect()
-        else:
-            if self.connection is None or not self.connection.is_connected():
-                self._connect()
+        """Make sure the pool exists (connections are health-checked on checkout)"""
+        if self.pool is None:
+            self._connect()
+    
+    @contextmanager
+    def _connection(self):
+        """Check out a pooled connection for one operation"""
+        self._ensure_connection()
+        with self.pool.connection() as connection:
+            yield connection
     
     def list_tables(self) -> List[str]:
         """Get list of all tables in the database."""
-        self._ensure_connection()
-        cursor = self.connection.cursor()
-        
-        try:
-            if self.db_type == 'sqlite':
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            else:
-                cursor.execute("SHOW TABLES")
+        with self._connection() as connection:
+            cursor = connection.cursor()
             
-            tables = [table[0] for table in cursor.fetchall()]
-            cursor.close()
-            return tables
-        except Exception as e:
-            cursor.close()
-            raise Exception(f"Error listing tables: {e}")
+            try:
+                if self.db_type == 'sqlite':
+                    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
+                else:
+                    cursor.execute("SHOW TABLES")
+                
+                tables = [table[0] for table in cursor.fetchall()]
+                cursor.close()
+                return tables
+            except Exception as e:
+                cursor.close()
+                raise Exception(f"Error listing tables: {e}")
+    
+    def fetch_rows(self, sql_query: str, params: tuple = ()) -> List[tuple]:
+        """
+        Run an internal metadata query and return all rows as tuples.
+        Skips the guard and the result cache, only for trusted SQL.
+        """
+        with self._connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(sql_query, params)
+                if cursor.description is None:
+                    return []  # DDL and other statements without rows
+                return [tuple(row) for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+    
+    def iter_rows(self, sql_query: str, params: tuple = (),
+                  batch_size: Optional[int] = None) -> Iterator[List[tuple]]:
+        """
+        Run an internal bulk read (e.g. building the search index) and yield
+        row tuples in batches. Like fetch_rows, no guard, cache or row cap.
+        """
+        batch_size = batch_size or self.config.get('fetch_batch_size', 500)
+        with self._connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(sql_query, params)
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        return
+                    yield [tuple(row) for row in batch]
+            finally:
+                cursor.close()
     
     def get_table_schema(self, table_name: str) -> Dict[str, Any]:
         """Get schema information for a specific table."""
-        self._ensure_connection()
-        cursor = self.connection.cursor()
-        
-        try:
-            schema = {
-                "table_name": table_name,
-                "columns": []
-            }
+        with self._connection() as connection:
+            cursor = connection.cursor()
             
-            if self.db_type == 'sqlite':
-                cursor.execute(f"PRAGMA table_info({table_name})")
-                columns = cursor.fetchall()
+            try:
+                schema = {
+                    "table_name": table_name,
+                    "columns": [],
+                    "foreign_keys": []
+                }
                 
-                for col in columns:
-                    schema["columns"].append({
-                        "name": col[1],
-                        "type": col[2],
-                        "nullable": not col[3],
-                        "key": "PRI" if col[5] else "",
-                        "default": col[4],
-                        "extra": ""
-                    })
-            else:
-                # MySQL
-                cursor.execute(f"DESCRIBE {table_name}")
-                columns = cursor.fetchall()
+                if self.db_type == 'sqlite':
+                    cursor.execute(f"PRAGMA table_info({table_name})")
+                    columns = cursor.fetchall()
+                    
+                    for col in columns:
+                        schema["columns"].append({
+                            "name": col[1],
+                            "type": col[2],
+                            "nullable": not col[3],
+                            "key": "PRI" if col[5] else "",
+                            "default": col[4],
+                            "extra": ""
+                        })
+                    
+                    cursor.execute(f"PRAGMA foreign_key_list({table_name})")
+                    for fk in cursor.fetchall():
+                        schema["foreign_keys"].append({
+                            "column": fk[3],
+                            "references_table": fk[2],
+                            "references_column": fk[4]
+                        })
+                else:
+                    # MySQL
+                    cursor.execute(f"DESCRIBE {table_name}")
+                    columns = cursor.fetchall()
+                    
+                    for col in columns:
+                        schema["columns"].append({
+                            "name": col[0],
+                            "type": col[1].decode() if isinstance(col[1], bytes) else col[1],
+                            "nullable": col[2] == "YES",
+                            "key": col[3],
+                            "default": col[4],
+                            "extra": col[5]
+                        })
+                    
+                    cursor.execute(
+                        "SELECT COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME "
+                        "FROM information_schema.KEY_COLUMN_USAGE WHERE TABLE_SCHEMA = DATABASE() "
+                        "AND TABLE_NAME = %s AND REFERENCED_TABLE_NAME IS NOT NULL ORDER BY ORDINAL_POSITION",
+                        (table_name,)
+                    )
+                    for fk in cursor.fetchall():
+                        schema["foreign_keys"].append({
+                            "column": fk[0],
+                            "references_table": fk[1],
+                            "references_column": fk[2]
+                        })
                 
-                for col in columns:
-                    schema["columns"].append({
-                        "name": col[0],
-                        "type": col[1].decode() if isinstance(col[1], bytes) else col[1],
-                        "nullable": col[2] == "YES",
-                        "key": col[3],
-                        "default": col[4],
-                        "extra": col[5]
-                    })
-            
-            cursor.close()
-            return schema
-            
+                cursor.close()
+                return schema
+                
+            except Exception as e:
+                cursor.close()
+                raise Exception(f"Error getting schema for {table_name}: {e}")
+    
+    def get_all_schemas(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the schema of every table in one catalog query.
+        Same shape per table as get_table_schema.
+        
+        SQLite: pragma_table_info and pragma_foreign_key_list over sqlite_master.
+        MySQL: information_schema.COLUMNS and KEY_COLUMN_USAGE.
+        """
+        if self.db_type == 'sqlite':
+            # Columns and foreign keys as one result: kind, position, then the details
+            rows = self.fetch_rows(
+                "SELECT m.name, 'column', p.cid, p.name, p.type, p.\"notnull\", p.dflt_value, p.pk "
+                "FROM sqlite_master AS m JOIN pragma_table_info(m.name) AS p "
+                "WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%' "
+                "UNION ALL "
+                "SELECT m.name, 'foreign_key', f.id * 1000 + f.seq, f.\"from\", f.\"table\", f.\"to\", NULL, NULL "
+                "FROM sqlite_master AS m JOIN pragma_foreign_key_list(m.name) AS f "
+                "WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%' "
+                "ORDER BY 1, 2, 3"
+            )
+        else:
+            rows = self.fetch_rows(
+                "SELECT TABLE_NAME, 'column', ORDINAL_POSITION, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, "
+                "COLUMN_DEFAULT, COLUMN_KEY, EXTRA FROM information_schema.COLUMNS "
+                "WHERE TABLE_SCHEMA = DATABASE() "
+                "UNION ALL "
+                "SELECT TABLE_NAME, 'foreign_key', ORDINAL_POSITION, COLUMN_NAME, REFERENCED_TABLE_NAME, "
+                "REFERENCED_COLUMN_NAME, NULL, NULL, NULL FROM information_schema.KEY_COLUMN_USAGE "
+                "WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME IS NOT NULL "
+                "ORDER BY 1, 2, 3"
+            )
+        
+        schemas: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            row = [v.decode() if isinstance(v, (bytes, bytearray)) else v for v in row]
+            table_name, kind = row[0], row[1]
+            schema = schemas.setdefault(table_name, {"table_name": table_name, "columns": [], "foreign_keys": []})
+            if kind == "foreign_key":
+                schema["foreign_keys"].append({
+                    "column": row[3],
+                    "references_table": row[4],
+                    "references_column": row[5]
+                })
+            elif self.db_type == 'sqlite':
+                schema["columns"].append({
+                    "name": row[3],
+                    "type": row[4],
+                    "nullable": not row[5],
+                    "key": "PRI" if row[7] else "",
+                    "default": row[6],
+                    "extra": ""
+                })
+            else:
+                schema["columns"].append({
+                    "name": row[3],
+                    "type": row[4],
+                    "nullable": row[5] == "YES",
+                    "key": row[7],
+                    "default": row[6],
+                    "extra": row[8]
+                })
+        return schemas
+    
+    def get_data_version(self, tables: Optional[List[str]] = None) -> str:
+        """
+        Get a cheap token that changes whenever the data changes.
+        
+        SQLite: mtime/size of the database file and its WAL (whole database).
+        PRAGMA data_version isn't used, its counter is per connection and
+        every pooled thread has its own. A snapshot served immutable or from
+        memory never changes.
+        MySQL: UPDATE_TIME of the given tables from information_schema.
+        """
+        if self.db_type == 'sqlite':
+            self._ensure_connection()
+            if self.pool.static:
+                return self.static_version
+            return self._file_stamps()
+        
+        with self._connection() as connection:
+            cursor = connection.cursor()
+            try:
+                query = ("SELECT TABLE_NAME, UPDATE_TIME FROM information_schema.TABLES "
+                         "WHERE TABLE_SCHEMA = DATABASE()")
+                params = ()
+                if tables:
+                    query += " AND TABLE_NAME IN (" + ", ".join(["%s"] * len(tables)) + ")"
+                    params = tuple(tables)
+                cursor.execute(query, params)
+                rows = sorted(cursor.fetchall())
+                return ";".join(f"{name}={updated}" for name, updated in rows)
+            finally:
+                cursor.close()
+    
+    def _file_stamps(self) -> str:
+        """mtime and size of the SQLite database file and its WAL"""
+        db_file = self.config.get('database', 'retail_analytics.db')
+        stamps = []
+        for path in (db_file, db_file + "-wal"):
+            if os.path.exists(path):
+                stat = os.stat(path)
+                stamps.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+        return ";".join(stamps)
+    
+    @property
+    def identity(self) -> str:
+        """Names the database across processes (keys shared caches)"""
+        if self.db_type == 'sqlite':
+            return "sqlite:" + os.path.abspath(self.config.get('database', 'retail_analytics.db'))
+        return (f"mysql:{self.config.get('host', 'localhost')}:{self.config.get('port', 3306)}"
+                f"/{self.config.get('database', '')}")
+    
+    def get_schema_version(self) -> str:
+        """
+        Get a cheap token that changes whenever tables or columns change.
+        
+        SQLite: PRAGMA schema_version (bumped by every CREATE/ALTER/DROP) and a
+        checksum of the CREATE statements, since a rebuilt database file can
+        reach the same counter with a different schema.
+        MySQL: count and checksum of the database's columns in information_schema.
+        """
+        if self.db_type == 'sqlite':
+            version = self.fetch_rows("PRAGMA schema_version")[0][0]
+            statements = self.fetch_rows("SELECT name, sql FROM sqlite_master ORDER BY name")
+            return f"{version}:{zlib.crc32(repr(statements).encode())}"
+        
+        count, checksum = self.fetch_rows(
+            "SELECT COUNT(*), SUM(CRC32(CONCAT_WS(':', TABLE_NAME, ORDINAL_POSITION, COLUMN_NAME, "
+            "COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY))) FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE()"
+        )[0]
+        return f"{count}:{checksum}"
+    
+    def stream_query(self, sql_query: str, batch_size: Optional[int] = None,
+                     params: tuple = ()) -> Dict[str, Any]:
+        """
+        Run a query and return its rows lazily, in fetchmany batches.
+        params are bound to the statement's placeholders (see param_marker).
+        
+        Returns:
+            {"success", "columns", "capped", "batches"} where batches yields
+            lists of row tuples and closes the cursor when exhausted or closed,
+            or the usual error dictionary. The pooled connection stays
+            checked out until batches is exhausted or closed.
+        """
+        # Generated SQL often starts with a comment, classify what follows it
+        read_only = is_read_only(strip_comments(sql_query))
+        batch_size = batch_size or self.config.get('fetch_batch_size', 500)
+        
+        # Cap the rows of SELECTs without a LIMIT
+        run_sql, capped = self.guard.cap_rows(sql_query) if self.guard is not None and read_only else (sql_query, False)
+        
+        # Reject joins the plan says will blow up before running them
+        if self.guard is not None and read_only:
+            rejected = self.guard.check_cost(self, strip_comments(sql_query), params)
+            if rejected is not None:
+                return rejected
+        
+        try:
+            self._ensure_connection()
+            connection = self.pool.acquire()
+        except Exception as e:
+            return self._error(e)
+        
+        cursor = connection.cursor()
+        deadline = self.guard.deadline() if self.guard is not None else None
+        
+        try:
+            with self._time_limit(connection, deadline):
+                cursor.execute(run_sql, params)
         except Exception as e:
             cursor.close()
-            raise Exception(f"Error getting schema for {table_name}: {e}")
-    
-    def execute_query(self, sql_query: str) -> Dict[str, Any]:
-        """Execute a SQL query and return results."""
-        self._ensure_connection()
-        cursor = self.connection.cursor()
+            self.pool.release(connection)
+            return self._error(e)
+        
+        column_names = [desc[0] for desc in cursor.description] if cursor.description else []
+        
+        batches = self._fetch_batches(connection, cursor, batch_size, deadline)
+        next(batches)  # Enter the try block, so closing an unread stream still releases the connection
         
+        return {
+            "success": True,
+            "columns": column_names,
+            "capped": capped,
+            "batches": batches
+        }
+    
+    def _fetch_batches(self, connection, cursor, batch_size: int,
+                       deadline: Optional[float]) -> Iterator[List[tuple]]:
+        """
+        Yield row tuples batch by batch, closing the cursor and releasing
+        the connection at the end. The first value yielded is None (priming).
+        """
         try:
-            cursor.execute(sql_query)
-            results = cursor.fetchall()
-            
-            # Get column names
-            column_names = [desc[0] for desc in cursor.description] if cursor.description else []
-            
-            # Format as list of dictionaries
-            formatted_results = []
-            for row in results:
-                if self.db_type == 'sqlite':
-                    # SQLite Row object
-                    formatted_results.append(dict(row))
-                else:
-                    # MySQL tuple
-                    formatted_results.append(dict(zip(column_names, row)))
-            
+            yield None
+            if cursor.description is None:
+                return
+            while True:
+                with self._time_limit(connection, deadline):
+                    batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    return
+                # Keep rows as compact tuples (SQLite Row objects / MySQL tuples)
+                yield [tuple(row) for row in batch]
+        finally:
+            if self.db_type != 'sqlite':
+                # MySQL refuses new statements until unread rows are drained
+                try:
+                    connection.consume_results()
+                except Exception:
+                    pass
             cursor.close()
+            self.pool.release(connection)
+    
+    def _time_limit(self, connection, deadline: Optional[float]):
+        """Guard's timeout for one query, or no limit"""
+        if self.guard is None:
+            return nullcontext()
+        return self.guard.time_limit(connection, self.db_type, deadline)
+    
+    def _error(self, e: Exception) -> Dict[str, Any]:
+        """Error result for a failed query (structured if the guard stopped it)"""
+        if self.guard is not None:
+            timed_out = self.guard.timeout_error(e)
+            if timed_out is not None:
+                return timed_out
+        return {
+            "success": False,
+            "error": str(e),
+            "error_type": type(e).__name__
+        }
+    
+    def execute_query(self, sql_query: str, max_rows: Optional[int] = None,
+                      count_total: bool = False, result_format: str = "records",
+                      params: tuple = ()) -> Dict[str, Any]:
+        """
+        Execute a SQL query and return results (from the result cache when possible).
+        
+        Rows are fetched in batches and at most max_rows are kept, so a huge
+        result never turns into a huge list. "truncated" tells if rows were
+        dropped, "total_rows" is the full row count when known (with
+        count_total the remaining batches are counted, not kept).
+        
+        result_format picks the shape of "data": "records" (dict per row),
+        "compact" (list per row) or "columnar" (array per column).
+        params are bound to the statement's placeholders (see param_marker).
+        """
+        params = tuple(params)
+        statement = strip_comments(sql_query)  # A leading comment says nothing about the statement
+        read_only = is_read_only(statement)
+        cacheable = self.result_cache is not None and read_only
+        data_version = None
+        
+        if cacheable:
+            try:
+                data_version = self.get_data_version(referenced_tables(sql_query))
+                cached = self.result_cache.get(sql_query, data_version, params)
+            except Exception:
+                cacheable = False  # Can't tell if the data changed, don't cache
+                cached = None
             
-            return {
-                "success": True,
-                "row_count": len(formatted_results),
-                "columns": column_names,
-                "data": formatted_results
-            }
-            
+            if cached is not None:
+                # Only complete results are cached
+                column_names, rows = cached
+                return self._result(column_names, rows[:max_rows] if max_rows else rows,
+                                    truncated=bool(max_rows) and len(rows) > max_rows,
+                                    total_rows=len(rows), cached=True, result_format=result_format)
+        
+        stream = self.stream_query(sql_query, params=params)
+        if not stream["success"]:
+            return stream
+        
+        # Keep at most max_rows (and no more than the guard's cap)
+        limit = max_rows or None
+        if stream["capped"]:
+            limit = min(limit or self.guard.max_rows, self.guard.max_rows)
+        
+        rows = []
+        seen = 0
+        finished = True
+        batches = stream["batches"]
+        
+        try:
+            for batch in batches:
+                seen += len(batch)
+                if limit is None or len(rows) < limit:
+                    rows.extend(batch if limit is None else batch[:limit - len(rows)])
+                if limit is not None and seen > limit and not count_total:
+                    finished = False
+                    break
         except Exception as e:
-            cursor.close()
-            return {
-                "success": False,
-                "error": str(e),
-                "error_type": type(e).__name__
-            }
+            return self._error(e)
+        finally:
+            batches.close()
+        
+        truncated = limit is not None and seen > limit
+        
+        # Past the guard's cap the real total is unknown
+        guard_cut = stream["capped"] and seen > self.guard.max_rows
+        total_rows = seen if finished and not guard_cut else None
+        
+        if cacheable and not truncated:
+            self.result_cache.set(sql_query, stream["columns"], rows, data_version, params)
+        elif is_write(statement) and self.result_cache is not None:
+            # The file stamp may not move within the same tick as a write
+            self.result_cache.clear()
+        
+        return self._result(stream["columns"], rows, truncated=truncated,
+                            total_rows=total_rows, cached=False, result_format=result_format)
+    
+    @staticmethod
+    def _result(column_names: List[str], rows: List[tuple], truncated: bool,
+                total_rows: Optional[int], cached: bool, result_format: str = "records") -> Dict[str, Any]:
+        """Successful query result with the kept rows in the requested format"""
+        return {
+            "success": True,
+            "row_count": len(rows),
+            "columns": list(column_names),
+            "data": format_rows(column_names, rows, result_format),
+            "format": result_format,
+            "truncated": truncated,
+            "total_rows": total_rows,
+            "cached": cached
+        }
     
+    def explain_query(self, sql_query: str, params: tuple = ()) -> Dict[str, Any]:
+        """
+        Compile a query without running it and return its plan.
+
+        SQLite: EXPLAIN QUERY PLAN. MySQL: EXPLAIN.
+        Errors the query would hit (unknown columns, bad syntax) show up here too.
+        """
+        with self._connection() as connection:
+            cursor = connection.cursor()
+
+            try:
+                if self.db_type == 'sqlite':
+                    cursor.execute(f"EXPLAIN QUERY PLAN {sql_query}", params)
+                else:
+                    cursor.execute(f"EXPLAIN {sql_query}", params)
+
+                column_names = [desc[0] for desc in cursor.description] if cursor.description else []
+                plan = [dict(zip(column_names, tuple(row))) for row in cursor.fetchall()]
+                cursor.close()
+
+                return {
+                    "success": True,
+                    "plan": plan
+                }
+
+            except Exception as e:
+                cursor.close()
+                return {
+                    "success": False,
+                    "error": str(e),
+                    "error_type": type(e).__name__
+                }
+
     def get_sample_data(self, table_name: str, limit: int = 3) -> List[Dict[str, Any]]:
         """Get sample rows from a table."""
         result = self.execute_query(f"SELECT * FROM {table_name} LIMIT {limit}")
@@ -175,7 +606,21 @@ class DatabaseTools:
             return 0
     
     def get_all_tables(self) -> List[Dict[str, Any]]:
-        """Get all tables with their row counts."""
+        """
+        Get all tables with their row counts.
+        Served from the stats catalog when enabled (no table scans).
+        """
+        if self.catalog is not None:
+            return [
+                {
+                    "name": table,
+                    "row_count": entry["row_count"],
+                    "size_bytes": entry["size_bytes"],
+                    "approximate": entry["approximate"]
+                }
+                for table, entry in self.catalog.tables().items()
+            ]
+        
         tables = self.list_tables()
         tables_info = []
         
@@ -188,68 +633,265 @@ class DatabaseTools:
         
         return tables_info
     
+    @property
+    def param_marker(self) -> str:
+        """Placeholder for a bound parameter in this database's SQL"""
+        return "?" if self.db_type == 'sqlite' else "%s"
+    
+    def quote_identifier(self, name: str) -> str:
+        """Quote a table or column name"""
+        if self.db_type == 'sqlite':
+            return '"' + name.replace('"', '""') + '"'
+        return '`' + name.replace('`', '``') + '`'
+    
     def get_table_data(
         self, 
         table_name: str, 
         page: int = 1, 
         page_size: int = 50,
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        result_format: str = "records",
+        cursor: Optional[str] = None,
+        total: str = "approximate"
     ) -> Dict[str, Any]:
-        """Get paginated data from a table with optional search."""
-        offset = (page - 1) * page_size
+        """
+        Get a page of a table with optional search (rows in result_format).
+        
+        Pages are read by key (primary key, or rowid in SQLite) starting from
+        an opaque cursor, so a deep page costs the same as the first one.
+        Follow pagination.next_cursor / prev_cursor to move; page only picks
+        the starting page when no cursor is given (that one read uses OFFSET).
+        Tables without a usable key fall back to OFFSET cursors.
+        
+        total: "approximate" (stats catalog, none while searching),
+        "exact" (COUNT(*) with the search applied) or "none".
+        """
+        if table_name not in self.list_tables():
+            raise ValueError(f"Unknown table '{table_name}'")
+        if total not in ("approximate", "exact", "none"):
+            raise ValueError(f"Unknown total mode '{total}'")
+        
+        schema = self.get_table_schema(table_name)
+        table = self.quote_identifier(table_name)
+        mark = self.param_marker
+        
+        # Key to page by
+        key_columns = [col["name"] for col in schema["columns"] if col["key"] == "PRI"]
+        select = "*"
+        if not key_columns and self.db_type == 'sqlite':
+            key_columns = ["rowid"]
+            select = '*, rowid AS "__rowid__"'  # Dropped from the rows below
+        keys = [self.quote_identifier(k) if k != "rowid" else "rowid" for k in key_columns]
+        
+        # Ranked full-text search when the table is indexed
+        if search and self.search_index is not None:
+            found = self._search_page(table_name, schema, key_columns, select, search,
+                                      cursor, page, page_size, result_format, total)
+            if found is not None:
+                return found
         
-        # Build query with optional search
+        # Otherwise scan with LIKE, search as bound parameters
+        where = []
+        params: List[Any] = []
         if search:
-            schema = self.get_table_schema(table_name)
-            text_columns = [col["name"] for col in schema["columns"] 
-                          if "char" in col["type"].lower() or "text" in col["type"].lower()]
-            
-            if text_columns:
-                search_conditions = " OR ".join([
-                    f"{col} LIKE '%{search}%'" for col in text_columns
-                ])
-                query = f"SELECT * FROM {table_name} WHERE {search_conditions} LIMIT {page_size} OFFSET {offset}"
-                count_query = f"SELECT COUNT(*) as count FROM {table_name} WHERE {search_conditions}"
-            else:
-                query = f"SELECT * FROM {table_name} LIMIT {page_size} OFFSET {offset}"
-                count_query = f"SELECT COUNT(*) as count FROM {table_name}"
-        else:
-            query = f"SELECT * FROM {table_name} LIMIT {page_size} OFFSET {offset}"
-            count_query = f"SELECT COUNT(*) as count FROM {table_name}"
+            columns = text_columns(schema)
+            if columns:
+                where.append("(" + " OR ".join(
+                    f"{self.quote_identifier(col)} LIKE {mark}" for col in columns
+                ) + ")")
+                params += [f"%{search}%"] * len(columns)
+        filters = list(where)
+        filter_params = list(params)
+        
+        # Where to start
+        position = decode_cursor(cursor, table_name) if cursor else None
+        backwards = position is not None and position["direction"] == "before"
+        offset = 0
+        if position is not None and position["direction"] == "offset":
+            offset = position["value"]
+        elif position is None and page > 1:
+            offset = (page - 1) * page_size
+        
+        if keys and position is not None and position["direction"] != "offset":
+            if len(position["value"]) != len(keys):
+                raise ValueError("Cursor does not match the table's key")
+            # Row values compare the whole key: (a, b) > (?, ?)
+            where.append(f"({', '.join(keys)}) {'<' if backwards else '>'} "
+                         f"({', '.join([mark] * len(keys))})")
+            params += position["value"]
         
-        # Execute queries
-        data_result = self.execute_query(query)
-        count_result = self.execute_query(count_query)
+        query = f"SELECT {select} FROM {table}"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        if keys:
+            query += " ORDER BY " + ", ".join(f"{k} {'DESC' if backwards else 'ASC'}" for k in keys)
+        # One extra row tells whether there is another page
+        query += f" LIMIT {page_size + 1}"
+        if offset:
+            query += f" OFFSET {offset}"
         
+        data_result = self.execute_query(query, max_rows=page_size + 1, result_format="compact", params=tuple(params))
         if not data_result["success"]:
             raise Exception(f"Error fetching data: {data_result['error']}")
         
-        total_rows = count_result["data"][0]["count"] if count_result["success"] else 0
-        total_pages = (total_rows + page_size - 1) // page_size
+        columns = data_result["columns"]
+        rows = [tuple(row) for row in data_result["data"]]
+        more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+        
+        key_indexes = [columns.index("__rowid__" if k == "rowid" else k) for k in key_columns]
+        if select != "*":
+            columns = columns[:-1]
+        
+        # Cursors from the first and last row of the page
+        next_cursor = prev_cursor = None
+        has_previous = (position is not None and position["direction"] != "offset") or offset > 0
+        has_next = more
+        if backwards:
+            has_previous, has_next = more, True
+        if keys:
+            if rows and has_next:
+                next_cursor = encode_cursor(table_name, "after", [rows[-1][i] for i in key_indexes])
+            if rows and has_previous:
+                prev_cursor = encode_cursor(table_name, "before", [rows[0][i] for i in key_indexes])
+        else:
+            if has_next:
+                next_cursor = encode_cursor(table_name, "offset", offset + page_size)
+            if has_previous:
+                prev_cursor = encode_cursor(table_name, "offset", max(offset - page_size, 0))
+        if select != "*":
+            rows = [row[:-1] for row in rows]
+        
+        total_rows, total_exact = self._page_total(table_name, filters, filter_params, total)
         
         return {
             "table_name": table_name,
-            "columns": data_result["columns"],
-            "data": data_result["data"],
+            "columns": columns,
+            "data": format_rows(columns, rows, result_format),
+            "format": result_format,
             "pagination": {
-                "page": page,
                 "page_size": page_size,
+                "key": key_columns,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+                "has_next": has_next,
+                "has_previous": has_previous,
                 "total_rows": total_rows,
-                "total_pages": total_pages,
-                "has_next": page < total_pages,
-                "has_previous": page > 1
+                "total_exact": total_exact,
+                "total_pages": (total_rows + page_size - 1) // page_size if total_rows is not None else None
             }
         }
     
+    def _search_page(self, table_name: str, schema: Dict[str, Any], key_columns: List[str], select: str,
+                     search: str, cursor: Optional[str], page: int, page_size: int,
+                     result_format: str, total: str) -> Optional[Dict[str, Any]]:
+        """
+        Page of full-text matches, best first, or None if the table has no
+        search index. Pages continue by match offset (ranked order has no key).
+        """
+        offset = (page - 1) * page_size if page > 1 else 0
+        if cursor:
+            position = decode_cursor(cursor, table_name)
+            if position["direction"] != "offset":
+                raise ValueError("Cursor is not from a search")
+            offset = position["value"]
+        
+        matches = self.search_index.search(table_name, search, offset, page_size + 1)
+        if matches is None:
+            return None
+        more = len(matches) > page_size
+        matches = matches[:page_size]
+        
+        # Fetch the matched rows by key, bound as parameters
+        mark = self.param_marker
+        keys = [self.quote_identifier(k) if k != "rowid" else "rowid" for k in key_columns]
+        rows = []
+        columns = None
+        if matches:
+            if len(keys) == 1:
+                condition = f"{keys[0]} IN ({', '.join([mark] * len(matches))})"
+            else:
+                one = "(" + " AND ".join(f"{k} = {mark}" for k in keys) + ")"
+                condition = " OR ".join([one] * len(matches))
+            params = tuple(value for key in matches for value in key)
+            result = self.execute_query(
+                f"SELECT {select} FROM {self.quote_identifier(table_name)} WHERE {condition}",
+                result_format="compact", params=params
+            )
+            if not result["success"]:
+                raise Exception(f"Error fetching data: {result['error']}")
+            columns = result["columns"]
+            key_indexes = [columns.index("__rowid__" if k == "rowid" else k) for k in key_columns]
+            by_key = {tuple(row[i] for i in key_indexes): tuple(row) for row in result["data"]}
+            # Rows deleted since the index was built are skipped
+            rows = [by_key[tuple(key)] for key in matches if tuple(key) in by_key]
+        
+        if columns is None:
+            columns = [col["name"] for col in schema["columns"]] + (["__rowid__"] if select != "*" else [])
+        if select != "*":
+            columns = columns[:-1]
+            rows = [row[:-1] for row in rows]
+        
+        total_rows = self.search_index.count(table_name, search) if total == "exact" else None
+        # Only the first rank_cap matches found are ranked and reachable
+        cap = self.search_index.rank_cap
+        total_capped = total_rows is not None and cap is not None and total_rows > cap
+        if total_capped:
+            total_rows = cap
+        
+        return {
+            "table_name": table_name,
+            "columns": columns,
+            "data": format_rows(columns, rows, result_format),
+            "format": result_format,
+            "pagination": {
+                "page_size": page_size,
+                "key": key_columns,
+                "ranked": True,
+                "next_cursor": encode_cursor(table_name, "offset", offset + page_size) if more else None,
+                "prev_cursor": encode_cursor(table_name, "offset", max(offset - page_size, 0)) if offset else None,
+                "has_next": more,
+                "has_previous": offset > 0,
+                "total_rows": total_rows,
+                "total_exact": total_rows is not None and not total_capped,
+                "total_capped": total_capped,
+                "rank_limit": cap,
+                "total_pages": (total_rows + page_size - 1) // page_size if total_rows is not None else None
+            }
+        }
+    
+    def _page_total(self, table_name: str, filters: List[str], params: List[Any],
+                    total: str) -> Tuple[Optional[int], bool]:
+        """Row count for a table page: (count or None, whether it is exact)"""
+        if total == "none":
+            return None, False
+        
+        if total == "approximate":
+            if filters:
+                return None, False  # Counting matches is a full scan
+            if self.catalog is not None:
+                entry = self.catalog.table(table_name)
+                if entry is not None:
+                    return entry["row_count"], not entry["approximate"]
+        
+        count_query = f"SELECT COUNT(*) as count FROM {self.quote_identifier(table_name)}"
+        if filters:
+            count_query += " WHERE " + " AND ".join(filters)
+        count_result = self.execute_query(count_query, params=tuple(params))
+        if not count_result["success"]:
+            return None, False
+        return count_result["data"][0]["count"], True
+    
     def close(self):
-        """Close database connection"""
-        if self.connection:
-            if self.db_type == 'sqlite':
-                self.connection.close()
-                print(">> SQLite connection closed")
-            elif self.connection.is_connected():
-                self.connection.close()
-                print(">> MySQL connection closed")
+        """Close database connections"""
+        if self.search_index is not None:
+            self.search_index.close()
+        if self.pool is not None:
+            self.pool.close()
+            print(f">> {'SQLite' if self.db_type == 'sqlite' else 'MySQL'} connections closed")
+            self.pool = None
 
 
 # Tool wrapper functions for LangChain
@@ -76,6 +76,22 @@ class CLI:
         print(f"  Cached Tables: {', '.join(cache_stats['cached_tables']) if cache_stats['cached_tables'] else 'None'}")
         print(f"  Cache Age: {cache_stats['cache_age_minutes']} minutes")
         print(f"  Questions Counted: {cache_stats['questions_asked']}")
+        print(f"  Hit Rate: {cache_stats['hit_rate']:.0%} (cleared {cache_stats['invalidations']}x by schema changes)")
+        
+        if self.agent.question_cache:
+            question_stats = self.agent.question_cache.get_stats()
+            print(f"\nQuestion Cache:")
+            print(f"  Cached Answers: {question_stats['size']}")
+            print(f"  Hits: {question_stats['hits']}, Misses: {question_stats['misses']}")
+            print(f"  Hit Rate: {question_stats['hit_rate']:.0%}")
+        
+        compactor = self.agent.workflow_nodes.compactor
+        if compactor:
+            compaction_stats = compactor.get_stats()
+            print(f"\nPrompt Compaction:")
+            print(f"  SQL Prompts: {compaction_stats['calls']}")
+            print(f"  Tokens Saved: ~{compaction_stats['tokens_saved']} ({compaction_stats['saved_rate']:.0%})")
+            print(f"  Columns Dropped: {compaction_stats['columns_dropped']}")
         
         print("="*80 + "\n")
     
@@ -0,0 +1,117 @@
+"""
+Shared fixtures: a small SQLite copy of the retail schema and a scripted
+stand-in for the Groq client, so the agent runs without network access.
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeGroq:
+    """Replies from a script instead of the Groq API"""
+
+    def __init__(self, sql="SELECT COUNT(*) AS n FROM customers", tables="customers", fail=False):
+        self.sql = sql
+        self.tables = tables
+        self.fail = fail
+        self.prompts = []
+        self.stream_closed = None  # Set by astream_chat: False while streaming, True once closed
+
+    def chat(self, messages, max_tokens=None):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        if self.fail:
+            return {"success": False, "error": "rate limited", "content": None, "tokens_used": 0}
+        if "Which tables" in prompt:
+            content = self.tables
+        elif "Explain the answer" in prompt:
+            content = "Answer from the model."
+        else:
+            content = self.sql
+        return {"success": True, "content": content, "tokens_used": 10,
+                "prompt_tokens": 5, "completion_tokens": 5}
+
+    async def achat(self, messages, max_tokens=None):
+        return self.chat(messages, max_tokens)
+
+    async def astream_chat(self, messages, max_tokens=None):
+        """Yields the chat reply word by word, like GroqClient.astream_chat"""
+        self.stream_closed = False
+        try:
+            reply = self.chat(messages, max_tokens)
+            if reply["success"]:
+                for word in reply["content"].split(" "):
+                    yield {"type": "token", "content": word + " "}
+            yield {"type": "done", "success": reply["success"], "error": reply.get("error"),
+                   "tokens_used": reply["tokens_used"]}
+        finally:
+            self.stream_closed = True
+
+    def get_token_stats(self):
+        return {"session_total": 0, "last_question": 0, "average_per_question": 0, "questions_asked": 0}
+
+    def reset_session(self):
+        pass
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    """SQLite database with the retail tables and a few rows"""
+    path = str(tmp_path / "retail.db")
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE customers (customer_id INTEGER PRIMARY KEY, name TEXT, email TEXT,
+                                signup_date TEXT, country TEXT);
+        CREATE TABLE products (product_id INTEGER PRIMARY KEY, product_name TEXT, category TEXT,
+                               price REAL, stock_count INTEGER);
+        CREATE TABLE orders (order_id INTEGER PRIMARY KEY, customer_id INTEGER, product_id INTEGER,
+                             order_date TEXT, quantity INTEGER, total_amount REAL);
+        INSERT INTO customers VALUES (1, 'Ann', 'ann@example.com', '2024-01-05', 'Canada'),
+                                     (2, 'Bob', 'bob@example.com', '2024-02-11', 'USA');
+        INSERT INTO products VALUES (1, 'Lamp', 'Home', 25.0, 10), (2, 'Desk', 'Office', 300.0, 3);
+        INSERT INTO orders VALUES (1, 1, 1, '2024-03-01', 2, 50.0), (2, 2, 2, '2024-03-02', 1, 300.0),
+                                  (3, 1, 2, '2024-03-09', 2, 600.0);
+    """)
+    connection.commit()
+    connection.close()
+    return path
+
+
+@pytest.fixture
+def db_tools(db_file):
+    from src.mcp.tools import DatabaseTools
+    tools = DatabaseTools({"type": "sqlite", "database": db_file, "search": {"enabled": False}})
+    yield tools
+    tools.close()
+
+
+@pytest.fixture
+def make_agent(db_tools):
+    """Build an SQLAgent around a FakeGroq (keyword arguments go to FakeGroq)"""
+    from src.cache.schema_cache import SchemaCache
+    from src.cache.question_cache import QuestionCache
+    from src.agent.nodes import WorkflowNodes
+    from src.agent.graph import SQLAgent
+
+    def build(question_cache=True, **groq_kwargs):
+        groq = FakeGroq(**groq_kwargs)
+        cache = SchemaCache(0, 0, version_source=db_tools.get_schema_version, loader=db_tools.get_all_schemas)
+        config = {"template_answers": False, "sql_mode": "two_step"}
+        nodes = WorkflowNodes(groq, db_tools, cache, config)
+        return SQLAgent(nodes, QuestionCache() if question_cache else None, config), groq
+
+    return build
+
+
+@pytest.fixture
+def app_module(monkeypatch):
+    """The FastAPI app module (its agent and database are replaced per test)"""
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    import app
+    return app
+
@@ -0,0 +1,43 @@
+import asyncio
+
+
+def test_failed_sql_generation_returns_an_error(make_agent):
+    agent, groq = make_agent(question_cache=False, fail=True)
+
+    result = agent.ask("Which customer spent the most on orders?")
+
+    assert any("Write a" in p for p in groq.prompts)  # Reached generate_sql
+    assert result["sql"] is None
+    assert "rate limited" in result["error"]
+
+
+def test_failed_sql_generation_returns_an_error_async(make_agent):
+    agent, groq = make_agent(question_cache=False, fail=True)
+
+    result = asyncio.run(agent.aask("Which customer spent the most on orders?"))
+
+    assert result["sql"] is None
+    assert "rate limited" in result["error"]
+
+
+def test_validate_sql_without_sql_keeps_the_error(make_agent):
+    agent, _ = make_agent()
+    state = {**agent._initial_state("q"), "execution_error": "Failed to generate SQL: rate limited"}
+
+    result = agent.workflow_nodes.validate_sql(state)
+
+    assert result["execution_error"] == "Failed to generate SQL: rate limited"
+    assert result["workflow_step"] == "error"
+    assert result["should_retry"] is False
+
+
+def test_failed_table_analysis_stops_before_sql_generation(make_agent):
+    agent, groq = make_agent(question_cache=False, fail=True)
+
+    for result in (agent.ask("What happened last quarter?"),
+                   asyncio.run(agent.aask("What happened last quarter?"))):
+        assert "Failed to analyze question" in result["error"]
+        assert result["sql"] is None
+
+    assert len(groq.prompts) == 2
+    assert all("Which tables" in p for p in groq.prompts)
@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+QUESTIONS = ["What is the price of each product?", "Which Office items are low on stock?"]
+
+
+def test_aask_matches_ask(make_agent):
+    agent, _ = make_agent(question_cache=False)
+
+    sync_result = agent.ask(QUESTIONS[0])
+    async_result = asyncio.run(agent.aask(QUESTIONS[0]))
+
+    for key in ("answer", "sql", "tokens_used", "error"):
+        assert async_result[key] == sync_result[key]
+
+
+def test_llm_waits_do_not_block_other_questions(make_agent):
+    agent, groq = make_agent(question_cache=False)
+    calls = []
+
+    async def slow_achat(messages, max_tokens=None):
+        calls.append(messages[-1]["content"])
+        await asyncio.sleep(0.2)  # Network wait on the event loop
+        return groq.chat(messages, max_tokens)
+
+    groq.achat = slow_achat
+
+    async def run():
+        started = time.perf_counter()
+        results = await asyncio.gather(*(agent.aask(q) for q in QUESTIONS))
+        return results, time.perf_counter() - started
+
+    results, elapsed = asyncio.run(run())
+
+    assert all(r["error"] is None for r in results)
+    assert len(calls) == 4  # generate_sql + generate_answer per question, all awaited
+    assert elapsed < 0.2 * len(calls) * 0.75
+
+
+def test_ask_endpoint(app_module, make_agent, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    agent, _ = make_agent(question_cache=False)
+    monkeypatch.setattr(app_module, "agent", agent)
+
+    response = TestClient(app_module.app).post("/api/ask", json={"question": QUESTIONS[0]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["answer"] == "Answer from the model."
+    assert body["error"] is None
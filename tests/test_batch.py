@@ -0,0 +1,24 @@
+import asyncio
+
+
+def test_batch_keeps_opposite_comparisons_apart(make_agent):
+    agent, groq = make_agent(sql="SELECT COUNT(*) AS n FROM orders WHERE total_amount > 100", tables="orders")
+    questions = ["How many orders have total_amount > 100?", "How many orders have total_amount < 100?"]
+
+    results = asyncio.run(agent.aask_many(questions))
+
+    assert [r["question"] for r in results] == questions
+    sql_prompts = [p for p in groq.prompts if "Write a" in p]
+    assert len(sql_prompts) == 2
+    assert any("< 100" in p for p in sql_prompts)
+
+
+def test_batch_merges_exact_repeats(make_agent):
+    agent, groq = make_agent(sql="SELECT customer_id FROM orders GROUP BY customer_id ORDER BY SUM(total_amount) DESC LIMIT 1", tables="orders")
+    questions = ["Which customer spent the most?", "  which customer SPENT the most? "]
+
+    results = asyncio.run(agent.aask_many(questions))
+
+    assert len(results) == 2
+    assert results[0]["answer"] == results[1]["answer"]
+    assert len([p for p in groq.prompts if "Write a" in p]) == 1
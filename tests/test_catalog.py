@@ -0,0 +1,82 @@
+import sqlite3
+import time
+
+import pytest
+
+from src.cache.schema_store import SQLiteSchemaStore
+from src.mcp.catalog import StatsCatalog
+from src.mcp.tools import DatabaseTools
+
+
+def write(db_file, sql):
+    connection = sqlite3.connect(db_file)
+    connection.executescript(sql)
+    connection.commit()
+    connection.close()
+
+
+def wait_for(condition, seconds=2.0):
+    deadline = time.monotonic() + seconds
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_counts_and_cardinality(db_tools):
+    catalog = StatsCatalog(db_tools)
+
+    orders = catalog.table("ORDERS")
+
+    assert orders["row_count"] == 3
+    assert orders["source"] == "count"
+    assert not orders["approximate"]
+    assert catalog.table("customers")["cardinality"]["country"] == 2
+    assert catalog.table("missing") is None
+
+
+def test_analyze_results_are_used(db_tools, db_file):
+    write(db_file, "CREATE INDEX orders_customer ON orders (customer_id); ANALYZE;")
+
+    orders = StatsCatalog(db_tools).table("orders")
+
+    assert orders["source"] == "sqlite_stat1"
+    assert orders["approximate"]
+    assert orders["row_count"] == 3
+    assert 1 <= orders["cardinality"]["customer_id"] <= 2  # Rows per key is rounded up
+
+
+def test_data_changes_refresh_in_the_background(db_tools, db_file):
+    catalog = StatsCatalog(db_tools, check_seconds=0)
+    assert catalog.row_count("orders") == 3
+
+    write(db_file, "INSERT INTO orders VALUES (4, 2, 1, '2024-04-01', 1, 25.0);")
+
+    assert wait_for(lambda: catalog.row_count("orders") == 4)
+    assert catalog.get_stats()["refreshes"] == 2
+
+
+def test_unchanged_data_is_not_read_again(db_tools):
+    catalog = StatsCatalog(db_tools, check_seconds=0)
+    catalog.tables()
+    catalog.tables()
+
+    assert catalog.get_stats()["refreshes"] == 1
+
+
+def test_second_worker_reads_the_store(db_tools, tmp_path):
+    store = SQLiteSchemaStore(str(tmp_path / "store.db"))
+    StatsCatalog(db_tools, store=store).tables()
+
+    second = StatsCatalog(db_tools, store=store)
+
+    assert second.row_count("customers") == 2
+    assert second.get_stats()["store_loads"] == 1
+
+
+def test_table_listing_comes_from_the_catalog(db_tools, monkeypatch):
+    db_tools.catalog.tables()
+    monkeypatch.setattr(db_tools, "get_table_count", lambda table: pytest.fail("counted " + table))
+
+    listing = {t["name"]: t["row_count"] for t in db_tools.get_all_tables()}
+
+    assert listing == {"customers": 2, "orders": 3, "products": 2}
@@ -0,0 +1,76 @@
+import pytest
+
+from src.agent.compactor import PromptCompactor, short_type
+
+
+def column(name, column_type="TEXT", key=""):
+    return {"name": name, "type": column_type, "key": key}
+
+
+AUDIT = [column("created_at", "DATETIME"), column("updated_at", "DATETIME")]
+
+SCHEMAS = {
+    "customers": {"columns": [column("customer_id", "INTEGER", "PRI"), column("name", "VARCHAR(255)"),
+                              column("email", "VARCHAR(255)"), column("country", "VARCHAR(64)"),
+                              column("loyalty_tier", "VARCHAR(16)"), column("referral_code", "VARCHAR(32)")]
+                  + AUDIT, "foreign_keys": []},
+    "orders": {"columns": [column("order_id", "INTEGER", "PRI"), column("customer_id", "INTEGER"),
+                           column("total_amount", "DECIMAL(10,2)"), column("shipping_notes", "TEXT"),
+                           column("gift_message", "TEXT")] + AUDIT,
+               "foreign_keys": [{"column": "customer_id", "references_table": "customers",
+                                 "references_column": "customer_id"}]},
+}
+HINTS = ["orders.customer_id=customers.customer_id"]
+QUESTION = "Total amount spent per country"
+
+
+@pytest.mark.parametrize("column_type, short", [
+    ("VARCHAR(255)", "text"), ("DECIMAL(10,2)", "num"), ("BIGINT", "int"), ("tinyint(1)", "bool"),
+    ("DATETIME", "datetime"), ("DATE", "date"), ("enum('a','b')", "enum('a','b')"), ("BLOB", "blob"),
+])
+def test_short_types(column_type, short):
+    assert short_type(column_type) == short
+
+
+def test_without_a_budget_nothing_is_dropped():
+    prompt, report = PromptCompactor().compact(QUESTION, SCHEMAS, "sqlite", HINTS)
+
+    assert report["dropped_columns"] == 0
+    assert report["saved"] > 0
+    assert "Also in customers, orders: created_at datetime, updated_at datetime" in prompt
+    assert "Joins: orders.customer_id=customers.customer_id" in prompt
+
+
+def test_budget_drops_the_least_relevant_columns_first():
+    full = PromptCompactor().compact(QUESTION, SCHEMAS, "sqlite", HINTS)[1]["tokens"]
+    compactor = PromptCompactor(max_prompt_tokens=full - 15)
+
+    prompt, report = compactor.compact(QUESTION, SCHEMAS, "sqlite", HINTS)
+
+    assert report["tokens"] <= full - 15
+    assert not report["over_budget"]
+    assert 0 < report["dropped_columns"] < 10
+    for kept in ("customer_id", "order_id", "total_amount", "country"):
+        assert kept in prompt
+    for dropped in ("referral_code", "updated_at"):  # Unrelated and last in their tables
+        assert dropped not in prompt
+
+
+def test_keys_and_joins_survive_an_impossible_budget():
+    compactor = PromptCompactor(max_prompt_tokens=1)
+
+    prompt, report = compactor.compact(QUESTION, SCHEMAS, "sqlite", HINTS)
+
+    assert report["over_budget"]
+    assert "customers(customer_id int PK)" in prompt
+    assert "orders(order_id int PK, customer_id int)" in prompt
+    assert compactor.get_stats()["over_budget"] == 1
+
+
+def test_agent_reports_the_saved_prompt_tokens(make_agent):
+    agent, _ = make_agent(question_cache=False)
+
+    result = agent.ask("What is the price of each product?")
+
+    assert result["prompt_tokens_saved"] > 0
+    assert agent.workflow_nodes.compactor.get_stats()["calls"] == 1
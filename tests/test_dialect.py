@@ -0,0 +1,17 @@
+from src.mcp.dialect import transpile_sql
+
+
+def test_missing_sql_passes_through():
+    for sql in (None, ""):
+        assert transpile_sql(sql, "sqlite") == {"sql": sql, "changed": False, "error": None}
+
+
+def test_valid_sqlite_is_unchanged():
+    sql = "SELECT name FROM customers WHERE country = 'Canada'"
+    assert transpile_sql(sql, "sqlite")["changed"] is False
+
+
+def test_backticks_become_double_quotes_for_sqlite():
+    result = transpile_sql("SELECT `name` FROM `customers`", "sqlite")
+    assert result["changed"] is True
+    assert "`" not in result["sql"]
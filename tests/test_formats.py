@@ -0,0 +1,59 @@
+from array import array
+
+import pytest
+
+from src.mcp.formats import column_array, format_rows, to_records
+
+COLUMNS = ["id", "name", "price"]
+ROWS = [(1, "Lamp", 25.0), (2, "Desk", 300.0), (3, None, 12.5)]
+
+
+def test_shapes():
+    assert format_rows(COLUMNS, ROWS, "records")[1] == {"id": 2, "name": "Desk", "price": 300.0}
+    assert format_rows(COLUMNS, ROWS, "compact") == [[1, "Lamp", 25.0], [2, "Desk", 300.0], [3, None, 12.5]]
+    ids, names, prices = format_rows(COLUMNS, ROWS, "columnar")
+    assert ids == array("q", [1, 2, 3])
+    assert names == ["Lamp", "Desk", None]
+    assert prices == array("d", [25.0, 300.0, 12.5])
+
+
+def test_column_arrays_only_for_uniform_numbers():
+    assert column_array([1, 2.5]) == [1, 2.5]
+    assert column_array([1, None]) == [1, None]
+    assert column_array([True, False]) == [True, False]
+    assert column_array([2 ** 70]) == [2 ** 70]
+    assert column_array([]) == []
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        format_rows(COLUMNS, ROWS, "xml")
+
+
+@pytest.mark.parametrize("result_format", ["records", "compact", "columnar"])
+def test_to_records_reads_every_format(result_format):
+    result = {"columns": COLUMNS, "row_count": len(ROWS), "format": result_format,
+              "data": format_rows(COLUMNS, ROWS, result_format)}
+
+    assert to_records(result) == [dict(zip(COLUMNS, row)) for row in ROWS]
+    assert to_records(result, 2) == [dict(zip(COLUMNS, row)) for row in ROWS[:2]]
+
+
+def test_cached_results_come_back_in_the_requested_format(db_tools):
+    sql = "SELECT product_id, product_name FROM products ORDER BY product_id"
+    records = db_tools.execute_query(sql)
+    compact = db_tools.execute_query(sql, result_format="compact")
+    columnar = db_tools.execute_query(sql, result_format="columnar")
+
+    assert compact["cached"] and columnar["cached"]
+    assert compact["data"] == [[1, "Lamp"], [2, "Desk"]]
+    assert list(columnar["data"][0]) == [1, 2]
+    assert to_records(compact) == to_records(columnar) == records["data"]
+
+
+def test_table_data_in_compact_format(db_tools):
+    page = db_tools.get_table_data("products", result_format="compact")
+
+    assert page["format"] == "compact"
+    assert page["columns"][:2] == ["product_id", "product_name"]
+    assert page["data"][0][:2] == [1, "Lamp"]
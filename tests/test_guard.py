@@ -0,0 +1,95 @@
+import pytest
+
+from src.mcp import guard as guard_module
+from src.mcp.guard import QueryGuard
+
+
+@pytest.fixture(params=[True, False], ids=["sqlglot", "regex"])
+def guard(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(guard_module, "HAS_SQLGLOT", False)
+    elif not guard_module.HAS_SQLGLOT:
+        pytest.skip("sqlglot not installed")
+    return QueryGuard(max_rows=100)
+
+
+def test_adds_limit_when_missing(guard):
+    sql, capped = guard.cap_rows("SELECT name FROM customers")
+    assert capped
+    assert sql.endswith("LIMIT 101")
+
+
+def test_keeps_existing_limit(guard):
+    for sql in ("SELECT name FROM customers LIMIT 5",
+                "SELECT name FROM customers LIMIT 5;",
+                "SELECT name FROM customers LIMIT 5 OFFSET 10",
+                "SELECT name FROM customers LIMIT 5, 10"):
+        assert guard.cap_rows(sql) == (sql.rstrip(";"), False)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT name FROM customers LIMIT 5 -- top five",
+    "SELECT name FROM customers LIMIT 5; -- top five",
+    "SELECT name FROM customers LIMIT 5 /* top five */",
+    "SELECT name FROM customers\nLIMIT 5\n-- first page\n",
+])
+def test_trailing_comment_does_not_double_the_limit(guard, sql):
+    run_sql, capped = guard.cap_rows(sql)
+    assert not capped
+    assert run_sql.upper().count("LIMIT") == 1
+
+
+def test_comment_markers_inside_strings_are_kept(guard):
+    sql, capped = guard.cap_rows("SELECT name FROM customers WHERE email = 'a--b@example.com'")
+    assert capped
+    assert "'a--b@example.com'" in sql
+
+
+def test_limit_in_subquery_or_cte_still_caps_the_outer_query():
+    guard = QueryGuard(max_rows=100)
+    if not guard_module.HAS_SQLGLOT:
+        pytest.skip("sqlglot not installed")
+    for sql in ("SELECT * FROM (SELECT name FROM customers LIMIT 5) AS top",
+                "WITH top AS (SELECT name FROM customers LIMIT 5) SELECT * FROM top"):
+        run_sql, capped = guard.cap_rows(sql)
+        assert capped
+        assert run_sql.endswith("LIMIT 101")
+
+
+def test_capped_sql_runs(db_tools):
+    result = db_tools.execute_query("SELECT name FROM customers LIMIT 1 -- first customer")
+    assert result["success"], result.get("error")
+    assert len(result["data"]) == 1
+
+
+@pytest.fixture
+def guarded_tools(db_file):
+    from src.mcp.tools import DatabaseTools
+    tools = DatabaseTools({"type": "sqlite", "database": db_file, "search": {"enabled": False},
+                           "result_cache": {"enabled": False},
+                           "guard": {"max_rows": 1, "max_join_rows": 4}})
+    yield tools
+    tools.close()
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM orders",
+    "-- all orders\nSELECT * FROM orders",
+    "/* x */ SELECT * FROM orders",
+])
+def test_commented_select_is_capped(guarded_tools, sql):
+    result = guarded_tools.execute_query(sql)
+    assert result["success"], result.get("error")
+    assert result["row_count"] == 1
+    assert result["truncated"]
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT o.*, c.* FROM orders o, customers c",
+    "/* x */ SELECT o.*, c.* FROM orders o, customers c",
+    "-- every pair\nSELECT o.*, c.* FROM orders o, customers c",
+])
+def test_commented_cross_join_is_rejected(guarded_tools, sql):
+    result = guarded_tools.execute_query(sql)
+    assert not result["success"]
+    assert result["guard"]["reason"] == "cross_join"
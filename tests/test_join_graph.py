@@ -0,0 +1,38 @@
+import sqlite3
+
+from src.agent.retriever import TableRetriever, stem
+from src.cache.join_graph import JoinGraph
+from src.cache.schema_cache import SchemaCache
+from src.mcp.tools import DatabaseTools
+
+
+def test_neighbours_inferred_from_key_names(db_tools):
+    graph = JoinGraph(db_tools.get_all_schemas())
+
+    assert graph.inferred
+    assert sorted(graph.neighbours("orders")) == ["customers", "products"]
+    assert graph.neighbours("Customers") == ["orders"]
+    assert graph.neighbours("missing") == []
+
+
+def test_retriever_uses_declared_foreign_keys(tmp_path):
+    path = str(tmp_path / "shop.db")
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE customers (customer_id INTEGER PRIMARY KEY, name TEXT);
+        CREATE TABLE sales (sale_id INTEGER PRIMARY KEY,
+                            buyer INTEGER REFERENCES customers (customer_id), amount REAL);
+    """)
+    connection.close()
+    tools = DatabaseTools({"type": "sqlite", "database": path, "search": {"enabled": False}})
+    try:
+        cache = SchemaCache(0, 0, loader=tools.get_all_schemas)
+        cache.load()
+        retriever = TableRetriever(tools, cache, index_values=False)
+        retriever.refresh()
+
+        assert cache.join_graph().neighbours("sales") == ["customers"]
+        assert stem("customers") in retriever.docs["sales"]["terms"]
+        assert stem("sales") in retriever.docs["customers"]["terms"]
+    finally:
+        tools.close()
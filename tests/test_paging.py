@@ -0,0 +1,118 @@
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.mcp.paging import decode_cursor, encode_cursor
+from src.mcp.tools import DatabaseTools
+
+
+@pytest.fixture
+def paged_tools(tmp_path):
+    path = str(tmp_path / "paged.db")
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE items (item_id INTEGER PRIMARY KEY, label TEXT);
+        CREATE TABLE stock (shop TEXT, item INTEGER, qty INTEGER, PRIMARY KEY (shop, item));
+        CREATE TABLE log (message TEXT);
+    """)
+    connection.executemany("INSERT INTO items VALUES (?, ?)", [(i, f"item {i}") for i in range(1, 26)])
+    connection.executemany("INSERT INTO stock VALUES (?, ?, ?)",
+                           [(shop, i, i) for shop in ("a", "b") for i in range(1, 4)])
+    connection.executemany("INSERT INTO log VALUES (?)", [(f"line {i}",) for i in range(1, 8)])
+    connection.commit()
+    connection.close()
+    tools = DatabaseTools({"type": "sqlite", "database": path, "search": {"enabled": False}})
+    yield tools
+    tools.close()
+
+
+def ids(page, column=0):
+    return [row[column] for row in page["data"]]
+
+
+def follow(tools, table, page, direction, **kwargs):
+    return tools.get_table_data(table, page_size=10, result_format="compact",
+                                cursor=page["pagination"][f"{direction}_cursor"], **kwargs)
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("items", "after", [10])
+    assert decode_cursor(cursor, "items") == {"direction": "after", "value": [10]}
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor("log", "after", [1]),
+                                    encode_cursor("items", "offset", -5)])
+def test_bad_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "items")
+
+
+def test_next_and_previous_pages(paged_tools):
+    first = paged_tools.get_table_data("items", page_size=10, result_format="compact")
+    assert ids(first) == list(range(1, 11))
+    assert first["pagination"]["has_next"] and not first["pagination"]["has_previous"]
+    assert first["pagination"]["prev_cursor"] is None
+
+    second = follow(paged_tools, "items", first, "next")
+    third = follow(paged_tools, "items", second, "next")
+    assert ids(second) == list(range(11, 21))
+    assert ids(third) == list(range(21, 26))
+    assert not third["pagination"]["has_next"] and third["pagination"]["next_cursor"] is None
+
+    back = follow(paged_tools, "items", third, "prev")
+    assert ids(back) == list(range(11, 21))
+    assert ids(follow(paged_tools, "items", back, "prev")) == list(range(1, 11))
+
+
+def test_page_number_starts_the_walk(paged_tools):
+    page = paged_tools.get_table_data("items", page=3, page_size=10, result_format="compact")
+    assert ids(page) == list(range(21, 26))
+    assert page["pagination"]["has_previous"]
+
+
+def test_composite_key(paged_tools):
+    first = paged_tools.get_table_data("stock", page_size=4, result_format="compact")
+    second = paged_tools.get_table_data("stock", page_size=4, result_format="compact",
+                                        cursor=first["pagination"]["next_cursor"])
+
+    assert first["pagination"]["key"] == ["shop", "item"]
+    assert [tuple(r[:2]) for r in first["data"] + second["data"]] == \
+        [(shop, i) for shop in ("a", "b") for i in range(1, 4)]
+
+
+def test_tables_without_a_key_page_by_rowid(paged_tools):
+    first = paged_tools.get_table_data("log", page_size=5)
+    second = paged_tools.get_table_data("log", page_size=5, cursor=first["pagination"]["next_cursor"])
+
+    assert first["columns"] == ["message"]
+    assert "__rowid__" not in first["data"][0]
+    assert [r["message"] for r in first["data"] + second["data"]] == [f"line {i}" for i in range(1, 8)]
+
+
+def test_totals(paged_tools):
+    assert paged_tools.get_table_data("items", total="exact")["pagination"]["total_rows"] == 25
+    assert paged_tools.get_table_data("items", total="approximate")["pagination"]["total_rows"] == 25
+    assert paged_tools.get_table_data("items", total="none")["pagination"]["total_rows"] is None
+    searched = paged_tools.get_table_data("items", search="item 1", total="exact")
+    assert searched["pagination"]["total_rows"] == 11  # item 1, item 10-19
+
+
+def test_cursor_of_another_table_is_rejected(paged_tools):
+    other = paged_tools.get_table_data("stock", page_size=2)["pagination"]["next_cursor"]
+    with pytest.raises(ValueError):
+        paged_tools.get_table_data("items", cursor=other)
+
+
+def test_api_answers_bad_cursors_with_400(app_module, paged_tools, monkeypatch):
+    monkeypatch.setattr(app_module, "db_tools", paged_tools)
+    client = TestClient(app_module.app)
+
+    first = client.get("/api/database/data/items", params={"page_size": 10, "format": "compact"})
+    assert first.status_code == 200
+    next_cursor = first.json()["pagination"]["next_cursor"]
+    assert client.get("/api/database/data/items", params={"cursor": next_cursor}).json()["data"][0]["item_id"] == 11
+
+    bad = client.get("/api/database/data/items", params={"cursor": "garbage"})
+    assert bad.status_code == 400
+    assert "cursor" in bad.json()["detail"].lower()
@@ -0,0 +1,184 @@
+import threading
+
+import mysql.connector
+import pytest
+
+from src.mcp import pool as pool_module
+from src.mcp.pool import ConnectionPool, MySQLPool, PoolTimeout, SQLitePool
+
+
+class FakeMySQLConnection:
+    """Stands in for mysql.connector connections (public API only)"""
+
+    def __init__(self):
+        self.closed = False
+        self.pings = 0
+        self.rollbacks = 0
+        self.in_transaction = False
+        self.unread_result = False
+        self.ping_error = False
+
+    def ping(self, reconnect=False, attempts=1):
+        self.pings += 1
+        if self.ping_error:
+            raise mysql.connector.Error("gone away")
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def mysql_pool(monkeypatch):
+    opened = []
+
+    def connect(**kwargs):
+        opened.append(FakeMySQLConnection())
+        return opened[-1]
+
+    monkeypatch.setattr(pool_module.mysql.connector, "connect", connect)
+    pool = MySQLPool({"host": "db"}, size=2, acquire_timeout=0.05, health_check_seconds=30)
+    pool.opened = opened
+    return pool
+
+
+def test_connection_pool_is_abstract():
+    with pytest.raises(TypeError):
+        ConnectionPool()
+
+
+def test_sqlite_nested_checkout_reuses_the_connection(db_file):
+    pool = SQLitePool(db_file, size=1, acquire_timeout=0.05)
+    with pool.connection() as outer:
+        with pool.connection() as inner:
+            assert inner is outer
+    assert pool.get_stats()["in_use"] == 0
+    pool.close()
+
+
+def test_mysql_nested_checkout_reuses_the_connection(mysql_pool):
+    with mysql_pool.connection() as outer:
+        with mysql_pool.connection() as inner:
+            assert inner is outer
+            assert mysql_pool.get_stats()["in_use"] == 1
+    assert mysql_pool.get_stats()["in_use"] == 0
+    assert len(mysql_pool.opened) == 1
+
+
+def test_mysql_nested_checkout_during_a_stream_uses_a_second_connection(mysql_pool):
+    with mysql_pool.connection() as outer:
+        outer.unread_result = True
+        with mysql_pool.connection() as inner:
+            assert inner is not outer
+        outer.unread_result = False
+    assert mysql_pool.get_stats()["in_use"] == 0
+    assert len(mysql_pool.idle) == 2
+
+
+def test_mysql_checkout_waits_then_times_out(mysql_pool):
+    held = []
+    for _ in range(2):
+        thread = threading.Thread(target=lambda: held.append(mysql_pool.acquire()))
+        thread.start()
+        thread.join()
+    with pytest.raises(PoolTimeout):
+        mysql_pool.acquire()
+    for connection in held:
+        mysql_pool.release(connection)
+    assert mysql_pool.get_stats()["timeouts"] == 1
+    assert mysql_pool.get_stats()["in_use"] == 0
+
+
+def test_mysql_release_ends_open_transactions(mysql_pool):
+    with mysql_pool.connection() as connection:
+        connection.in_transaction = True
+    assert connection.rollbacks == 1
+
+
+def test_mysql_idle_connection_is_health_checked(mysql_pool):
+    with mysql_pool.connection() as first:
+        pass
+    mysql_pool.health_check_seconds = 0
+    first.ping_error = True
+    with mysql_pool.connection() as second:
+        assert second is not first
+    assert first.closed
+    assert mysql_pool.get_stats()["health_failures"] == 1
+
+
+def test_mysql_close_closes_idle_and_later_released_connections(mysql_pool):
+    busy = mysql_pool.acquire()
+    used = []
+
+    def use_once():
+        with mysql_pool.connection() as connection:
+            used.append(connection)
+
+    thread = threading.Thread(target=use_once)
+    thread.start()
+    thread.join()
+    idle = used[0]
+    mysql_pool.close()
+    assert idle.closed and not busy.closed
+    mysql_pool.release(busy)
+    assert busy.closed
+
+
+def serving_tools(db_file, **serving):
+    from src.mcp.tools import DatabaseTools
+    return DatabaseTools({"type": "sqlite", "database": db_file, "search": {"enabled": False},
+                          "result_cache": {"enabled": False}, "serving": serving})
+
+
+def test_serving_profile_pragmas(db_file):
+    pool = SQLitePool(db_file, serving={"mmap_mb": 1, "cache_mb": 2, "temp_store_memory": True,
+                                        "query_only": True})
+    connection = pool.acquire()
+    try:
+        assert connection.execute("PRAGMA mmap_size").fetchone()[0] == 1024 * 1024
+        assert connection.execute("PRAGMA cache_size").fetchone()[0] == -2048
+        assert connection.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+        assert connection.execute("PRAGMA query_only").fetchone()[0] == 1
+    finally:
+        pool.release(connection)
+        pool.close()
+
+
+def test_in_memory_copy_serves_a_snapshot(db_file):
+    import sqlite3
+
+    tools = serving_tools(db_file, in_memory=True)
+    try:
+        assert tools.execute_query("SELECT COUNT(*) AS n FROM orders")["data"] == [{"n": 3}]
+        version = tools.get_data_version()
+
+        writer = sqlite3.connect(db_file)
+        writer.execute("DELETE FROM orders")
+        writer.commit()
+        writer.close()
+
+        assert tools.execute_query("SELECT COUNT(*) AS n FROM orders")["data"] == [{"n": 3}]
+        assert tools.get_data_version() == version
+        assert tools.pool.get_stats()["in_memory"]
+        assert not tools.execute_query("DELETE FROM orders")["success"]
+    finally:
+        pool = tools.pool
+        tools.close()
+    assert pool.memory_anchor is None
+
+
+def test_immutable_file_has_a_static_data_version(db_file):
+    tools = serving_tools(db_file, immutable=True)
+    try:
+        assert tools.execute_query("SELECT COUNT(*) AS n FROM customers")["data"] == [{"n": 2}]
+        assert tools.get_data_version().startswith("static:")
+    finally:
+        tools.close()
+
+
+def test_in_memory_needs_the_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        SQLitePool(str(tmp_path / "missing.db"), serving={"in_memory": True})
@@ -0,0 +1,29 @@
+from src.cache.question_cache import QuestionCache
+
+
+def test_synonyms_and_filler_share_a_key():
+    cache = QuestionCache()
+    assert cache.normalize("How many customers do we have?") == cache.normalize("count customers")
+
+
+def test_comparison_operators_stay_in_the_key():
+    cache = QuestionCache()
+    greater = cache.normalize("count orders where total_amount > 500")
+    less = cache.normalize("count orders where total_amount < 500")
+    assert greater != less
+    assert cache.normalize("price >= 5") != cache.normalize("price > 5")
+    assert cache.normalize("price != 5") != cache.normalize("price = 5")
+
+
+def test_numbers_keep_decimals_and_sign():
+    cache = QuestionCache()
+    assert cache.normalize("price above 1.5") == "price above 1.5"
+    assert cache.normalize("price above 1.5") != cache.normalize("price above 15")
+    assert cache.normalize("balance below -2") != cache.normalize("balance below 2")
+
+
+def test_opposite_comparison_is_not_a_hit():
+    cache = QuestionCache()
+    cache.set("count orders where total_amount > 500", {"answer": "1", "sql": "..."}, [])
+    assert cache.get("count orders where total_amount > 500") is not None
+    assert cache.get("count orders where total_amount < 500") is None
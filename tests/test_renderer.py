@@ -0,0 +1,43 @@
+from src.agent.renderer import AnswerRenderer, humanize
+
+
+def results(columns, rows):
+    return {"success": True, "columns": columns, "row_count": len(rows),
+            "data": [dict(zip(columns, row)) for row in rows]}
+
+
+def test_humanize_drops_qualifiers_and_repeated_total():
+    assert humanize("SUM(o.total_amount)") == "total amount"
+    assert humanize("SUM(quantity)") == "total quantity"
+    assert humanize("AVG(p.price)") == "average price"
+    assert humanize("COUNT(*)") == "count"
+    assert humanize("c.signup_date") == "signup date"
+
+
+def test_ordered_results_are_numbered():
+    data = results(["category", "revenue"], [("Office", 900.0), ("Home", 50.0)])
+    answer = AnswerRenderer().render(
+        "Revenue by category", data,
+        "SELECT category, SUM(total_amount) AS revenue FROM orders GROUP BY category ORDER BY revenue DESC"
+    )
+    assert "1. Office" in answer
+    assert "2. Home" in answer
+
+
+def test_unordered_results_are_not_numbered():
+    data = results(["category", "revenue"], [("Home", 50.0), ("Office", 900.0)])
+    answer = AnswerRenderer().render(
+        "Revenue by category", data,
+        "SELECT category, SUM(total_amount) AS revenue FROM orders GROUP BY category"
+    )
+    assert "1." not in answer
+    assert "- Home" in answer
+
+
+def test_order_by_in_a_subquery_is_not_a_ranking():
+    data = results(["category", "n"], [("Home", 1), ("Office", 2)])
+    answer = AnswerRenderer().render(
+        "Orders per category", data,
+        "SELECT category, COUNT(*) AS n FROM (SELECT * FROM products ORDER BY price) GROUP BY category"
+    )
+    assert "1." not in answer
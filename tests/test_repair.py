@@ -0,0 +1,26 @@
+from src.agent.repair import SQLRepairer, classify_error
+from src.cache.schema_cache import SchemaCache
+
+
+def test_keyword_table_after_from_is_unknown_table():
+    problem = classify_error('near "order": syntax error', "SELECT * FROM order")
+    assert problem == {"kind": "unknown_table", "name": "order", "qualifier": None}
+
+
+def test_other_syntax_errors_are_not_unknown_tables():
+    assert classify_error('near "FROM": syntax error', "SELECT name, FROM customers") is None
+    assert classify_error('near "GROUP": syntax error', "SELECT * FROM customers GROUP") is None
+    assert classify_error('near "order": syntax error', "SELECT 'FROM order' x order") is None
+    assert classify_error('near "order": syntax error') is None
+
+
+def test_repairs_keyword_table_from_database_error(db_tools):
+    repairer = SQLRepairer(db_tools, SchemaCache(0, 0))
+    sql = "SELECT COUNT(*) FROM order"
+    error = db_tools.execute_query(sql)["error"]
+
+    repaired = repairer.repair_error(sql, error)
+
+    assert repaired["sql"] == "SELECT COUNT(*) FROM orders"
+    assert repairer.repair_error("SELECT name, FROM customers",
+                                 db_tools.execute_query("SELECT name, FROM customers")["error"]) is None
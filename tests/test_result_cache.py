@@ -0,0 +1,79 @@
+import sqlite3
+
+import pytest
+
+from src.cache.result_cache import ResultCache, canonicalize_sql, is_read_only, is_write
+from src.mcp.tools import DatabaseTools
+
+
+@pytest.fixture
+def cached_tools(db_file):
+    tools = DatabaseTools({"type": "sqlite", "database": db_file, "search": {"enabled": False},
+                           "pool": {"read_only": False}, "serving": {"query_only": False}})
+    yield tools
+    tools.close()
+
+
+def test_canonical_sql_ignores_formatting_outside_literals():
+    assert canonicalize_sql("SELECT  *\nFROM orders ;") == "SELECT * FROM orders"
+    assert canonicalize_sql("SELECT  name FROM t WHERE x = 'a  b'") == "SELECT name FROM t WHERE x ='a  b'"
+
+
+def test_statement_classes():
+    assert is_read_only("WITH t AS (SELECT 1) SELECT * FROM t")
+    assert not is_read_only("UPDATE orders SET quantity = 1")
+    assert is_write("  delete FROM orders")
+    assert not is_write("EXPLAIN QUERY PLAN SELECT 1")
+    assert not is_write("PRAGMA table_info(orders)")
+
+
+def test_repeated_select_is_served_from_cache(cached_tools):
+    sql = "SELECT COUNT(*) AS n FROM orders"
+    assert not cached_tools.execute_query(sql)["cached"]
+    again = cached_tools.execute_query("SELECT COUNT(*)  AS n\nFROM orders;")
+    assert again["cached"]
+    assert again["data"] == [{"n": 3}]
+
+
+def test_changed_data_is_not_served_from_cache(cached_tools, db_file):
+    sql = "SELECT COUNT(*) AS n FROM orders"
+    cached_tools.execute_query(sql)
+
+    writer = sqlite3.connect(db_file)
+    writer.execute("INSERT INTO orders VALUES (4, 2, 1, '2024-04-01', 1, 25.0)")
+    writer.commit()
+    writer.close()
+
+    result = cached_tools.execute_query(sql)
+    assert not result["cached"]
+    assert result["data"] == [{"n": 4}]
+
+
+def test_commented_select_is_cached_and_keeps_other_entries(cached_tools):
+    cached_tools.execute_query("SELECT name FROM customers")
+    commented = "-- every product\nSELECT product_name FROM products"
+
+    assert not cached_tools.execute_query(commented)["cached"]
+    assert cached_tools.execute_query(commented)["cached"]
+    assert cached_tools.execute_query("SELECT name FROM customers")["cached"]
+
+
+def test_only_writes_clear_the_cache(cached_tools):
+    cached_tools.execute_query("SELECT name FROM customers")
+    cached_tools.execute_query("PRAGMA table_info(customers)")
+    assert cached_tools.execute_query("SELECT name FROM customers")["cached"]
+
+    cached_tools.execute_query("UPDATE customers SET country = 'USA' WHERE customer_id = 1")
+    assert cached_tools.result_cache.get_stats()["size"] == 0
+
+
+def test_lru_eviction_within_budget():
+    cache = ResultCache(max_bytes=4000)
+    rows = [(i, "x" * 20) for i in range(5)]
+    for i in range(20):
+        cache.set(f"SELECT {i}", ["a", "b"], rows, "v1")
+    stats = cache.get_stats()
+    assert stats["bytes_used"] <= 4000
+    assert stats["evictions"] > 0
+    assert cache.get("SELECT 19", "v1") is not None
+    assert cache.get("SELECT 19", "v2") is None
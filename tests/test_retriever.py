@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+from src.agent.retriever import TableRetriever, tokenize
+from src.cache.schema_cache import SchemaCache
+
+
+@pytest.fixture
+def retriever(db_tools):
+    return TableRetriever(db_tools, SchemaCache(0, 0))
+
+
+def test_tokenize_stems_and_drops_stopwords():
+    assert tokenize("Show the customerNames of all orders") == tokenize("customer name order")
+
+
+def test_confident_question_picks_its_tables(retriever):
+    retrieval = retriever.retrieve("What is the price of each product?")
+
+    assert retrieval["confident"]
+    assert retrieval["tables"] == ["products"]
+
+
+def test_relative_cutoff_keeps_close_runners_up(db_tools):
+    question = "Which customer spent the most on orders?"
+    strict = TableRetriever(db_tools, SchemaCache(0, 0), relative_cutoff=0.5).retrieve(question)
+    loose = TableRetriever(db_tools, SchemaCache(0, 0), relative_cutoff=0.4).retrieve(question)
+
+    assert strict["tables"] == ["orders"]
+    assert loose["tables"] == ["orders", "customers"]
+
+
+def test_column_values_are_indexed(db_tools):
+    question = "Which Office items are low on stock?"
+    assert TableRetriever(db_tools, SchemaCache(0, 0)).retrieve(question)["scores"]["products"] > \
+        TableRetriever(db_tools, SchemaCache(0, 0), index_values=False).retrieve(question)["scores"]["products"]
+
+
+@pytest.mark.parametrize("question", [
+    "What happened last quarter?",      # Nothing the index knows
+    "How many buyers live in Canada?",  # Too few known words
+])
+def test_unfamiliar_questions_are_not_confident(retriever, question):
+    assert not retriever.retrieve(question)["confident"]
+
+
+def test_new_tables_are_indexed_on_refresh(retriever, db_file):
+    retriever.retrieve("price of each product")
+    connection = sqlite3.connect(db_file)
+    connection.execute("CREATE TABLE suppliers (supplier_id INTEGER PRIMARY KEY, supplier_name TEXT)")
+    connection.close()
+
+    assert retriever.retrieve("Which suppliers do we use?")["tables"] == ["suppliers"]
+
+
+def test_confident_retrieval_skips_the_table_prompt(make_agent):
+    agent, groq = make_agent(question_cache=False)
+
+    result = agent.ask("What is the price of each product?")
+
+    assert result["tokens_breakdown"]["analyze"] == 0
+    assert not any("Which tables" in p for p in groq.prompts)
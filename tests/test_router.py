@@ -0,0 +1,72 @@
+import pytest
+
+from src.agent.router import DirectSQLRouter, format_value, sql_literal
+from src.cache.schema_cache import SchemaCache
+
+
+@pytest.fixture
+def router(db_tools):
+    return DirectSQLRouter(db_tools, SchemaCache(0, 0))
+
+
+def answer(router, db_tools, question):
+    route = router.match(question)
+    assert route is not None, question
+    result = db_tools.execute_query(route["sql"])
+    assert result["success"], result.get("error")
+    return route, router.render_answer(route, result)
+
+
+@pytest.mark.parametrize("question, sql", [
+    ("How many customers?", "SELECT COUNT(*) AS count FROM customers"),
+    ("how many customers do we have", "SELECT COUNT(*) AS count FROM customers"),
+    ("Number of orders in total", "SELECT COUNT(*) AS count FROM orders"),
+    ("Count of product", "SELECT COUNT(*) AS count FROM products"),
+    ("Show all customers", "SELECT * FROM customers LIMIT 10"),
+    ("Top 2 products by price", "SELECT * FROM products ORDER BY price DESC LIMIT 2"),
+    ("bottom 1 orders by amount", "SELECT * FROM orders ORDER BY total_amount ASC LIMIT 1"),
+    ("How many orders where quantity is 2?", "SELECT COUNT(*) AS count FROM orders WHERE quantity = 2"),
+    ("How many products with price over 100", "SELECT COUNT(*) AS count FROM products WHERE price > 100"),
+    ("List customers where country is usa",
+     "SELECT * FROM customers WHERE LOWER(country) = LOWER('usa') LIMIT 10"),
+])
+def test_patterns_build_sql(router, question, sql):
+    assert router.match(question)["sql"] == sql
+
+
+def test_value_finds_its_column(router, db_tools):
+    route, text = answer(router, db_tools, "How many customers from Canada?")
+    assert route["sql"] == "SELECT COUNT(*) AS count FROM customers WHERE LOWER(country) = LOWER('Canada')"
+    assert text == "There are 1 customers where country = Canada."
+
+
+def test_answers_are_filled_from_the_results(router, db_tools):
+    assert answer(router, db_tools, "How many orders?")[1] == "There are 3 orders."
+    assert answer(router, db_tools, "Top 1 products by price")[1] == "Top 1 products by price: Desk (300.00)."
+
+
+@pytest.mark.parametrize("question", [
+    "How many unicorns?",                        # No such table
+    "Top 3 products by colour",                  # No such column
+    "How many customers from Atlantis?",         # Value in no column
+    "Which customer spent the most on orders?",  # Not a simple shape
+])
+def test_unresolved_questions_go_to_the_llm(router, question):
+    assert router.match(question) is None
+
+
+def test_quotes_in_values_are_escaped():
+    assert sql_literal("O'Brien") == "'O''Brien'"
+    assert sql_literal("12.5") == "12.5"
+    assert format_value(1234567) == "1,234,567"
+    assert format_value(2.5) == "2.50"
+
+
+def test_agent_answers_direct_questions_without_the_llm(make_agent):
+    agent, groq = make_agent(question_cache=False)
+
+    result = agent.ask("How many customers?")
+
+    assert result["answer"] == "There are 2 customers."
+    assert result["tokens_used"] == 0
+    assert groq.prompts == []
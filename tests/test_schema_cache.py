@@ -0,0 +1,146 @@
+import sqlite3
+
+import pytest
+
+from src.cache.schema_cache import SchemaCache
+from src.mcp.tools import DatabaseTools
+
+
+@pytest.fixture
+def fk_tools(tmp_path):
+    path = str(tmp_path / "shop.db")
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE customers (customer_id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+        CREATE TABLE products (product_id INTEGER PRIMARY KEY, product_name TEXT);
+        CREATE TABLE orders (order_id INTEGER PRIMARY KEY,
+                             customer_id INTEGER REFERENCES customers (customer_id),
+                             product_id INTEGER REFERENCES products, quantity INTEGER DEFAULT 1);
+    """)
+    connection.close()
+    tools = DatabaseTools({"type": "sqlite", "database": path, "search": {"enabled": False}})
+    yield tools
+    tools.close()
+
+
+def counting_loader(db_tools):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return db_tools.get_all_schemas()
+    return loader, calls
+
+
+def test_get_all_schemas_matches_per_table_reads(fk_tools):
+    schemas = fk_tools.get_all_schemas()
+
+    assert sorted(schemas) == ["customers", "orders", "products"]
+    for table, schema in schemas.items():
+        assert schema == fk_tools.get_table_schema(table)
+    assert sorted(schemas["orders"]["foreign_keys"], key=lambda fk: fk["column"]) == [
+        {"column": "customer_id", "references_table": "customers", "references_column": "customer_id"},
+        {"column": "product_id", "references_table": "products", "references_column": None},
+    ]
+
+
+def test_get_or_load_reads_each_table_once(db_tools):
+    cache = SchemaCache(0, 0)
+    calls = []
+
+    def loader(table_name):
+        calls.append(table_name)
+        return db_tools.get_table_schema(table_name)
+
+    first = cache.get_or_load("orders", loader)
+    assert cache.get_or_load("orders", loader) is first
+    assert calls == ["orders"]
+
+
+def test_reset_reloads_tables_and_join_graph(fk_tools):
+    loader, calls = counting_loader(fk_tools)
+    cache = SchemaCache(0, 0, loader=loader)
+    assert cache.load() == 3
+
+    cache.clear()  # /api/reset
+
+    assert cache.join_graph() is not None
+    assert cache.join_graph().connect(["customers", "products"]) == ["orders"]
+    assert sorted(cache.table_names()) == ["customers", "orders", "products"]
+    assert cache.get("orders") is not None
+    assert len(calls) == 2
+
+
+def test_question_count_clear_reloads_on_next_use(fk_tools):
+    loader, calls = counting_loader(fk_tools)
+    cache = SchemaCache(0, max_questions=2, loader=loader)
+    cache.load()
+
+    cache.increment_question_count()
+    cache.increment_question_count()
+
+    assert cache.tables is None
+    assert cache.table_names() is not None
+    assert len(calls) == 2
+
+
+def test_without_loader_clear_falls_back_to_the_database(db_tools):
+    cache = SchemaCache(0, 0)
+    cache.set_many(db_tools.get_all_schemas())
+    cache.clear()
+
+    assert cache.table_names() is None
+    assert cache.join_graph() is None
+
+
+def add_column(db_file):
+    connection = sqlite3.connect(db_file)
+    connection.execute("ALTER TABLE customers ADD COLUMN phone TEXT")
+    connection.close()
+
+
+def columns(schema):
+    return [c["name"] for c in schema["columns"]]
+
+
+def test_schema_version_moves_on_ddl_only(db_tools, db_file):
+    version = db_tools.get_schema_version()
+    db_tools.execute_query("SELECT * FROM customers")
+    assert db_tools.get_schema_version() == version
+
+    add_column(db_file)
+    assert db_tools.get_schema_version() != version
+
+
+def test_schema_change_reloads_the_cache(db_tools, db_file):
+    cache = SchemaCache(0, 0, version_source=db_tools.get_schema_version, check_seconds=0,
+                        loader=db_tools.get_all_schemas)
+    cache.load()
+    assert "phone" not in columns(cache.get("customers"))
+
+    add_column(db_file)
+
+    assert "phone" in columns(cache.get("customers"))
+    assert cache.get_stats()["invalidations"] == 1
+
+
+def test_version_checks_are_throttled(db_tools, db_file):
+    cache = SchemaCache(0, 0, version_source=db_tools.get_schema_version, check_seconds=3600)
+    cache.get_or_load("customers", db_tools.get_table_schema)
+
+    add_column(db_file)
+
+    assert "phone" not in columns(cache.get("customers"))
+    assert cache.check_version(force=True)
+    assert cache.get("customers") is None
+
+
+def test_failed_version_check_keeps_the_cache(db_tools):
+    def broken():
+        raise RuntimeError("database away")
+
+    cache = SchemaCache(0, 0, version_source=broken, check_seconds=0)
+    cache.set("customers", db_tools.get_table_schema("customers"))
+
+    assert cache.get("customers") is not None
+    assert cache.get_stats()["invalidations"] == 0
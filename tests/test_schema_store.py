@@ -0,0 +1,40 @@
+import pytest
+
+from src.cache.schema_cache import SchemaCache
+from src.cache.schema_store import SchemaStore, SQLiteSchemaStore, create_schema_store
+
+
+def test_schema_store_is_abstract():
+    with pytest.raises(TypeError):
+        SchemaStore()
+
+
+def test_payload_is_keyed_by_identity_and_version(tmp_path):
+    store = SQLiteSchemaStore(str(tmp_path / "store.db"))
+    store.put("sqlite:/a.db", "schemas", "v1", {"customers": {"columns": []}})
+
+    assert store.get("sqlite:/a.db", "schemas", "v1") == {"customers": {"columns": []}}
+    assert store.get("sqlite:/a.db", "schemas", "v2") is None
+    assert store.get("sqlite:/b.db", "schemas", "v1") is None
+
+
+def test_disabled_store():
+    assert create_schema_store({"enabled": False}) is None
+
+
+def test_second_worker_loads_from_the_store(tmp_path, db_tools):
+    store = SQLiteSchemaStore(str(tmp_path / "store.db"))
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return db_tools.get_all_schemas()
+
+    for _ in range(2):
+        cache = SchemaCache(0, 0, version_source=db_tools.get_schema_version, loader=loader,
+                            store=store, db_identity=db_tools.identity)
+        assert cache.load() == 3
+
+    assert len(calls) == 1
+    assert cache.get_stats()["store_loads"] == 1
+    assert cache.get("orders") == db_tools.get_table_schema("orders")
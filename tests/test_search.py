@@ -0,0 +1,86 @@
+import sqlite3
+
+import pytest
+
+from src.mcp.tools import DatabaseTools
+
+
+@pytest.fixture
+def search_tools(tmp_path):
+    path = str(tmp_path / "notes.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE notes (note_id INTEGER PRIMARY KEY, body TEXT)")
+    connection.executemany("INSERT INTO notes VALUES (?, ?)",
+                           [(i, f"lamp order {i}") for i in range(1, 13)])
+    connection.commit()
+    connection.close()
+
+    def make(rank_limit):
+        tools = DatabaseTools({"type": "sqlite", "database": path,
+                               "search": {"rank_limit": rank_limit}})
+        created.append(tools)
+        return tools
+
+    created = []
+    yield make
+    for tools in created:
+        tools.close()
+
+
+def read_all(tools):
+    page = tools.get_table_data("notes", page_size=2, search="lamp", total="exact")
+    pages = [page]
+    while page["pagination"]["has_next"]:
+        page = tools.get_table_data("notes", page_size=2, search="lamp", total="exact",
+                                    cursor=page["pagination"]["next_cursor"])
+        pages.append(page)
+    return pages
+
+
+def test_total_and_pages_stop_at_rank_limit(search_tools):
+    pages = read_all(search_tools(5))
+    pagination = pages[0]["pagination"]
+
+    assert pagination["ranked"] is True
+    assert pagination["total_rows"] == 5
+    assert pagination["total_capped"] is True
+    assert pagination["total_exact"] is False
+    assert pagination["rank_limit"] == 5
+    assert pagination["total_pages"] == 3
+    assert sum(len(page["data"]) for page in pages) == 5
+
+
+def test_no_cap_below_rank_limit(search_tools):
+    pages = read_all(search_tools(1000))
+    pagination = pages[0]["pagination"]
+
+    assert pagination["total_rows"] == 12
+    assert pagination["total_capped"] is False
+    assert pagination["total_exact"] is True
+    ids = [row["note_id"] for page in pages for row in page["data"]]
+    assert sorted(ids) == list(range(1, 13))
+
+
+def test_zero_rank_limit_ranks_every_match(search_tools):
+    pages = read_all(search_tools(0))
+
+    assert pages[0]["pagination"]["rank_limit"] is None
+    assert pages[0]["pagination"]["total_rows"] == 12
+    assert sum(len(page["data"]) for page in pages) == 12
+
+
+def test_best_match_first_when_every_match_is_ranked(tmp_path):
+    path = str(tmp_path / "ranked.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE notes (note_id INTEGER PRIMARY KEY, body TEXT)")
+    connection.executemany("INSERT INTO notes VALUES (?, ?)",
+                           [(i, f"desk and chair set number {i} with lamp") for i in range(1, 10)]
+                           + [(10, "lamp lamp lamp")])
+    connection.commit()
+    connection.close()
+    tools = DatabaseTools({"type": "sqlite", "database": path, "search": {"rank_limit": 1000}})
+    try:
+        page = tools.get_table_data("notes", page_size=3, search="lamp")
+        assert page["data"][0]["note_id"] == 10
+    finally:
+        tools.close()
@@ -0,0 +1,42 @@
+import pytest
+
+QUESTION = "Which customer spent the most on orders?"
+SQL = "SELECT name FROM customers JOIN orders USING (customer_id) GROUP BY name ORDER BY SUM(total_amount) DESC"
+
+
+def test_single_call_plans_tables_and_sql_in_one_prompt(make_agent):
+    agent, groq = make_agent(question_cache=False, sql=SQL)
+
+    result = agent.ask(QUESTION, sql_mode="single_call")
+
+    assert result["sql"] == SQL
+    assert result["error"] is None
+    assert "plan_sql" in result["tokens_breakdown"]
+    assert not any("Which tables" in p for p in groq.prompts)
+    assert len(groq.prompts) == 2  # Plan + answer
+
+
+def test_two_step_is_the_default(make_agent):
+    agent, groq = make_agent(question_cache=False, sql=SQL)
+
+    result = agent.ask(QUESTION)
+
+    assert "plan_sql" not in result["tokens_breakdown"]
+    assert "generate_sql" in result["tokens_breakdown"]
+
+
+def test_large_schema_falls_back_to_two_steps(make_agent):
+    agent, groq = make_agent(question_cache=False, sql=SQL)
+    agent.workflow_nodes.config["single_call_max_tokens"] = 10
+
+    result = agent.ask(QUESTION, sql_mode="single_call")
+
+    assert result["sql"] == SQL
+    assert "plan_sql" not in result["tokens_breakdown"]
+    assert "generate_sql" in result["tokens_breakdown"]
+
+
+def test_unknown_sql_mode_is_rejected(make_agent):
+    agent, _ = make_agent()
+    with pytest.raises(ValueError):
+        agent.ask(QUESTION, sql_mode="three_step")
@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+
+from src.mcp.tools import DatabaseTools
+
+
+@pytest.fixture
+def events_tools(tmp_path):
+    path = str(tmp_path / "events.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE events (event_id INTEGER PRIMARY KEY, kind TEXT)")
+    connection.executemany("INSERT INTO events VALUES (?, ?)", [(i, f"kind{i % 3}") for i in range(1, 26)])
+    connection.commit()
+    connection.close()
+    tools = DatabaseTools({"type": "sqlite", "database": path, "fetch_batch_size": 10,
+                           "search": {"enabled": False}, "result_cache": {"enabled": False},
+                           "guard": {"max_rows": 20}})
+    yield tools
+    tools.close()
+
+
+def test_stream_query_yields_batches_and_releases_the_connection(events_tools):
+    stream = events_tools.stream_query("SELECT event_id FROM events LIMIT 25")
+
+    assert stream["columns"] == ["event_id"]
+    assert events_tools.pool.get_stats()["in_use"] == 1
+    sizes = [len(batch) for batch in stream["batches"]]
+
+    assert sizes == [10, 10, 5]
+    assert events_tools.pool.get_stats()["in_use"] == 0
+
+
+def test_closing_an_unread_stream_releases_the_connection(events_tools):
+    stream = events_tools.stream_query("SELECT * FROM events LIMIT 25", batch_size=4)
+    next(stream["batches"])
+    stream["batches"].close()
+
+    assert events_tools.pool.get_stats()["in_use"] == 0
+
+
+def test_max_rows_truncates_without_counting(events_tools):
+    result = events_tools.execute_query("SELECT * FROM events LIMIT 25", max_rows=7)
+
+    assert result["row_count"] == 7
+    assert result["truncated"]
+    assert result["total_rows"] is None
+
+
+def test_count_total_reads_past_max_rows(events_tools):
+    result = events_tools.execute_query("SELECT * FROM events LIMIT 25", max_rows=7, count_total=True)
+
+    assert result["row_count"] == 7
+    assert result["truncated"]
+    assert result["total_rows"] == 25
+
+
+def test_complete_results_know_their_total(events_tools):
+    result = events_tools.execute_query("SELECT * FROM events WHERE kind = 'kind0'")
+
+    assert not result["truncated"]
+    assert result["total_rows"] == result["row_count"] == 8
+
+
+def test_guard_cap_hides_the_real_total(events_tools):
+    result = events_tools.execute_query("SELECT * FROM events", count_total=True)
+
+    assert result["row_count"] == 20
+    assert result["truncated"]
+    assert result["total_rows"] is None
@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+QUESTION = "Which customer spent the most on orders?"
+
+
+async def collect(events, stop_at=None):
+    seen = []
+    async for event in events:
+        seen.append(event)
+        if event["event"] == stop_at:
+            break
+    return seen
+
+
+def test_event_order(make_agent):
+    agent, groq = make_agent(question_cache=False)
+
+    events = asyncio.run(collect(agent.astream(QUESTION)))
+    names = [e["event"] for e in events]
+
+    assert names[:4] == ["start", "tables", "sql", "rows"]
+    tokens = [e["data"]["token"] for e in events if e["event"] == "answer_token"]
+    assert tokens and names[4:4 + len(tokens)] == ["answer_token"] * len(tokens)
+    assert names[4 + len(tokens):] == ["answer", "done"]
+    assert events[-2]["data"]["answer"] == "".join(tokens) == "Answer from the model. "
+    assert events[-1]["data"]["sql"] == groq.sql
+    assert groq.stream_closed is True
+
+
+def test_failed_stream_falls_back_to_the_rows(make_agent):
+    agent, groq = make_agent(question_cache=False)
+
+    async def run():
+        groq.fail = False
+        events = []
+        async for event in agent.astream(QUESTION):
+            events.append(event)
+            if event["event"] == "rows":
+                groq.fail = True  # The answer call fails
+        return events
+
+    events = asyncio.run(run())
+
+    assert [e["event"] for e in events][-2:] == ["answer", "done"]
+    assert events[-2]["data"]["answer"].startswith("Query returned 1 rows")
+
+
+def test_disconnect_closes_the_groq_stream(make_agent):
+    agent, groq = make_agent(question_cache=False)
+
+    async def run():
+        events = agent.astream(QUESTION)
+        await collect(events, stop_at="answer_token")
+        assert groq.stream_closed is False
+        await events.aclose()  # What the endpoint does when the client goes away
+        return groq.stream_closed
+
+    assert asyncio.run(run()) is True
+
+
+def test_stream_endpoint_sends_server_sent_events(app_module, make_agent, monkeypatch):
+    agent, _ = make_agent(question_cache=False)
+    monkeypatch.setattr(app_module, "agent", agent)
+
+    response = TestClient(app_module.app).post("/api/ask/stream", json={"question": QUESTION})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    blocks = [b for b in response.text.split("\n\n") if b]
+    names = [b.split("\n")[0].removeprefix("event: ") for b in blocks]
+    assert names[0] == "start" and names[-2:] == ["answer", "done"]
+    done = json.loads(blocks[-1].split("\n")[1].removeprefix("data: "))
+    assert done["answer"] == "Answer from the model. "